@@ -0,0 +1,226 @@
+"""
+Adaptive time grids for dynamic flowsheets.
+
+A uniform grid puts as many elements on the flat parts of a trajectory as on the fast parts
+(e.g the step in heat_duty_eq in live_data_tests/dynamics.py). Instead, solve on a coarse grid,
+estimate the local truncation error of each element from the second differences of the
+differential states, split the elements where the error is too big, rebuild the model on the
+new (non-uniform) time points, move the solution over, and solve again.
+
+The model has to be built by a function of the time points, which creates the flowsheet with
+time_set=time_points and discretises it with discretize() (or finite differences with
+nfe=len(time_points) - 1, so no extra points are added):
+
+    def build_model(time_points):
+        m = pyo.ConcreteModel()
+        m.fs = FlowsheetBlock(dynamic=True, time_set=time_points, time_units=pyo.units.s)
+        ...
+        discretize(m.fs)
+        ...
+        return m
+
+    m, history = solve_adaptive(build_model, [0, 0.25, 0.5, 0.75, 1])
+
+The time points of the final model can then be stored alongside the values, since they aren't
+equally spaced.
+"""
+import numpy as np
+import pyomo.environ as pyo
+from pyomo.core.base.componentuid import ComponentUID
+from pyomo.dae import DerivativeVar
+from pyomo.dae.flatten import flatten_dae_components
+from pyomo.opt import TerminationCondition
+from idaes.core.solvers import get_solver
+from idaes.core.util.exceptions import ConfigurationError
+import idaes.logger as idaeslog
+
+_log = idaeslog.getLogger(__name__)
+
+
+def discretize(fs, scheme="BACKWARD"):
+    """
+    Discretise a flowsheet with one finite element between each of its time points.
+    """
+    pyo.TransformationFactory("dae.finite_difference").apply_to(
+        fs, nfe=len(fs.time) - 1, wrt=fs.time, scheme=scheme
+    )
+
+
+def _time_var_references(m, time):
+    """
+    Dict of ComponentUID string -> Reference indexed by time, for every time indexed variable.
+    """
+    _, time_vars = flatten_dae_components(m, time, pyo.Var)
+    return {str(ComponentUID(ref.referent)): ref for ref in time_vars}
+
+
+def _state_references(m, time):
+    """
+    The time indexed References of the differential state variables (the ones with a DerivativeVar).
+    """
+    states = {dv.get_state_var() for dv in m.component_objects(DerivativeVar, descend_into=True)}
+    return [
+        ref for ref in _time_var_references(m, time).values()
+        if next(iter(ref.values())).parent_component() in states
+    ]
+
+
+def estimate_error(m, time=None, rtol=1e-3, atol=1e-6, variables=None):
+    """
+    Estimate the local truncation error of each finite element of a solved model.
+    By default the error is measured on the differential states. Pass a list of time
+    indexed components (names or components) as variables to measure other values too,
+    e.g an outlet temperature that responds to a step change in an input.
+
+    For backward Euler the local error of an element of length h is about h^2/2 * |x''|,
+    with x'' estimated from the second differences of the solution on the (non-uniform) grid.
+    The error of each state is divided by atol + rtol * max|x|, so an element needs refining
+    when its error is more than 1.
+
+    Returns:
+        Array of the scaled error of each element (len(time) - 1)
+    """
+    if time is None:
+        time = m.fs.time
+    t = np.array(list(time), dtype=float)
+    h = np.diff(t)
+    if len(t) < 3:
+        return np.full(len(h), np.inf)
+
+    if variables is None:
+        measured = _state_references(m, time)
+    else:
+        measured = [m.find_component(v) if isinstance(v, str) else v for v in variables]
+
+    errors = np.zeros(len(h))
+    for ref in measured:
+        x = np.array([pyo.value(ref[ti]) if ref[ti].value is not None else np.nan for ti in time])
+        if np.any(np.isnan(x)):
+            continue
+        slopes = np.diff(x) / h
+        # second derivative at the interior points
+        d2 = 2 * np.diff(slopes) / (h[:-1] + h[1:])
+        # each element uses the biggest curvature at either end
+        curvature = np.zeros(len(h))
+        curvature[:-1] = np.abs(d2)
+        curvature[1:] = np.maximum(curvature[1:], np.abs(d2))
+        scale = atol + rtol * np.max(np.abs(x))
+        errors = np.maximum(errors, 0.5 * h ** 2 * curvature / scale)
+    return errors
+
+
+def refine_time_points(time_points, errors, min_step=0.0, max_points=None):
+    """
+    Split every element with an error more than 1 in half.
+    Elements shorter than 2 * min_step are not split (e.g at a discontinuity that never converges).
+    If max_points is given, only the elements with the biggest errors are split.
+    """
+    t = np.array(time_points, dtype=float)
+    h = np.diff(t)
+    candidates = np.flatnonzero((errors > 1) & (h >= 2 * min_step))
+    if max_points is not None:
+        candidates = candidates[np.argsort(-errors[candidates])][:max(0, max_points - len(t))]
+    midpoints = t[candidates] + h[candidates] / 2
+    return sorted(set(t.tolist()) | set(midpoints.tolist()))
+
+
+def transfer_solution(source, target, time_source=None, time_target=None):
+    """
+    Copy the values of the unfixed variables from one model to another with the same structure
+    but different time points, interpolating the time indexed variables linearly.
+    """
+    if time_source is None:
+        time_source = source.fs.time
+    if time_target is None:
+        time_target = target.fs.time
+    t_source = np.array(list(time_source), dtype=float)
+    t_target = list(time_target)
+
+    scalar_source, _ = flatten_dae_components(source, time_source, pyo.Var)
+    scalar_values = {str(ComponentUID(v, context=source)): v.value for v in scalar_source}
+    scalar_target, _ = flatten_dae_components(target, time_target, pyo.Var)
+    for v in scalar_target:
+        value = scalar_values.get(str(ComponentUID(v, context=target)))
+        if value is not None and not v.fixed:
+            v.set_value(value, skip_validation=True)
+
+    source_refs = _time_var_references(source, time_source)
+    for name, ref in _time_var_references(target, time_target).items():
+        old = source_refs.get(name)
+        if old is None:
+            continue
+        values = np.array([old[t].value if old[t].value is not None else np.nan for t in time_source], dtype=float)
+        known = ~np.isnan(values)
+        if not known.any():
+            continue
+        new_values = np.interp(t_target, t_source[known], values[known])
+        for t, value in zip(t_target, new_values):
+            if not ref[t].fixed:
+                ref[t].set_value(float(value), skip_validation=True)
+
+
+def solve_adaptive(
+    build_model,
+    time_points,
+    rtol=1e-3,
+    atol=1e-6,
+    max_refinements=5,
+    min_step=0.0,
+    max_points=None,
+    variables=None,
+    solver=None,
+    optarg=None,
+    tee=False,
+):
+    """
+    Solve a dynamic model, refining the time grid until the estimated error is below tolerance.
+
+    Args:
+        build_model: function of a list of time points that returns a discretised model (see module docstring)
+        time_points: the starting (coarse) time points
+        rtol, atol: error tolerances, see estimate_error
+        max_refinements: maximum number of times to refine the grid
+        min_step: elements aren't split smaller than this
+        max_points: maximum number of time points
+        variables: names of the time indexed components to measure the error on (default: the differential states)
+        solver: solver to use (default IPOPT)
+        optarg: options for the default solver
+        tee: show the solver output
+
+    Returns:
+        (m, history): the final solved model, and a list of (time points, max error) for each solve
+    """
+    if solver is None:
+        solver = get_solver(options=optarg)
+
+    time_points = sorted(time_points)
+    previous = None
+    history = []
+    for refinement in range(max_refinements + 1):
+        m = build_model(time_points)
+        if len(m.fs.time) != len(time_points):
+            raise ConfigurationError(
+                f"Model has {len(m.fs.time)} time points but {len(time_points)} were given, "
+                "discretise with nfe=len(time_points) - 1"
+            )
+        if previous is not None:
+            transfer_solution(previous, m)
+
+        result = solver.solve(m, tee=tee)
+        if result.solver.termination_condition != TerminationCondition.optimal:
+            _log.warning(f"Solve on {len(time_points)} time points did not converge")
+            if previous is not None:
+                return previous, history
+            return m, history
+
+        errors = estimate_error(m, rtol=rtol, atol=atol, variables=variables)
+        history.append((list(time_points), float(np.max(errors))))
+        _log.info(f"{len(time_points)} time points, max scaled error {np.max(errors):.3g}")
+
+        new_points = refine_time_points(time_points, errors, min_step=min_step, max_points=max_points)
+        if len(new_points) == len(time_points):
+            break
+        previous = m
+        time_points = new_points
+
+    return m, history
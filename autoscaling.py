@@ -0,0 +1,109 @@
+"""
+Automatic scaling factors from the values in an initialised model.
+
+Variables are scaled by the order of magnitude of their current value, and constraints
+by the norm of their row of the (variable scaled) Jacobian, so IPOPT sees values and
+gradients around 1. This helps a lot with the IAPWS95/Helmholtz variables, which are
+all over the place (pressures around 1e5, enthalpies around 1e3-1e4, flows around 1-1e3).
+
+The scaling factors are cached by the structure of the model (the names of the variables
+and constraints), so building the same flowsheet again re-uses them without recomputing
+the Jacobian.
+
+The factors are set in the scaling_factor suffixes, so use IPOPT with
+nlp_scaling_method=user-scaling (see USER_SCALING_OPTIONS) to use them.
+"""
+import math
+
+import numpy as np
+from pyomo.environ import Var, Constraint
+import idaes.core.util.scaling as iscale
+import idaes.logger as idaeslog
+
+_log = idaeslog.getLogger(__name__)
+
+USER_SCALING_OPTIONS = {"nlp_scaling_method": "user-scaling"}
+
+_cache = {}
+
+
+def structural_key(m):
+    """
+    Hashable key for the structure of a model: the names of all its active constraints and variables.
+    """
+    return hash((
+        tuple(c.getname(fully_qualified=True, relative_to=m) for c in m.component_data_objects(Constraint, active=True, descend_into=True)),
+        tuple(v.getname(fully_qualified=True, relative_to=m) for v in m.component_data_objects(Var, descend_into=True)),
+    ))
+
+
+def _order_of_magnitude(x):
+    return 10.0 ** math.floor(math.log10(x))
+
+
+def _variable_scaling(m, zero_tol, min_scale, max_scale):
+    factors = {}
+    for v in m.component_data_objects(Var, descend_into=True):
+        if v.value is None or abs(v.value) < zero_tol:
+            continue
+        sf = 1 / _order_of_magnitude(abs(v.value))
+        factors[v] = min(max(sf, min_scale), max_scale)
+    return factors
+
+
+def _constraint_scaling(m, zero_tol, min_scale, max_scale):
+    # Jacobian with the variable scaling already applied, so each row norm is what IPOPT would see.
+    jac, nlp = iscale.get_jacobian(m, scaled=True)
+    jac = jac.tocsr()
+    factors = {}
+    for i, c in enumerate(nlp.get_pyomo_constraints()):
+        row = jac.data[jac.indptr[i]:jac.indptr[i + 1]]
+        norm = np.linalg.norm(row)
+        if norm < zero_tol:
+            continue
+        # the Jacobian was scaled by any existing constraint scaling, undo that
+        current = iscale.get_scaling_factor(c, default=1)
+        sf = current / _order_of_magnitude(norm)
+        factors[c] = min(max(sf, min_scale), max_scale)
+    return factors
+
+
+def autoscale(m, zero_tol=1e-10, min_scale=1e-8, max_scale=1e8, use_cache=True, overwrite=False):
+    """
+    Set variable and constraint scaling factors from the current values in the model.
+    The model should be initialised first.
+
+    Args:
+        m: model to scale
+        zero_tol: values (and Jacobian row norms) smaller than this are left unscaled
+        min_scale, max_scale: bounds on the scaling factors
+        use_cache: re-use the scaling factors of an earlier model with the same structure
+        overwrite: replace scaling factors that are already set (e.g from calculate_scaling_factors)
+
+    Returns:
+        Dict of component name -> scaling factor that was set
+    """
+    key = structural_key(m)
+    if use_cache and key in _cache:
+        _log.info("Using cached scaling factors")
+        factors = _cache[key]
+        for name, sf in factors.items():
+            c = m.find_component(name)
+            if overwrite or iscale.get_scaling_factor(c) is None:
+                iscale.set_scaling_factor(c, sf)
+        return factors
+
+    factors = {}
+    for v, sf in _variable_scaling(m, zero_tol, min_scale, max_scale).items():
+        if overwrite or iscale.get_scaling_factor(v) is None:
+            iscale.set_scaling_factor(v, sf)
+            factors[v.getname(fully_qualified=True, relative_to=m)] = sf
+
+    # Constraint scaling depends on the variable scaling, so it has to be done second
+    for c, sf in _constraint_scaling(m, zero_tol, min_scale, max_scale).items():
+        if overwrite or iscale.get_scaling_factor(c) is None:
+            iscale.set_scaling_factor(c, sf)
+            factors[c.getname(fully_qualified=True, relative_to=m)] = sf
+
+    _cache[key] = factors
+    return factors
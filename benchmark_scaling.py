@@ -0,0 +1,115 @@
+"""
+Compares IPOPT iteration counts with and without autoscaling on the
+tank, heater and DSI examples.
+
+Run from the repo root:
+    python benchmark_scaling.py
+"""
+import os
+import re
+import sys
+
+import pyomo.environ as pyo
+from pyomo.common.tee import capture_output
+from idaes.core import FlowsheetBlock
+from idaes.core.solvers import get_solver
+from idaes.models.unit_models import Heater
+from idaes.models.properties import iapws95
+from idaes.models.properties.general_helmholtz import (
+    HelmholtzParameterBlock,
+    AmountBasis,
+    PhaseType,
+    StateVars,
+)
+from idaes.models.properties.modular_properties import GenericParameterBlock
+from idaes.models_extra.power_generation.unit_models.watertank import WaterTank
+import idaes.core.util.scaling as iscale
+
+from autoscaling import autoscale, USER_SCALING_OPTIONS
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "direct_steam_injection"))
+from direct_steam_injection import Dsi
+from milk_config import milk_configuration
+
+
+def build_tank():
+    m = pyo.ConcreteModel()
+    m.fs = FlowsheetBlock(dynamic=True, time_set=[0, 1], time_units=pyo.units.s)
+    m.fs.prop_water = iapws95.Iapws95ParameterBlock()
+    m.fs.tank = WaterTank(
+        tank_type="rectangular_tank", has_holdup=True, property_package=m.fs.prop_water,
+        has_heat_transfer=True, dynamic=True
+    )
+    pyo.TransformationFactory("dae.finite_difference").apply_to(m, nfe=3, wrt=m.fs.time, scheme="BACKWARD")
+    m.fs.tank.inlet.flow_mol.fix(200)
+    m.fs.tank.inlet.pressure.fix(100000)
+    m.fs.tank.inlet.enth_mol.fix(3700.36)
+    m.fs.tank.tank_width.fix(0.4)
+    m.fs.tank.tank_length.fix(0.4)
+    m.fs.tank.heat_duty.fix(0)
+    m.fs.tank.tank_level.fix(0.5)
+    m.fs.tank.control_volume.material_accumulation[0, :, :].fix(0)
+    m.fs.tank.control_volume.energy_accumulation[0, :].fix(0)
+    iscale.calculate_scaling_factors(m)
+    m.fs.tank.initialize()
+    return m
+
+
+def build_heater():
+    m = pyo.ConcreteModel()
+    m.fs = FlowsheetBlock(dynamic=False)
+    m.fs.properties = HelmholtzParameterBlock(
+        pure_component="h2o",
+        phase_presentation=PhaseType.MIX,
+        state_vars=StateVars.TPX,
+    )
+    m.fs.heater = Heater(property_package=m.fs.properties)
+    m.fs.heater.inlet.flow_mol[0].fix(100)
+    m.fs.heater.inlet.temperature[0].fix(380)
+    m.fs.heater.inlet.vapor_frac[0].fix(1)
+    m.fs.heater.inlet.pressure[0].fix(101325)
+    m.fs.heater.heat_duty[0].fix(100_000)
+    m.fs.heater.initialize()
+    return m
+
+
+def build_dsi():
+    m = pyo.ConcreteModel()
+    m.fs = FlowsheetBlock(dynamic=False)
+    m.fs.steam_properties = HelmholtzParameterBlock(
+        pure_component="h2o", amount_basis=AmountBasis.MOLE,
+        phase_presentation=PhaseType.LG,
+    )
+    m.fs.milk_properties = GenericParameterBlock(**milk_configuration)
+    m.fs.dsi = Dsi(property_package=m.fs.milk_properties, steam_property_package=m.fs.steam_properties)
+    m.fs.dsi.inlet.flow_mol.fix(1)
+    m.fs.dsi.properties_milk_in[0].temperature.fix(300 * pyo.units.K)
+    m.fs.dsi.inlet.pressure.fix(101325)
+    m.fs.dsi.inlet.mole_frac_comp[0, "h2o"].fix(0.99)
+    m.fs.dsi.inlet.mole_frac_comp[0, "milk_solid"].fix(0.01)
+    m.fs.dsi.steam_inlet.flow_mol.fix(1)
+    m.fs.dsi.properties_steam_in[0].enth_mol.fix(
+        m.fs.steam_properties.htpx(p=101325 * pyo.units.Pa, T=400 * pyo.units.K)
+    )
+    m.fs.dsi.steam_inlet.pressure.fix(101325)
+    m.fs.dsi.initialize()
+    return m
+
+
+def ipopt_iterations(m, options=None):
+    solver = get_solver(options=options)
+    with capture_output() as output:
+        result = solver.solve(m, tee=True)
+    match = re.search(r"Number of Iterations\.+:\s*(\d+)", output.getvalue())
+    iterations = int(match.group(1)) if match else None
+    return iterations, str(result.solver.termination_condition)
+
+
+if __name__ == "__main__":
+    print(f"{'model':<8}{'unscaled':>12}{'autoscaled':>12}")
+    for name, build in [("tank", build_tank), ("heater", build_heater), ("dsi", build_dsi)]:
+        unscaled, status_unscaled = ipopt_iterations(build())
+        m = build()
+        autoscale(m)
+        scaled, status_scaled = ipopt_iterations(m, USER_SCALING_OPTIONS)
+        print(f"{name:<8}{unscaled!s:>12}{scaled!s:>12}   ({status_unscaled}, {status_scaled})")
@@ -0,0 +1,158 @@
+"""
+Solve square models block by block, using the block triangular form of the incidence matrix.
+
+Square simulations (0 degrees of freedom, e.g tank_minimal_example.py, live_data_tests/dynamics.py
+or the DSI unit) don't need a full NLP solve. The Dulmage-Mendelsohn decomposition splits the
+model into strongly connected blocks that can be solved in order, each one with the variables of
+the earlier blocks fixed. Most blocks are one variable and one constraint, which are solved
+directly, small blocks are solved with Newton's method, and only the big blocks go to IPOPT.
+
+Usage:
+
+    from block_triangular import solve_block_triangular
+    solve_block_triangular(m)
+"""
+import time as timer
+
+import numpy as np
+from pyomo.environ import value
+from pyomo.opt import TerminationCondition
+from pyomo.contrib.incidence_analysis import IncidenceGraphInterface
+from pyomo.core.expr.calculus.derivatives import differentiate
+from pyomo.util.calc_var_value import calculate_variable_from_constraint
+from pyomo.util.subsystems import create_subsystem_block, TemporarySubsystemManager
+from idaes.core.solvers import get_solver
+from idaes.core.util.model_statistics import degrees_of_freedom
+from idaes.core.util.exceptions import InitializationError
+import idaes.logger as idaeslog
+
+_log = idaeslog.getLogger(__name__)
+
+
+class BlockSolveError(InitializationError):
+    """
+    Raised when a block of the decomposition can't be solved. The index of the
+    block (in solve order), and its variables and constraints are kept so the
+    failing part of the model can be found.
+    """
+
+    def __init__(self, index, variables, constraints, method):
+        self.index = index
+        self.variables = variables
+        self.constraints = constraints
+        self.method = method
+        super().__init__(
+            f"Block {index} ({len(variables)} variables, solved with {method}) failed to converge.\n"
+            f"Variables: {[v.name for v in variables]}\n"
+            f"Constraints: {[c.name for c in constraints]}"
+        )
+
+
+def _residuals(constraints):
+    return np.array([value(c.body) - value(c.upper) for c in constraints])
+
+
+def _newton(variables, constraints, tol, max_iter):
+    """
+    Damped Newton's method on a small square block. Returns the number of iterations,
+    or None if it didn't converge.
+    """
+    lb = np.array([v.lb if v.lb is not None else -np.inf for v in variables])
+    ub = np.array([v.ub if v.ub is not None else np.inf for v in variables])
+    x = np.array([v.value if v.value is not None else 0.0 for v in variables], dtype=float)
+    x = np.clip(x, lb, ub)
+    for v, xi in zip(variables, x):
+        v.set_value(xi, skip_validation=True)
+
+    r = _residuals(constraints)
+    for iteration in range(max_iter):
+        norm = np.max(np.abs(r))
+        if norm < tol:
+            return iteration
+        jac = np.array([
+            differentiate(c.body, wrt_list=variables, mode=differentiate.Modes.reverse_numeric)
+            for c in constraints
+        ])
+        try:
+            dx = np.linalg.solve(jac, -r)
+        except np.linalg.LinAlgError:
+            return None
+
+        # Backtrack until the residual goes down
+        step = 1.0
+        while step > 1e-4:
+            x_new = np.clip(x + step * dx, lb, ub)
+            for v, xi in zip(variables, x_new):
+                v.set_value(xi, skip_validation=True)
+            r_new = _residuals(constraints)
+            if np.all(np.isfinite(r_new)) and np.max(np.abs(r_new)) < (1 - 1e-4 * step) * norm:
+                break
+            step /= 2
+        else:
+            return None
+        x, r = x_new, r_new
+
+    if np.max(np.abs(r)) < tol:
+        return max_iter
+    return None
+
+
+def solve_block_triangular(m, solver=None, newton_max_size=10, tol=1e-8, max_iter=50, optarg=None):
+    """
+    Solve a square model by solving the blocks of its block triangular decomposition in order.
+
+    Args:
+        m: the model (or any block) to solve, must have 0 degrees of freedom
+        solver: solver for the blocks that are too big for Newton's method (default IPOPT)
+        newton_max_size: the biggest block that is solved with Newton's method
+        tol: residual tolerance for the 1x1 and Newton blocks
+        max_iter: iteration limit for the 1x1 and Newton blocks
+        optarg: options for the default solver
+
+    Returns:
+        A list of dicts, one per block, with the block size, the method used, and the solve time.
+
+    Raises:
+        BlockSolveError if a block can't be solved, with the variables and constraints of the block.
+    """
+    dof = degrees_of_freedom(m)
+    if dof != 0:
+        raise InitializationError(f"{m.name} has {dof} degrees of freedom, block triangular solve needs a square model")
+    if solver is None:
+        solver = get_solver(options=optarg)
+
+    igraph = IncidenceGraphInterface(m, active=True, include_fixed=False, include_inequality=False)
+    var_blocks, con_blocks = igraph.block_triangularize()
+    _log.info(f"{len(var_blocks)} blocks, largest is {max(len(b) for b in var_blocks)} variables")
+
+    stats = []
+    for index, (variables, constraints) in enumerate(zip(var_blocks, con_blocks)):
+        n = len(variables)
+        tic = timer.perf_counter()
+        if n == 1:
+            method = "direct"
+            try:
+                calculate_variable_from_constraint(variables[0], constraints[0], eps=tol, iterlim=max_iter)
+                converged = True
+            except (RuntimeError, ValueError, ZeroDivisionError):
+                converged = False
+        elif n <= newton_max_size:
+            method = "newton"
+            converged = _newton(variables, constraints, tol, max_iter) is not None
+        else:
+            converged = False
+
+        if not converged:
+            # Anything that isn't converged (or is too big for Newton) goes to the NLP solver,
+            # with all the other variables in the block's constraints fixed.
+            method = "solver" if n > newton_max_size else method + "+solver"
+            subsystem = create_subsystem_block(constraints, variables)
+            with TemporarySubsystemManager(to_fix=list(subsystem.input_vars.values())):
+                result = solver.solve(subsystem)
+            converged = result.solver.termination_condition == TerminationCondition.optimal
+            if not converged:
+                raise BlockSolveError(index, variables, constraints, method)
+
+        stats.append({"block": index, "size": n, "method": method, "time": timer.perf_counter() - tic})
+
+    return stats
@@ -16,6 +16,12 @@ from idaes.models.properties.general_helmholtz import (
     )
 from idaes.models.properties.modular_properties import GenericParameterBlock
 from milk_config import milk_configuration
+import os
+import sys
+
+# property_cache.py is in the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from property_cache import htpx
 
 
 m = pyo.ConcreteModel()
@@ -35,7 +41,7 @@ m.fs.dsi.inlet.mole_frac_comp[0,"milk_solid"].fix(0.01)
 
 m.fs.dsi.steam_inlet.flow_mol.fix(1)
 m.fs.dsi.properties_steam_in[0].enth_mol.fix(
-    m.fs.steam_properties.htpx(p=101325 * pyo.units.Pa, T= 300 * pyo.units.K)
+    htpx(m.fs.steam_properties, p=101325 * pyo.units.Pa, T= 300 * pyo.units.K)
 )
 m.fs.dsi.steam_inlet.pressure.fix(101325)
 
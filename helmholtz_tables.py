@@ -0,0 +1,356 @@
+"""
+Tabulated Helmholtz properties, for fast real time solves.
+
+The Helmholtz/IAPWS95 property packages call the external EoS functions on every residual
+evaluation. In a plant's operating window the properties are smooth within each phase (away
+from the critical point), so they can be replaced with bicubic splines built once:
+
+    tables = build_tables(m.fs.properties, "water_tables", p_range=(1e4, 1e6), h_range=(1000, 60000))
+    tables = PropertyTables.load("water_tables")
+    tables.evaluate("temperature", p=101325, h=5000)
+
+Temperature, vapour fraction and entropy all have kinks at the saturated liquid and vapour
+enthalpies, which a spline across them would overshoot (vapour fractions outside [0, 1], and
+temperatures that oscillate near the dome). So there is a table for each phase region, liquid,
+two phase and vapour, over (log P, the fraction of the way across the region in H). At each
+pressure the H grid of a region runs from its lower to its upper enthalpy, so the phase
+boundaries are always grid lines and each spline only sees smooth values. The saturation
+enthalpies are splines of log P. This means the tables can't reach the critical pressure, and
+the H range has to contain the whole dome over the P range.
+
+build_tables evaluates the properties on the grids with the Helmholtz external functions,
+checks the interpolation error against the EoS at random points off the grid (half of them
+near the dome), and saves each table as a .npy file, which load() memory maps, so loading
+is quick and nothing is read until a property is used. Each process (e.g each
+scenario_runner.py worker) still fits its own splines the first time it uses a property, which
+hold their own copy of the coefficients (about the size of the tables). The splines give the
+values and analytic derivatives (d/dP and d/dH), which add_table_properties uses to put the
+properties into a Pyomo model as an ExternalGreyBoxModel of (pressure, enthalpy) -> (T, x, s).
+
+Grey box models need the cyipopt solver.
+"""
+import json
+import os
+
+import numpy as np
+from scipy.interpolate import CubicSpline, RectBivariateSpline
+from scipy.sparse import coo_matrix
+from pyomo.environ import Block, Param, value
+from pyomo.contrib.pynumero.interfaces.external_grey_box import ExternalGreyBoxModel, ExternalGreyBoxBlock
+from idaes.core.util.exceptions import ConfigurationError
+from idaes.models.properties.general_helmholtz import HelmholtzThermoExpressions
+import idaes.logger as idaeslog
+
+_log = idaeslog.getLogger(__name__)
+
+PROPERTIES = ["temperature", "vapor_frac", "entropy"]
+REGIONS = ["liq", "two_phase", "vap"]
+
+
+def _expressions(params, p_range, h_range):
+    # The properties and saturation enthalpies as expressions of two mutable Params
+    b = Block(concrete=True)
+    b.p = Param(initialize=p_range[0], mutable=True)
+    b.h = Param(initialize=h_range[0], mutable=True)
+    te = HelmholtzThermoExpressions(b, params)
+    expressions = {
+        "temperature": te.T(h=b.h, p=b.p),
+        "vapor_frac": te.x(h=b.h, p=b.p),
+        "entropy": te.s(h=b.h, p=b.p),
+    }
+    return b, expressions, te.h(p=b.p, x=0), te.h(p=b.p, x=1)
+
+
+def build_tables(params, path, p_range, h_range, n_p=200, n_h=400, properties=PROPERTIES):
+    """
+    Evaluate the properties of a Helmholtz parameter block on a grid in each phase region and
+    save them to path.
+
+    Args:
+        params: HelmholtzParameterBlock (the amount basis of H is the parameter block's)
+        path: directory to save the tables in
+        p_range: (min, max) pressure in Pa, below the critical pressure. The grid is evenly
+            spaced in log(P)
+        h_range: (min, max) enthalpy in J/mol (or J/kg), containing the saturated liquid and
+            vapour enthalpies over p_range
+        n_p: number of grid points in P
+        n_h: number of grid points in H, split between the phase regions
+        properties: which of temperature, vapor_frac and entropy to tabulate
+
+    Returns:
+        PropertyTables loaded from path
+    """
+    if p_range[1] >= value(params.pressure_crit):
+        raise ConfigurationError(
+            f"The tables have to stay below the critical pressure ({value(params.pressure_crit)} Pa)"
+        )
+    b, expressions, h_liq_expr, h_vap_expr = _expressions(params, p_range, h_range)
+    unknown = set(properties) - set(expressions)
+    if unknown:
+        raise ConfigurationError(f"Can't tabulate {unknown}, use some of {list(expressions)}")
+
+    log_p = np.linspace(np.log(p_range[0]), np.log(p_range[1]), n_p)
+    h_liq = np.empty(n_p)
+    h_vap = np.empty(n_p)
+    for i, lp in enumerate(log_p):
+        b.p.set_value(float(np.exp(lp)))
+        h_liq[i] = value(h_liq_expr)
+        h_vap[i] = value(h_vap_expr)
+    if h_liq.min() <= h_range[0] or h_vap.max() >= h_range[1]:
+        raise ConfigurationError(
+            f"h_range {h_range} has to contain the saturated enthalpies over p_range, "
+            f"{h_liq.min():.6g} to {h_vap.max():.6g}"
+        )
+
+    # The two phase region is linear in H at constant P, so it needs fewer points
+    n_region = {"liq": (2 * n_h) // 5, "two_phase": n_h // 5, "vap": (2 * n_h) // 5}
+    region_bounds = {
+        "liq": (np.full(n_p, float(h_range[0])), h_liq),
+        "two_phase": (h_liq, h_vap),
+        "vap": (h_vap, np.full(n_p, float(h_range[1]))),
+    }
+    os.makedirs(path, exist_ok=True)
+    for region in REGIONS:
+        fraction = np.linspace(0, 1, n_region[region])
+        lo, hi = region_bounds[region]
+        tables = {name: np.empty((n_p, len(fraction))) for name in properties}
+        for i, lp in enumerate(log_p):
+            b.p.set_value(float(np.exp(lp)))
+            for j, hj in enumerate(lo[i] + fraction * (hi[i] - lo[i])):
+                b.h.set_value(float(hj))
+                for name in properties:
+                    tables[name][i, j] = value(expressions[name])
+        np.save(os.path.join(path, f"fraction_{region}.npy"), fraction)
+        for name in properties:
+            np.save(os.path.join(path, f"{name}_{region}.npy"), tables[name])
+        _log.info(f"Tabulated the {region} region on a {n_p}x{len(fraction)} grid")
+
+    np.save(os.path.join(path, "log_p.npy"), log_p)
+    np.save(os.path.join(path, "h_sat_liq.npy"), h_liq)
+    np.save(os.path.join(path, "h_sat_vap.npy"), h_vap)
+    with open(os.path.join(path, "tables.json"), "w") as f:
+        json.dump({
+            "component": params.pure_component,
+            "properties": list(properties),
+            "h_range": [float(h_range[0]), float(h_range[1])],
+        }, f)
+    tables = PropertyTables.load(path)
+    for name, error in interpolation_error(tables, params).items():
+        _log.info(f"Largest {name} interpolation error off the grid: {error:.3g}")
+    return tables
+
+
+def interpolation_error(tables, params, n=1000, seed=0):
+    """
+    Largest absolute difference between the tables and the EoS for each property, at n random
+    points in the tables' range. Half of the points are within 1% of the width of the dome
+    of a saturated enthalpy, where the properties have kinks.
+    """
+    rng = np.random.default_rng(seed)
+    log_p = rng.uniform(tables.log_p[0], tables.log_p[-1], n)
+    h_liq, h_vap = tables.h_sat_liq(log_p), tables.h_sat_vap(log_p)
+    near = np.where(rng.random(n) < 0.5, h_liq, h_vap) + rng.uniform(-0.01, 0.01, n) * (h_vap - h_liq)
+    h = np.where(np.arange(n) < n // 2, rng.uniform(*tables.h_range, n), near)
+    h = np.clip(h, *tables.h_range)
+    p = np.exp(log_p)
+
+    b, expressions, _, _ = _expressions(params, (p[0], p[-1]), tables.h_range)
+    errors = {}
+    for name in tables.properties:
+        eos = np.empty(n)
+        for k in range(n):
+            b.p.set_value(float(p[k]))
+            b.h.set_value(float(h[k]))
+            eos[k] = value(expressions[name])
+        errors[name] = float(np.max(np.abs(tables.evaluate(name, p, h) - eos)))
+    return errors
+
+
+class PropertyTables:
+    """
+    Bicubic splines of tabulated properties in each phase region. See the module docstring.
+    """
+
+    def __init__(self, log_p, h_sat_liq, h_sat_vap, h_range, fractions, tables, component=None):
+        self.log_p = log_p
+        self.h_range = tuple(h_range)
+        self.fractions = fractions
+        self.tables = tables
+        self.component = component
+        self.h_sat_liq = CubicSpline(log_p, h_sat_liq)
+        self.h_sat_vap = CubicSpline(log_p, h_sat_vap)
+        self._splines = {}
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, "tables.json")) as f:
+            info = json.load(f)
+        log_p = np.load(os.path.join(path, "log_p.npy"))
+        fractions = {region: np.load(os.path.join(path, f"fraction_{region}.npy")) for region in REGIONS}
+        tables = {
+            name: {
+                region: np.load(os.path.join(path, f"{name}_{region}.npy"), mmap_mode="r")
+                for region in REGIONS
+            }
+            for name in info["properties"]
+        }
+        return cls(
+            log_p,
+            np.load(os.path.join(path, "h_sat_liq.npy")),
+            np.load(os.path.join(path, "h_sat_vap.npy")),
+            info["h_range"],
+            fractions,
+            tables,
+            info.get("component"),
+        )
+
+    @property
+    def properties(self):
+        return list(self.tables)
+
+    def spline(self, name, region):
+        # The splines are fitted the first time each property is used. This reads the memory
+        # mapped table into the spline's own coefficient array, so it isn't shared between processes.
+        if (name, region) not in self._splines:
+            if name not in self.tables:
+                raise ConfigurationError(f"No table for {name}, the tables have {self.properties}")
+            self._splines[name, region] = RectBivariateSpline(
+                self.log_p, self.fractions[region], np.asarray(self.tables[name][region]), kx=3, ky=3
+            )
+        return self._splines[name, region]
+
+    def in_range(self, p, h):
+        """
+        True where (p, h) is inside the table.
+        """
+        log_p = np.log(p)
+        return (
+            (self.log_p[0] <= log_p) & (log_p <= self.log_p[-1])
+            & (self.h_range[0] <= h) & (h <= self.h_range[1])
+        )
+
+    def _regions(self, p, h):
+        # For each region: the points in it, and their (log P, fraction across the region) and
+        # the derivatives of the fraction by log P and H
+        log_p, h = np.broadcast_arrays(np.log(np.asarray(p, dtype=float)), np.asarray(h, dtype=float))
+        h_liq, h_vap = self.h_sat_liq(log_p), self.h_sat_vap(log_p)
+        dh_liq, dh_vap = self.h_sat_liq(log_p, 1), self.h_sat_vap(log_p, 1)
+        h_min, h_max, zero = np.full_like(h, self.h_range[0]), np.full_like(h, self.h_range[1]), np.zeros_like(h)
+        lower = {"liq": (h_min, zero), "two_phase": (h_liq, dh_liq), "vap": (h_vap, dh_vap)}
+        upper = {"liq": (h_liq, dh_liq), "two_phase": (h_vap, dh_vap), "vap": (h_max, zero)}
+        in_region = {"liq": h < h_liq, "two_phase": (h_liq <= h) & (h <= h_vap), "vap": h > h_vap}
+        for region in REGIONS:
+            mask = in_region[region]
+            (lo, dlo), (hi, dhi) = lower[region], upper[region]
+            lo, dlo, hi, dhi = lo[mask], dlo[mask], hi[mask], dhi[mask]
+            fraction = (h[mask] - lo) / (hi - lo)
+            d_fraction_dh = 1 / (hi - lo)
+            d_fraction_dlog_p = -(dlo * (1 - fraction) + dhi * fraction) / (hi - lo)
+            yield region, mask, log_p[mask], fraction, d_fraction_dlog_p, d_fraction_dh
+
+    def evaluate(self, name, p, h):
+        """
+        Property value at pressure p (Pa) and enthalpy h. Works on arrays too.
+        """
+        result = np.empty(np.broadcast(p, h).shape)
+        for region, mask, log_p, fraction, _, _ in self._regions(p, h):
+            result[mask] = self.spline(name, region).ev(log_p, fraction)
+        return result
+
+    def derivatives(self, name, p, h):
+        """
+        (d/dP, d/dH) of a property at pressure p (Pa) and enthalpy h.
+        """
+        d_p = np.empty(np.broadcast(p, h).shape)
+        d_h = np.empty_like(d_p)
+        p = np.broadcast_to(np.asarray(p, dtype=float), d_p.shape)
+        for region, mask, log_p, fraction, d_fraction_dlog_p, d_fraction_dh in self._regions(p, h):
+            s = self.spline(name, region)
+            d_log_p = s.ev(log_p, fraction, dx=1)
+            d_fraction = s.ev(log_p, fraction, dy=1)
+            d_p[mask] = (d_log_p + d_fraction * d_fraction_dlog_p) / p[mask]
+            d_h[mask] = d_fraction * d_fraction_dh
+        return d_p, d_h
+
+
+class TabulatedPropertiesModel(ExternalGreyBoxModel):
+    """
+    Grey box model with inputs (pressure, enth) and an output per tabulated property.
+    """
+
+    def __init__(self, tables, properties=None):
+        self._tables = tables
+        self._properties = list(properties or tables.properties)
+        self._inputs = np.array([1e5, 0.0])
+
+    def input_names(self):
+        return ["pressure", "enth"]
+
+    def output_names(self):
+        return list(self._properties)
+
+    def set_input_values(self, input_values):
+        self._inputs = np.asarray(input_values, dtype=float)
+
+    def finalize_block_construction(self, pyomo_block):
+        p_min, p_max = float(np.exp(self._tables.log_p[0])), float(np.exp(self._tables.log_p[-1]))
+        pyomo_block.inputs["pressure"].setlb(p_min)
+        pyomo_block.inputs["pressure"].setub(p_max)
+        pyomo_block.inputs["enth"].setlb(float(self._tables.h_range[0]))
+        pyomo_block.inputs["enth"].setub(float(self._tables.h_range[1]))
+
+    def evaluate_outputs(self):
+        p, h = self._inputs
+        return np.array([float(self._tables.evaluate(name, p, h)) for name in self._properties])
+
+    def evaluate_jacobian_outputs(self):
+        p, h = self._inputs
+        rows, cols, data = [], [], []
+        for i, name in enumerate(self._properties):
+            dp, dh = self._tables.derivatives(name, p, h)
+            rows += [i, i]
+            cols += [0, 1]
+            data += [float(dp), float(dh)]
+        return coo_matrix((data, (rows, cols)), shape=(len(self._properties), 2))
+
+
+def add_table_properties(blk, pressure, enth, tables, properties=None):
+    """
+    Add tabulated properties of a (pressure, enthalpy) pair of variables to a block,
+    as blk.table_properties (an ExternalGreyBoxBlock). The outputs are
+    blk.table_properties.outputs["temperature"] etc. The pressure and enthalpy get bounded
+    to the range of the tables.
+    """
+    blk.table_properties = ExternalGreyBoxBlock()
+    blk.table_properties.set_external_model(TabulatedPropertiesModel(tables, properties), inputs=[pressure, enth])
+    return blk.table_properties
+
+
+if __name__ == "__main__":
+    import time as timer
+    from pyomo.environ import ConcreteModel
+    from idaes.models.properties.general_helmholtz import HelmholtzParameterBlock, PhaseType, StateVars, AmountBasis
+
+    # Operating window of the tank and heater examples: 0.1-5 bar, liquid to superheated steam
+    m = ConcreteModel()
+    m.properties = HelmholtzParameterBlock(
+        pure_component="h2o", phase_presentation=PhaseType.MIX, amount_basis=AmountBasis.MOLE, state_vars=StateVars.PH,
+    )
+    tic = timer.perf_counter()
+    tables = build_tables(m.properties, "h2o_tables", p_range=(1e4, 5e5), h_range=(1000, 60000))
+    print(f"built tables in {timer.perf_counter() - tic:.1f} s")
+
+    rng = np.random.default_rng(0)
+    p = np.exp(rng.uniform(np.log(1e4), np.log(5e5), 1000))
+    h = rng.uniform(1000, 60000, 1000)
+    tic = timer.perf_counter()
+    T = tables.evaluate("temperature", p, h)
+    print(f"1000 table evaluations: {timer.perf_counter() - tic:.4f} s")
+
+    te = HelmholtzThermoExpressions(m, m.properties)
+    tic = timer.perf_counter()
+    T_eos = np.array([value(te.T(h=hi, p=pi)) for pi, hi in zip(p, h)])
+    print(f"1000 EoS evaluations:   {timer.perf_counter() - tic:.4f} s")
+    print(f"max temperature error: {np.max(np.abs(T - T_eos)):.3g} K")
+    for name, error in interpolation_error(tables, m.properties).items():
+        print(f"max {name} error, half the points near the dome: {error:.3g}")
@@ -8,56 +8,73 @@ from idaes.models.properties.general_helmholtz import (
 )
 from idaes.core.util.model_statistics import degrees_of_freedom
 
-m = pyo.ConcreteModel()
-m.fs = FlowsheetBlock(dynamic=True,time_units=pyo.units.s,time_set=[0,1])
-m.fs.properties = HelmholtzParameterBlock(
-    pure_component="h2o",
-    phase_presentation=PhaseType.MIX,
-    state_vars=StateVars.TPX,
-)
-m.fs.heater = Heater(property_package=m.fs.properties,dynamic=True,has_holdup=True,)
+import os
+import sys
 
-@m.fs.heater.Constraint(m.fs.time)
-def heat_duty_eq(b, t):
-    if t < 0.5:
-        return (
-            b.heat_duty[t] == 0
-        )
-    else:
-        return (
-            b.heat_duty[t] == 10_000
-        )
+# adaptive_time.py is in the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from adaptive_time import discretize, solve_adaptive
 
 
-pyo.TransformationFactory("dae.finite_difference").apply_to(
-    m.fs, 
-    nfe=12, # Number of finite elements to use for discretization 
-    wrt=m.fs.time, 
-    scheme="BACKWARD"
-)
+def build_model(time_points):
+    m = pyo.ConcreteModel()
+    m.fs = FlowsheetBlock(dynamic=True,time_units=pyo.units.s,time_set=time_points)
+    m.fs.properties = HelmholtzParameterBlock(
+        pure_component="h2o",
+        phase_presentation=PhaseType.MIX,
+        state_vars=StateVars.TPX,
+    )
+    m.fs.heater = Heater(property_package=m.fs.properties,dynamic=True,has_holdup=True,)
+
+    @m.fs.heater.Constraint(m.fs.time)
+    def heat_duty_eq(b, t):
+        if t < 0.5:
+            return (
+                b.heat_duty[t] == 0
+            )
+        else:
+            return (
+                b.heat_duty[t] == 10_000
+            )
+
+    # One finite element between each of the time points, so the grid can be non-uniform
+    discretize(m.fs, scheme="BACKWARD")
 
-# If we're fixing all the variables, we have to do it after the transformation
+    # If we're fixing all the variables, we have to do it after the transformation
 
-m.fs.heater.inlet.flow_mol.fix(100)
-m.fs.heater.inlet.temperature.fix(600)
-m.fs.heater.inlet.vapor_frac.fix(1)
-m.fs.heater.inlet.pressure.fix(101325)
-#m.fs.heater.heat_duty.fix(10_000)
-m.fs.heater.control_volume.volume.fix(1)
+    m.fs.heater.inlet.flow_mol.fix(100)
+    m.fs.heater.inlet.temperature.fix(600)
+    m.fs.heater.inlet.vapor_frac.fix(1)
+    m.fs.heater.inlet.pressure.fix(101325)
+    #m.fs.heater.heat_duty.fix(10_000)
+    m.fs.heater.control_volume.volume.fix(1)
 
-# Fix the derivative variables to zero at time 0 (steady state assumption)
-m.fs.fix_initial_conditions()
+    # Fix the derivative variables to zero at time 0 (steady state assumption)
+    m.fs.fix_initial_conditions()
 
-# Specify holdup
-m.fs.heater.control_volume.material_holdup[0, 'Mix', 'h2o'].fix(0.001)
-m.fs.heater.control_volume.energy_holdup[0, :].fix(0)
-# or, specify accumulation rate (default: initial accumulation is 0)
-m.fs.heater.control_volume.material_accumulation[:, :].fix(300)
-m.fs.heater.control_volume.energy_accumulation[:, :].fix(300)
+    # Specify holdup
+    m.fs.heater.control_volume.material_holdup[0, 'Mix', 'h2o'].fix(0.001)
+    m.fs.heater.control_volume.energy_holdup[0, :].fix(0)
+    # or, specify accumulation rate (default: initial accumulation is 0)
+    m.fs.heater.control_volume.material_accumulation[:, :].fix(300)
+    m.fs.heater.control_volume.energy_accumulation[:, :].fix(300)
 
+    # Measure the discretisation error on the outlet temperature, as it's what responds to the step
+    m.fs.T_out = pyo.Reference(m.fs.heater.control_volume.properties_out[:].temperature)
+    return m
+
+
+# Start from a coarse grid, the elements around the step at t=0.5 get refined,
+# the flat parts stay coarse.
+m, history = solve_adaptive(
+    build_model,
+    [0, 0.25, 0.5, 0.75, 1],
+    variables=["fs.T_out"],
+    min_step=1e-3,
+    max_points=100,
+    solver=pyo.SolverFactory("ipopt"),
+)
 #print(degrees_of_freedom(m))
-solver = pyo.SolverFactory("ipopt")
-solver.solve(m)
 
 time = list(m.fs.time)
 T_in = [pyo.value(m.fs.heater.inlet.temperature[t]) for t in time]
@@ -0,0 +1,96 @@
+"""
+Memoised enthalpy lookups for building flowsheets.
+
+The scripts call m.fs.properties.htpx(T=..., p=...) (and CoolProp's PropsSI in the tank
+examples) over and over with the same constant arguments, and each htpx call writes a new
+external function expression and evaluates it. These helpers cache the results instead:
+
+    from property_cache import htpx, props_si
+    h = htpx(m.fs.properties, T=300 * pyunits.K, p=101325 * pyunits.Pa)   # float, cached
+    h = props_si("HMOLAR", "T", 343.15, "P", 300000, "Water")              # float, cached
+
+If any argument is a variable (e.g an inlet pressure), htpx returns an expression instead of
+a number, so a constraint like outlet.enth_mol == htpx(params, T=T, p=inlet.pressure) follows
+the pressure when it is solved (params.htpx would evaluate it once at the current pressure).
+The expression is also cached, so writing the same constraint for several units/time points
+reuses it. For a T, p spec the phase is picked from the current values, so the cache keeps
+a separate expression for each phase.
+
+Arguments with units are converted to K and Pa, numbers and variables without units are
+taken to be in K and Pa already.
+"""
+from functools import lru_cache
+
+import pyomo.environ as pyo
+from pyomo.core.expr.numvalue import is_potentially_variable
+from pyomo.util.check_units import check_units_equivalent
+from idaes.models.properties.general_helmholtz import HelmholtzThermoExpressions
+import CoolProp.CoolProp as CoolProp
+
+_SI_UNITS = {"T": pyo.units.K, "p": pyo.units.Pa, "x": pyo.units.dimensionless}
+
+# (id(params), T, p, x, amount basis) -> enthalpy for constant arguments
+_values = {}
+# (id(params), T, p, x, amount basis) -> expression, where T/p are ids for variable arguments
+# and x is the phase picked for a T, p spec
+_expressions = {}
+
+
+def _si(arg, name):
+    # Argument in SI units. Numbers and variables without units are taken to be in SI units already.
+    if check_units_equivalent(arg, pyo.units.dimensionless):
+        return arg * _SI_UNITS[name]
+    return pyo.units.convert(arg, to_units=_SI_UNITS[name])
+
+
+def _constant(arg, name):
+    # Constant argument as a float in SI units
+    return float(pyo.value(_si(arg, name)))
+
+
+def htpx(params, T=None, p=None, x=None, amount_basis=None):
+    """
+    Cached molar (or mass, depending on amount_basis) enthalpy in J/mol (J/kg) from two of T, p, x.
+    Arguments without units are taken to be in K, Pa and mol/mol (or kg/kg).
+
+    Returns a float if all the arguments are constants, otherwise an expression of the variables.
+    """
+    if amount_basis is None:
+        amount_basis = params.config.amount_basis
+    given = {"T": T, "p": p, "x": x}
+    args = {k: None if v is None else _si(v, k) for k, v in given.items()}
+    variable = {k for k, v in args.items() if v is not None and is_potentially_variable(v)}
+
+    if not variable:
+        key = (id(params),) + tuple(None if v is None else _constant(v, k) for k, v in args.items()) + (amount_basis,)
+        h = _values.get(key)
+        if h is None:
+            h = _values[key] = params.htpx(**args, amount_basis=amount_basis)
+        return h
+
+    te = HelmholtzThermoExpressions(params, params, amount_basis=amount_basis)
+    if args["T"] is not None and args["p"] is not None and args["x"] is None:
+        # T, p only works in a single phase, pick it from the current values (like params.htpx does).
+        # The phase is part of the key, so a different phase gets its own expression.
+        args["x"] = 1 if pyo.value(args["p"]) < pyo.value(te.p_sat(args["T"])) else 0
+    key = (id(params),) + tuple(
+        None if v is None else ("var", id(given[k])) if k in variable else _constant(v, k) for k, v in args.items()
+    ) + (amount_basis,)
+    expr = _expressions.get(key)
+    if expr is None:
+        expr = _expressions[key] = te.h(**args)
+    return expr
+
+
+@lru_cache(maxsize=4096)
+def props_si(output, name1, value1, name2, value2, fluid):
+    """
+    Cached CoolProp.PropsSI, for constant arguments.
+    """
+    return CoolProp.PropsSI(output, name1, value1, name2, value2, fluid)
+
+
+def clear_cache():
+    _values.clear()
+    _expressions.clear()
+    props_si.cache_clear()
@@ -0,0 +1,241 @@
+"""
+DC power flow (linearised Kirchhoff's laws) for multi-bus dispatch.
+
+Lines have a reactance x and a thermal limit s_nom. In the DC approximation the flow on a
+line is (theta_0 - theta_1) / x, which can be written without the voltage angles using the
+power transfer distribution factor (PTDF) matrix:
+
+    line_flow = PTDF @ net_injection
+
+The PTDF is computed with scipy.sparse, a block of lines at a time so the full dense matrix
+is never held, and cached per topology, so rebuilding a model on the same network doesn't
+recompute it. With formulation="angles" the model gets a voltage
+angle variable per bus instead, which is sparser for very large meshed networks where the
+PTDF fills in.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+from pyomo.environ import (
+    ConcreteModel,
+    Var,
+    Expression,
+    Constraint,
+    units as pyunits,
+)
+from idaes.core import FlowsheetBlock
+from idaes.core.util.exceptions import ConfigurationError
+
+from idaes_energy_property_package import PowerParameterBlock
+from dispatch import add_generators, add_loads, add_total_cost
+
+# Number of lines whose PTDF rows are solved together, which bounds the dense working memory
+PTDF_BLOCK = 256
+
+# A branch between two buses. x is the series reactance (per unit), s_nom the flow limit in W.
+Line = namedtuple("Line", ["name", "bus0", "bus1", "x", "s_nom"])
+
+
+class Network:
+    """
+    The topology of a power network: a list of bus names and a list of Lines.
+    The first bus is used as the slack (reference angle) bus.
+    """
+
+    def __init__(self, buses, lines):
+        self.buses = list(buses)
+        self.lines = list(lines)
+        self.bus_index = {b: i for i, b in enumerate(self.buses)}
+        for line in self.lines:
+            if line.bus0 not in self.bus_index or line.bus1 not in self.bus_index:
+                raise ConfigurationError(f"Line {line.name} connects to a bus that is not in the network")
+
+    def topology_key(self):
+        """
+        Hashable description of everything the PTDF depends on.
+        """
+        return (
+            tuple(self.buses),
+            tuple((line.bus0, line.bus1, float(line.x)) for line in self.lines),
+        )
+
+    def incidence_matrix(self):
+        """
+        Sparse (lines x buses) matrix, +1 at bus0 and -1 at bus1 of each line.
+        """
+        n_lines = len(self.lines)
+        rows = np.repeat(np.arange(n_lines), 2)
+        cols = np.array([[self.bus_index[l.bus0], self.bus_index[l.bus1]] for l in self.lines]).ravel()
+        data = np.tile([1.0, -1.0], n_lines)
+        return sp.csr_matrix((data, (rows, cols)), shape=(n_lines, len(self.buses)))
+
+    def ptdf(self, tol=1e-10):
+        """
+        The (lines x buses) PTDF matrix, as a scipy.sparse csr matrix.
+        """
+        return _ptdf(self.topology_key(), tol)
+
+
+@lru_cache(maxsize=32)
+def _ptdf(topology_key, tol):
+    buses, branches = topology_key
+    network = Network(buses, [Line(i, b0, b1, x, None) for i, (b0, b1, x) in enumerate(branches)])
+
+    K = network.incidence_matrix()
+    b = sp.diags(1 / np.array([x for _, _, x in branches]))
+    B_bus = (K.T @ b @ K).tocsc()
+
+    # Remove the slack bus, the reduced susceptance matrix is then non-singular (for a connected network)
+    K_red = K[:, 1:]
+    B_red = B_bus[1:, 1:]
+    lu = splu(B_red)
+    rhs = (K_red.T @ b).tocsc()
+
+    # Each column of rhs gives a line's row of the PTDF. They are solved a block of lines at a
+    # time and only the entries above tol are kept, so only one block is ever dense.
+    rows, cols, data = [], [], []
+    for start in range(0, len(branches), PTDF_BLOCK):
+        solved = lu.solve(rhs[:, start:start + PTDF_BLOCK].toarray())
+        bus, line = np.nonzero(np.abs(solved) >= tol)
+        rows.append(line + start)
+        # The slack bus column is all zeros
+        cols.append(bus + 1)
+        data.append(solved[bus, line])
+    rows, cols, data = (np.concatenate(a) if a else np.array([]) for a in (rows, cols, data))
+    return sp.csr_matrix((data, (rows, cols)), shape=(len(branches), len(buses)))
+
+
+def add_dc_power_flow(fs, network, bus_units, formulation="ptdf"):
+    """
+    Add line flows and flow limits to a flowsheet.
+
+    Args:
+        fs: flowsheet with Generator and Load units on it
+        network: Network
+        bus_units: dict of bus name -> list of the Generator and Load units connected to that bus
+        formulation: "ptdf" to write the line flows in terms of the bus injections,
+                     or "angles" to add a voltage angle variable per bus.
+    """
+    time = fs.time
+    line_names = [line.name for line in network.lines]
+
+    def _unit_injection(unit, t):
+        if hasattr(unit, "outlet"):
+            return unit.outlet.power[t]
+        return -unit.inlet.power[t]
+
+    @fs.Expression(time, network.buses, doc="Net power injection at each bus")
+    def net_injection(b, t, bus):
+        return sum(_unit_injection(u, t) for u in bus_units.get(bus, []))
+
+    if formulation == "ptdf":
+        ptdf = network.ptdf()
+        line_row = {name: i for i, name in enumerate(line_names)}
+
+        @fs.Constraint(time, doc="System power balance")
+        def eq_power_balance(b, t):
+            return sum(b.net_injection[t, bus] for bus in network.buses) == 0
+
+        @fs.Expression(time, line_names, doc="Line flow")
+        def line_flow(b, t, name):
+            row = line_row[name]
+            start, end = ptdf.indptr[row], ptdf.indptr[row + 1]
+            return sum(
+                float(coeff) * b.net_injection[t, network.buses[col]]
+                for col, coeff in zip(ptdf.indices[start:end], ptdf.data[start:end])
+            )
+
+    elif formulation == "angles":
+        fs.voltage_angle = Var(time, network.buses, initialize=0, doc="Voltage angle")
+        for t in time:
+            fs.voltage_angle[t, network.buses[0]].fix(0)
+        lines = {line.name: line for line in network.lines}
+        lines_from = {bus: [l.name for l in network.lines if l.bus0 == bus] for bus in network.buses}
+        lines_to = {bus: [l.name for l in network.lines if l.bus1 == bus] for bus in network.buses}
+
+        @fs.Expression(time, line_names, doc="Line flow")
+        def line_flow(b, t, name):
+            line = lines[name]
+            # angles are per unit, scaled to W by the base power implied by the line limits
+            return (b.voltage_angle[t, line.bus0] - b.voltage_angle[t, line.bus1]) / line.x * pyunits.W
+
+        @fs.Constraint(time, network.buses, doc="Nodal power balance")
+        def eq_power_balance(b, t, bus):
+            return b.net_injection[t, bus] == (
+                sum(b.line_flow[t, name] for name in lines_from[bus])
+                - sum(b.line_flow[t, name] for name in lines_to[bus])
+            )
+
+    else:
+        raise ConfigurationError(f"Unknown DC power flow formulation {formulation}, use 'ptdf' or 'angles'")
+
+    limited = [line.name for line in network.lines if line.s_nom is not None]
+    s_nom = {line.name: line.s_nom for line in network.lines}
+
+    @fs.Constraint(time, limited, doc="Line flow upper limit")
+    def eq_line_limit_upper(b, t, name):
+        return b.line_flow[t, name] <= s_nom[name] * pyunits.W
+
+    @fs.Constraint(time, limited, doc="Line flow lower limit")
+    def eq_line_limit_lower(b, t, name):
+        return b.line_flow[t, name] >= -s_nom[name] * pyunits.W
+
+
+def build_network_dispatch_model(n_periods, network, generators, loads, formulation="ptdf"):
+    """
+    Build a dispatch model over a network of buses.
+
+    Same arguments as dispatch.build_dispatch_model, except each generator options dict needs
+    a "bus" entry, and loads is a dict of load name -> (bus, demand time series).
+    """
+    m = ConcreteModel()
+    m.fs = FlowsheetBlock(dynamic=False, time_set=list(range(n_periods)), time_units=pyunits.hour)
+    m.fs.power_props = PowerParameterBlock()
+
+    generator_buses = {}
+    generator_options = {}
+    for name, options in generators.items():
+        options = dict(options)
+        generator_buses[name] = options.pop("bus")
+        generator_options[name] = options
+    gens = add_generators(m.fs, generator_options)
+    load_units = add_loads(m.fs, {name: demand for name, (_, demand) in loads.items()})
+
+    bus_units = {bus: [] for bus in network.buses}
+    for name, bus in generator_buses.items():
+        bus_units[bus].append(gens[name])
+    for name, (bus, _) in loads.items():
+        bus_units[bus].append(load_units[name])
+
+    add_dc_power_flow(m.fs, network, bus_units, formulation=formulation)
+    add_total_cost(m.fs)
+    return m
+
+
+if __name__ == "__main__":
+    from dispatch import solve_dispatch, dispatch_results
+
+    network = Network(
+        ["north", "south", "east"],
+        [
+            Line("north_south", "north", "south", x=0.1, s_nom=400),
+            Line("south_east", "south", "east", x=0.1, s_nom=400),
+            Line("east_north", "east", "north", x=0.2, s_nom=300),
+        ],
+    )
+    hours = np.arange(24)
+    m = build_network_dispatch_model(
+        24,
+        network,
+        generators={
+            "hydro": {"bus": "north", "p_nom": 1000, "marginal_cost": 5},
+            "gas": {"bus": "east", "p_nom": 800, "marginal_cost": 70},
+        },
+        loads={"city": ("south", 700 + 200 * np.sin(2 * np.pi * hours / 24))},
+    )
+    solve_dispatch(m)
+    print(dispatch_results(m))
+    print([m.fs.line_flow[0, line.name]() for line in network.lines])
@@ -0,0 +1,145 @@
+"""
+Multi-period economic dispatch, built from the Bus, Generator and Load unit models.
+
+Everything in the dispatch is linear, so it is solved with an LP solver
+(HiGHS through pyomo's appsi interface by default) rather than IPOPT.
+"""
+import numpy as np
+from pyomo.environ import (
+    ConcreteModel,
+    Objective,
+    TransformationFactory,
+    SolverFactory,
+    minimize,
+    value,
+    units as pyunits,
+)
+from pyomo.network import Arc
+from idaes.core import FlowsheetBlock
+import idaes.logger as idaeslog
+
+from idaes_energy_property_package import PowerParameterBlock
+from idaes_energy_unit_model import Bus, Generator, Load
+
+_log = idaeslog.getLogger(__name__)
+
+
+def build_dispatch_model(n_periods, generators, loads):
+    """
+    Build a single bus dispatch model.
+
+    Args:
+        n_periods: number of time points in the dispatch
+        generators: dict of generator name -> dict of Generator config options
+                    (p_nom, p_min_pu, ramp_limit_up, ramp_limit_down, marginal_cost).
+                    An optional "p_max_pu" entry gives the availability time series.
+        loads: dict of load name -> demand time series (anything with n_periods values)
+
+    Returns:
+        ConcreteModel with the units at m.fs.<name> and the objective at m.fs.total_cost
+    """
+    m = ConcreteModel()
+    m.fs = FlowsheetBlock(dynamic=False, time_set=list(range(n_periods)), time_units=pyunits.hour)
+    m.fs.power_props = PowerParameterBlock()
+    m.fs.bus = Bus(
+        property_package=m.fs.power_props,
+        inlet_list=list(generators),
+        outlet_list=list(loads),
+    )
+    gens = add_generators(m.fs, generators)
+    load_units = add_loads(m.fs, loads)
+
+    for name in generators:
+        m.fs.add_component("arc_" + name, Arc(source=gens[name].outlet, destination=getattr(m.fs.bus, name)))
+    for name in loads:
+        m.fs.add_component("arc_" + name, Arc(source=getattr(m.fs.bus, name), destination=load_units[name].inlet))
+
+    TransformationFactory("network.expand_arcs").apply_to(m)
+
+    add_total_cost(m.fs)
+    return m
+
+
+def add_generators(fs, generators):
+    """
+    Add a Generator to the flowsheet for each entry in generators (name -> config options).
+    """
+    units = {}
+    for name, options in generators.items():
+        options = dict(options)
+        availability = options.pop("p_max_pu", None)
+        gen = Generator(property_package=fs.power_props, **options)
+        fs.add_component(name, gen)
+        if availability is not None:
+            gen.set_availability(availability)
+        units[name] = gen
+    fs.generator_names = list(generators)
+    return units
+
+
+def add_loads(fs, loads):
+    """
+    Add a Load to the flowsheet for each entry in loads (name -> demand time series).
+    """
+    units = {}
+    for name, demand in loads.items():
+        load = Load(property_package=fs.power_props)
+        fs.add_component(name, load)
+        load.set_profile(demand)
+        units[name] = load
+    fs.load_names = list(loads)
+    return units
+
+
+def add_total_cost(fs):
+    """
+    Add the dispatch objective, the total operating cost of all the generators.
+    """
+    fs.total_cost = Objective(
+        expr=sum(getattr(fs, name).operating_cost[t] for name in fs.generator_names for t in fs.time),
+        sense=minimize,
+    )
+
+
+def solve_dispatch(m, solver="appsi_highs", tee=False):
+    """
+    Solve the dispatch as an LP.
+
+    The appsi interfaces keep the LP in memory between solves, so re-solving
+    after changing the load profiles or generator params only sends the changes.
+    """
+    if not hasattr(m, "_dispatch_solver"):
+        m._dispatch_solver = SolverFactory(solver)
+    result = m._dispatch_solver.solve(m, tee=tee)
+    _log.info(f"Dispatch objective: {value(m.fs.total_cost)}")
+    return result
+
+
+def dispatch_results(m):
+    """
+    Get the generator outputs as a dict of name -> numpy array over time.
+    """
+    return {
+        name: np.array([getattr(m.fs, name).outlet.power[t].value for t in m.fs.time])
+        for name in m.fs.generator_names
+    }
+
+
+if __name__ == "__main__":
+    n = 24 * 7
+    hours = np.arange(n)
+    demand = 800 + 300 * np.sin(2 * np.pi * hours / 24)
+    solar = np.clip(np.sin(2 * np.pi * (hours - 6) / 24), 0, None)
+
+    m = build_dispatch_model(
+        n,
+        generators={
+            "coal": {"p_nom": 600, "p_min_pu": 0.3, "ramp_limit_up": 0.1, "ramp_limit_down": 0.1, "marginal_cost": 30},
+            "gas": {"p_nom": 800, "marginal_cost": 70},
+            "solar": {"p_nom": 500, "marginal_cost": 0, "p_max_pu": solar},
+        },
+        loads={"demand": demand},
+    )
+    solve_dispatch(m)
+    for name, p in dispatch_results(m).items():
+        print(name, p[:24])
@@ -10,6 +10,8 @@ from pyomo.environ import (
 )
 from pyomo.environ import units as pyunits
 from pyomo.common.config import ConfigBlock, ConfigValue, Bool
+from pyomo.common.collections import ComponentSet
+from pyomo.core.expr.visitor import identify_variables
 
 # Import IDAES cores
 from idaes.core import (
@@ -34,7 +36,7 @@ from idaes.core.util.model_statistics import (
     degrees_of_freedom,
     number_unfixed_variables,
 )
-from idaes.core.util.exceptions import PropertyPackageError
+from idaes.core.util.exceptions import PropertyPackageError, ConfigurationError
 import idaes.core.util.scaling as iscale
 import idaes.logger as idaeslog
 from idaes.core.solvers import get_solver
@@ -176,10 +178,11 @@ class _PowerStateBlock(StateBlock):
         """
 
         # Fix state variables
-        flags = fix_state_vars(self, state_args)
-        # Check that dof = 0 when state variables are fixed
-        for k in self.keys():
-            dof = degrees_of_freedom(self[k])
+        flags = self._fix_state_vars_bulk(state_args)
+        # Check that dof = 0 when state variables are fixed.
+        # This is done in one pass over all the indices, rather than calling
+        # degrees_of_freedom on each index, which walks the model every time.
+        for k, dof in self._degrees_of_freedom_bulk().items():
             if dof != 0:
                 raise PropertyPackageError(
                     "\nWhile initializing {sb_name}, the degrees of freedom "
@@ -189,7 +192,7 @@ class _PowerStateBlock(StateBlock):
                     "predetermined value, use the calculate_state method "
                     "before using initialize to determine the values for "
                     "the state variables and avoid fixing the property variables."
-                    "".format(sb_name=self.name, dof=dof)
+                    "".format(sb_name=self[k].name, dof=dof)
                 )
 
         # If input block, return flags, else release state
@@ -213,11 +216,86 @@ class _PowerStateBlock(StateBlock):
         if flags is None:
             return
         # Unfix state variables
-        for attr in flags:
-            if flags[attr] is True:
-                getattr(self, attr).unfix()
+        for k, sb in self.items():
+            if not flags[k, "power", None]:
+                sb.power.unfix()
         return
-        
+
+    def _fix_state_vars_bulk(self, state_args=None):
+        """
+        Fix power at every index in one loop. Returns flags in the same format
+        as idaes.core.util.initialization.fix_state_vars, so revert_state_vars
+        can also be used to release them.
+        """
+        power = None
+        if state_args is not None and "power" in state_args:
+            power = state_args["power"]
+        flags = {}
+        for k, sb in self.items():
+            flags[k, "power", None] = sb.power.fixed
+            if not sb.power.fixed:
+                if power is not None:
+                    sb.power.fix(power)
+                elif sb.power.value is not None:
+                    sb.power.fix()
+                else:
+                    raise ConfigurationError(
+                        "{} state variable power does not have a value "
+                        "assigned. This usually occurs when a Var is not "
+                        "assigned an initial value when it is created. "
+                        "Please provide an initial value or state_args.".format(sb.name)
+                    )
+        return flags
+
+    def _degrees_of_freedom_bulk(self):
+        """
+        Degrees of freedom of each index. Returns a dict of index -> degrees of
+        freedom, the same as calling degrees_of_freedom on each index.
+
+        Every index is built by the same build(), so the active equality
+        constraints and the variables they use are found once, on the first
+        index. Each index then only checks which of its copies of those
+        variables are fixed, instead of walking its constraints again.
+        """
+        if len(self) == 0:
+            return {}
+        first = self[next(iter(self.keys()))]
+        n_equalities = 0
+        local_names = set()
+        shared_vars = ComponentSet()
+        for c in first.component_data_objects(Constraint, active=True, descend_into=True):
+            if c.equality:
+                n_equalities += 1
+                for v in identify_variables(c.body, include_fixed=True):
+                    if _is_within(v, first):
+                        local_names.add(v.getname(fully_qualified=True, relative_to=first))
+                    else:
+                        # Variables outside the state block are the same for every index
+                        shared_vars.add(v)
+        n_shared = sum(1 for v in shared_vars if not v.fixed)
+
+        dof = {}
+        for k, sb in self.items():
+            local_vars = [sb.find_component(name) for name in local_names]
+            if any(v is None for v in local_vars):
+                # This index wasn't built the same way, so count it in full
+                dof[k] = degrees_of_freedom(sb)
+            else:
+                dof[k] = n_shared + sum(1 for v in local_vars if not v.fixed) - n_equalities
+        return dof
+
+
+def _is_within(component, block):
+    """
+    Whether component is on block or one of its sub-blocks.
+    """
+    parent = component.parent_block()
+    while parent is not None:
+        if parent is block:
+            return True
+        parent = parent.parent_block()
+    return False
+
 # STEP 4: 
 @declare_process_block_class("PowerStateBlock", block_class=_PowerStateBlock)
 class PowerStateBlockData(StateBlockData):
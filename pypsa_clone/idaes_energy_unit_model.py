@@ -1,6 +1,7 @@
 # Import Pyomo libraries
 from pyomo.environ import (
     Var,
+    Param,
     Suffix,
     units as pyunits,
 )
@@ -20,14 +21,11 @@ import idaes.logger as idaeslog
 _log = idaeslog.getLogger(__name__)
 
 
-# When using this file the name "Bus" is what is imported
-@declare_process_block_class("Bus")
-class BusData(UnitModelBlockData):
+def _power_unit_config():
     """
-    Zero order Bus model
+    Config options shared by all the power unit models. None of them support
+    dynamics or holdup, they just move power around between state blocks.
     """
-
-    # CONFIG are options for the unit model, this simple model only has the mandatory config options
     CONFIG = ConfigBlock()
 
     CONFIG.declare(
@@ -37,7 +35,7 @@ class BusData(UnitModelBlockData):
             default=False,
             description="Dynamic model flag - must be False",
             doc="""Indicates whether this model will be dynamic or not,
-    **default** = False. The Bus unit does not support dynamic
+    **default** = False. Power units do not support dynamic
     behavior, thus this must be False.""",
         ),
     )
@@ -48,7 +46,7 @@ class BusData(UnitModelBlockData):
             domain=In([False]),
             description="Holdup construction flag - must be False",
             doc="""Indicates whether holdup terms should be constructed or not.
-    **default** - False. The Bus unit does not have defined volume, thus
+    **default** - False. Power units do not have defined volume, thus
     this must be False.""",
         ),
     )
@@ -77,6 +75,38 @@ class BusData(UnitModelBlockData):
     see property package for documentation.}""",
         ),
     )
+    return CONFIG
+
+
+# When using this file the name "Bus" is what is imported
+@declare_process_block_class("Bus")
+class BusData(UnitModelBlockData):
+    """
+    Zero order Bus model
+    """
+
+    # CONFIG are options for the unit model, this simple model only has the mandatory config options
+    CONFIG = _power_unit_config()
+    CONFIG.declare(
+        "inlet_list",
+        ConfigValue(
+            default=None,
+            domain=list,
+            description="List of inlet names",
+            doc="""A list of names to use for the inlet ports, e.g one per generator.
+    **default** - None, which creates a single port called inlet.""",
+        ),
+    )
+    CONFIG.declare(
+        "outlet_list",
+        ConfigValue(
+            default=None,
+            domain=list,
+            description="List of outlet names",
+            doc="""A list of names to use for the outlet ports, e.g one per load.
+    **default** - None, which creates a single port called outlet.""",
+        ),
+    )
 
     def build(self):
         # build always starts by calling super().build()
@@ -93,20 +123,48 @@ class BusData(UnitModelBlockData):
         tmp_dict = dict(**self.config.property_package_args)
         tmp_dict["parameters"] = self.config.property_package
         tmp_dict["defined_state"] = True  # inlet block is an inlet
-        self.properties_in = self.config.property_package.state_block_class(
-            self.flowsheet().config.time, doc="Material properties of inlet", **tmp_dict
-        )
+        if self.config.inlet_list is None:
+            self.properties_in = self.config.property_package.state_block_class(
+                self.flowsheet().config.time, doc="Material properties of inlet", **tmp_dict
+            )
+            inlet_blocks = [self.properties_in]
+        else:
+            inlet_blocks = []
+            for name in self.config.inlet_list:
+                sb = self.config.property_package.state_block_class(
+                    self.flowsheet().config.time, doc=f"Power properties of inlet {name}", **tmp_dict
+                )
+                setattr(self, "properties_" + name, sb)
+                inlet_blocks.append(sb)
         # Add outlet and waste block
         tmp_dict["defined_state"] = False  # outlet and waste block is not an inlet
-        self.properties_out = self.config.property_package.state_block_class(
-            self.flowsheet().config.time,
-            doc="Material properties of outlet",
-            **tmp_dict
-        )
+        if self.config.outlet_list is None:
+            self.properties_out = self.config.property_package.state_block_class(
+                self.flowsheet().config.time,
+                doc="Material properties of outlet",
+                **tmp_dict
+            )
+            outlet_blocks = [self.properties_out]
+        else:
+            outlet_blocks = []
+            for name in self.config.outlet_list:
+                sb = self.config.property_package.state_block_class(
+                    self.flowsheet().config.time, doc=f"Power properties of outlet {name}", **tmp_dict
+                )
+                setattr(self, "properties_" + name, sb)
+                outlet_blocks.append(sb)
 
         # Add ports - oftentimes users interact with these rather than the state blocks
-        self.add_port(name="inlet", block=self.properties_in)
-        self.add_port(name="outlet", block=self.properties_out)
+        if self.config.inlet_list is None:
+            self.add_port(name="inlet", block=self.properties_in)
+        else:
+            for name, sb in zip(self.config.inlet_list, inlet_blocks):
+                self.add_port(name=name, block=sb)
+        if self.config.outlet_list is None:
+            self.add_port(name="outlet", block=self.properties_out)
+        else:
+            for name, sb in zip(self.config.outlet_list, outlet_blocks):
+                self.add_port(name=name, block=sb)
 
 
         # Add constraints
@@ -118,9 +176,276 @@ class BusData(UnitModelBlockData):
         )
         def eq_power_balance(b, t):
             return (
-                b.properties_in[t].power - b.properties_out[t].power == 0
+                sum(sb[t].power for sb in inlet_blocks)
+                - sum(sb[t].power for sb in outlet_blocks) == 0
+            )
+
+
+    def calculate_scaling_factors(self):
+        super().calculate_scaling_factors()
+
+
+@declare_process_block_class("Generator")
+class GeneratorData(UnitModelBlockData):
+    """
+    Dispatchable generator.
+
+    The generator output is limited by its nominal power (which can be scaled
+    per time point, e.g for renewables), and the change in output between
+    time points is limited by the ramp limits. Each time point has an
+    operating cost of marginal_cost * power, which is linear so the dispatch
+    can be solved as an LP.
+    """
+
+    CONFIG = _power_unit_config()
+    CONFIG.declare(
+        "p_nom",
+        ConfigValue(
+            default=0,
+            domain=float,
+            description="Nominal power of the generator (W)",
+        ),
+    )
+    CONFIG.declare(
+        "p_min_pu",
+        ConfigValue(
+            default=0,
+            domain=float,
+            description="Minimum output, as a fraction of p_nom",
+        ),
+    )
+    CONFIG.declare(
+        "ramp_limit_up",
+        ConfigValue(
+            default=None,
+            description="Maximum increase in output per time point, as a fraction of p_nom",
+            doc="""**default** - None, which means the output is not ramp limited.""",
+        ),
+    )
+    CONFIG.declare(
+        "ramp_limit_down",
+        ConfigValue(
+            default=None,
+            description="Maximum decrease in output per time point, as a fraction of p_nom",
+            doc="""**default** - None, which means the output is not ramp limited.""",
+        ),
+    )
+    CONFIG.declare(
+        "marginal_cost",
+        ConfigValue(
+            default=0,
+            domain=float,
+            description="Cost per W of output per time point",
+        ),
+    )
+
+    def build(self):
+        super().build()
+
+        self.scaling_factor = Suffix(direction=Suffix.EXPORT)
+
+        time = self.flowsheet().time
+
+        tmp_dict = dict(**self.config.property_package_args)
+        tmp_dict["parameters"] = self.config.property_package
+        tmp_dict["defined_state"] = False
+        self.properties_out = self.config.property_package.state_block_class(
+            time, doc="Power properties of outlet", **tmp_dict
+        )
+        self.add_port(name="outlet", block=self.properties_out)
+
+        # These are Params rather than fixed Vars so that the dispatch stays linear,
+        # and they can be changed between solves without rebuilding the model.
+        self.p_nom = Param(initialize=self.config.p_nom, mutable=True, units=pyunits.W, doc="Nominal power")
+        self.p_min_pu = Param(initialize=self.config.p_min_pu, mutable=True, doc="Minimum output per unit of p_nom")
+        self.p_max_pu = Param(time, initialize=1, mutable=True, doc="Available output per unit of p_nom")
+        self.marginal_cost = Param(
+            initialize=self.config.marginal_cost, mutable=True, units=pyunits.W**-1,
+            doc="Cost per W of output per time point",
+        )
+
+        @self.Constraint(time, doc="Maximum output")
+        def eq_power_max(b, t):
+            return b.properties_out[t].power <= b.p_max_pu[t] * b.p_nom
+
+        @self.Constraint(time, doc="Minimum output")
+        def eq_power_min(b, t):
+            return b.properties_out[t].power >= b.p_min_pu * b.p_nom
+
+        if self.config.ramp_limit_up is not None or self.config.ramp_limit_down is not None:
+            # The first time point is ramp limited against initial_power, which is only
+            # known when the dispatch follows on from a previous one (see set_initial_power)
+            self.initial_power = Param(initialize=0, mutable=True, units=pyunits.W, doc="Output before the first time point")
+
+            def _previous_power(b, t):
+                if t == time.first():
+                    return b.initial_power
+                return b.properties_out[time.prev(t)].power
+
+            if self.config.ramp_limit_up is not None:
+                self.ramp_limit_up = Param(initialize=self.config.ramp_limit_up, mutable=True)
+
+                @self.Constraint(time, doc="Ramp up limit")
+                def eq_ramp_up(b, t):
+                    return b.properties_out[t].power - _previous_power(b, t) <= b.ramp_limit_up * b.p_nom
+
+                self.eq_ramp_up[time.first()].deactivate()
+
+            if self.config.ramp_limit_down is not None:
+                self.ramp_limit_down = Param(initialize=self.config.ramp_limit_down, mutable=True)
+
+                @self.Constraint(time, doc="Ramp down limit")
+                def eq_ramp_down(b, t):
+                    return _previous_power(b, t) - b.properties_out[t].power <= b.ramp_limit_down * b.p_nom
+
+                self.eq_ramp_down[time.first()].deactivate()
+
+        @self.Expression(time, doc="Operating cost")
+        def operating_cost(b, t):
+            return b.marginal_cost * b.properties_out[t].power
+
+    def set_availability(self, values):
+        """
+        Set p_max_pu from a sequence with one value per time point.
+        """
+        for t, v in zip(self.flowsheet().time, values):
+            self.p_max_pu[t] = float(v)
+
+    def set_initial_power(self, value):
+        """
+        Set the output before the first time point, and ramp limit the first time point against it.
+        """
+        if not hasattr(self, "initial_power"):
+            return
+        self.initial_power.set_value(value)
+        t0 = self.flowsheet().time.first()
+        if hasattr(self, "eq_ramp_up"):
+            self.eq_ramp_up[t0].activate()
+        if hasattr(self, "eq_ramp_down"):
+            self.eq_ramp_down[t0].activate()
+
+    def calculate_scaling_factors(self):
+        super().calculate_scaling_factors()
+
+
+@declare_process_block_class("Load")
+class LoadData(UnitModelBlockData):
+    """
+    Fixed power demand, given as a time series.
+    """
+
+    CONFIG = _power_unit_config()
+
+    def build(self):
+        super().build()
+
+        self.scaling_factor = Suffix(direction=Suffix.EXPORT)
+
+        time = self.flowsheet().time
+
+        tmp_dict = dict(**self.config.property_package_args)
+        tmp_dict["parameters"] = self.config.property_package
+        tmp_dict["defined_state"] = True
+        self.properties_in = self.config.property_package.state_block_class(
+            time, doc="Power properties of inlet", **tmp_dict
+        )
+        self.add_port(name="inlet", block=self.properties_in)
+
+        self.demand = Param(time, initialize=0, mutable=True, units=pyunits.W, doc="Power demand")
+
+        @self.Constraint(time, doc="Power demand")
+        def eq_demand(b, t):
+            return b.properties_in[t].power == b.demand[t]
+
+    def set_profile(self, values):
+        """
+        Set the demand from a sequence (e.g a list or numpy array) with one value per time point.
+        """
+        for t, v in zip(self.flowsheet().time, values):
+            self.demand[t] = float(v)
+
+    def calculate_scaling_factors(self):
+        super().calculate_scaling_factors()
+
+
+@declare_process_block_class("EnergyTranslator")
+class EnergyTranslatorData(UnitModelBlockData):
+    """
+    Translates between the power property package and a thermal unit model, so
+    electricity and heat can be optimised in one flowsheet.
+
+    With direction="power_to_thermal" (e.g an electric heater) the translator has
+    an inlet power port, and delivers efficiency * power to the thermal unit.
+    With direction="thermal_to_power" (e.g a turbine) the translator has an outlet
+    power port, and produces efficiency * (work done by the fluid).
+
+    The thermal side is linked with link_to(), e.g
+    translator.link_to(m.fs.heater.heat_duty) or translator.link_to(m.fs.turbine.work_mechanical).
+    IDAES uses positive heat_duty and work for energy going into the fluid.
+    """
+
+    CONFIG = _power_unit_config()
+    CONFIG.declare(
+        "direction",
+        ConfigValue(
+            default="power_to_thermal",
+            domain=In(["power_to_thermal", "thermal_to_power"]),
+            description="Direction energy flows through the translator",
+        ),
+    )
+    CONFIG.declare(
+        "efficiency",
+        ConfigValue(
+            default=1.0,
+            domain=float,
+            description="Fraction of the energy that makes it through the translator",
+        ),
+    )
+
+    def build(self):
+        super().build()
+
+        self.scaling_factor = Suffix(direction=Suffix.EXPORT)
+
+        time = self.flowsheet().time
+
+        tmp_dict = dict(**self.config.property_package_args)
+        tmp_dict["parameters"] = self.config.property_package
+        if self.config.direction == "power_to_thermal":
+            tmp_dict["defined_state"] = True
+            self.properties_in = self.config.property_package.state_block_class(
+                time, doc="Power properties of inlet", **tmp_dict
+            )
+            self.add_port(name="inlet", block=self.properties_in)
+            power_block = self.properties_in
+        else:
+            tmp_dict["defined_state"] = False
+            self.properties_out = self.config.property_package.state_block_class(
+                time, doc="Power properties of outlet", **tmp_dict
             )
+            self.add_port(name="outlet", block=self.properties_out)
+            power_block = self.properties_out
+
+        self.efficiency = Param(initialize=self.config.efficiency, mutable=True, doc="Translator efficiency")
+        self.energy = Var(time, initialize=0, units=pyunits.W, doc="Energy into the fluid of the thermal unit")
+
+        @self.Constraint(time, doc="Energy balance")
+        def eq_energy_balance(b, t):
+            if b.config.direction == "power_to_thermal":
+                return b.energy[t] == b.efficiency * power_block[t].power
+            # work done by the fluid is negative energy in
+            return power_block[t].power == -b.efficiency * b.energy[t]
 
+    def link_to(self, thermal_var):
+        """
+        Link the translator to a time indexed heat duty or work variable on a thermal unit.
+        """
+        @self.Constraint(self.flowsheet().time, doc="Link to thermal unit")
+        def eq_thermal_link(b, t):
+            return thermal_var[t] == b.energy[t]
 
     def calculate_scaling_factors(self):
-        super().calculate_scaling_factors()
\ No newline at end of file
+        super().calculate_scaling_factors()
+        for v in self.energy.values():
+            if iscale.get_scaling_factor(v) is None:
+                iscale.set_scaling_factor(v, 1e-3)
@@ -0,0 +1,109 @@
+"""
+Rolling horizon dispatch for horizons that are too long to solve as one model (e.g a year of hourly data).
+
+The horizon is split into windows of `window` periods, and each window is solved with
+`overlap` extra periods of look-ahead so the generators don't get caught out by what comes
+next. Only the first `window` periods of each solve are kept. The generator outputs at the
+end of the kept periods become the initial power of the next window, so ramp limits carry
+across the window boundaries.
+
+The same model is re-used for every window (only the Params change), so memory only depends
+on the window size, not the length of the horizon.
+"""
+import time as timer
+
+import numpy as np
+import idaes.logger as idaeslog
+
+from dispatch import build_dispatch_model, solve_dispatch
+
+_log = idaeslog.getLogger(__name__)
+
+
+def _window_slice(series, start, length):
+    # Pad the last window by repeating the final value, the padded periods are never kept.
+    series = np.asarray(series, dtype=float)
+    values = series[start:start + length]
+    if len(values) < length:
+        values = np.concatenate([values, np.full(length - len(values), series[-1])])
+    return values
+
+
+def solve_rolling_horizon(generators, loads, window=24, overlap=24, solver="appsi_highs"):
+    """
+    Solve a dispatch over the full length of the load time series, one window at a time.
+
+    Args:
+        generators: dict of generator name -> Generator config options, as in build_dispatch_model.
+                    "p_max_pu" time series must cover the full horizon.
+        loads: dict of load name -> demand time series over the full horizon
+        window: number of periods kept from each solve
+        overlap: number of extra look-ahead periods in each solve
+        solver: LP solver to use
+
+    Returns:
+        (dispatch, solve_times): dispatch is a dict of generator name -> numpy array over the
+        full horizon, solve_times is a list with the wall time of each window's solve.
+    """
+    n_periods = len(next(iter(loads.values())))
+    length = window + overlap
+
+    availability = {}
+    first_generators = {}
+    for name, options in generators.items():
+        options = dict(options)
+        if "p_max_pu" in options:
+            availability[name] = options.pop("p_max_pu")
+            options["p_max_pu"] = _window_slice(availability[name], 0, length)
+        first_generators[name] = options
+
+    m = build_dispatch_model(
+        length,
+        first_generators,
+        {name: _window_slice(demand, 0, length) for name, demand in loads.items()},
+    )
+    time_points = list(m.fs.time)
+
+    dispatch = {name: np.zeros(n_periods) for name in generators}
+    solve_times = []
+
+    for start in range(0, n_periods, window):
+        if start > 0:
+            for name, demand in loads.items():
+                getattr(m.fs, name).set_profile(_window_slice(demand, start, length))
+            for name, series in availability.items():
+                getattr(m.fs, name).set_availability(_window_slice(series, start, length))
+            for name in generators:
+                getattr(m.fs, name).set_initial_power(dispatch[name][start - 1])
+
+        tic = timer.perf_counter()
+        solve_dispatch(m, solver=solver)
+        solve_times.append(timer.perf_counter() - tic)
+        _log.info(f"Window starting at period {start} solved in {solve_times[-1]:.3f} s")
+
+        keep = min(window, n_periods - start)
+        for name in generators:
+            outlet = getattr(m.fs, name).outlet.power
+            dispatch[name][start:start + keep] = [outlet[t].value for t in time_points[:keep]]
+
+    return dispatch, solve_times
+
+
+if __name__ == "__main__":
+    hours = np.arange(24 * 365)
+    demand = 800 + 300 * np.sin(2 * np.pi * hours / 24) + 100 * np.sin(2 * np.pi * hours / (24 * 365))
+    solar = np.clip(np.sin(2 * np.pi * (hours - 6) / 24), 0, None)
+
+    dispatch, solve_times = solve_rolling_horizon(
+        generators={
+            "coal": {"p_nom": 600, "p_min_pu": 0.3, "ramp_limit_up": 0.1, "ramp_limit_down": 0.1, "marginal_cost": 30},
+            "gas": {"p_nom": 800, "marginal_cost": 70},
+            "solar": {"p_nom": 500, "marginal_cost": 0, "p_max_pu": solar},
+        },
+        loads={"demand": demand},
+        window=24,
+        overlap=24,
+    )
+    print("windows:", len(solve_times))
+    print("total solve time (s):", sum(solve_times))
+    print("slowest window (s):", max(solve_times))
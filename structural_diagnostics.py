@@ -0,0 +1,159 @@
+"""
+Structural diagnostics (Dulmage-Mendelsohn analysis) that don't rebuild the incidence graph every time.
+
+DiagnosticsToolbox builds the incidence graph of the model again for every report and display,
+which is slow on big flowsheets when you're fixing and unfixing things to find a structural
+problem. StructuralDiagnostics builds the incidence graph once per model structure (including
+the fixed variables), and each analysis just takes the subgraph of the currently unfixed
+variables. The Dulmage-Mendelsohn partition is cached for each set of fixed variables, so
+going back to an earlier set of fixed variables is free.
+
+    from structural_diagnostics import StructuralDiagnostics
+    sd = StructuralDiagnostics(m)
+    sd.report_structural_issues()
+    m.fs.tank.tank_level.unfix()
+    sd.display_underconstrained_set()
+
+Each StructuralDiagnostics holds on to its graph, and working out whether the structure changed
+means walking the whole model, so that is only done when it first gets its graph. If constraints
+or variables are added, removed, activated or deactivated afterwards, call sd.rebuild() (the
+graph is only rebuilt if the structure actually changed). Graphs are also shared between
+instances for the same model, checked against its current structure.
+"""
+import sys
+import weakref
+
+import numpy as np
+from pyomo.contrib.incidence_analysis import IncidenceGraphInterface
+import idaes.logger as idaeslog
+
+from autoscaling import structural_key
+
+_log = idaeslog.getLogger(__name__)
+
+# model -> (structural key, IncidenceGraphInterface), only the latest structure of each model is
+# kept, and it goes when the model does
+_graph_cache = weakref.WeakKeyDictionary()
+
+
+def _incidence_graph(m):
+    key = structural_key(m)
+    cached = _graph_cache.get(m)
+    if cached is None or cached[0] != key:
+        _log.info(f"Building incidence graph for {m.name}")
+        igraph = IncidenceGraphInterface(m, active=True, include_fixed=True, include_inequality=False)
+        cached = _graph_cache[m] = (key, igraph)
+    return cached[1]
+
+
+class StructuralDiagnostics:
+    """
+    Cached structural analysis of a model. See the module docstring.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._igraph = None
+        self._dm_cache = {}
+
+    def _set_igraph(self, igraph):
+        if igraph is not self._igraph:
+            # The structure changed, the partitions of the old graph don't apply any more
+            self._igraph = igraph
+            self._dm_cache = {}
+        return igraph
+
+    @property
+    def igraph(self):
+        if self._igraph is not None:
+            return self._igraph
+        return self._set_igraph(_incidence_graph(self.model))
+
+    def rebuild(self):
+        """
+        Check the model structure again, and rebuild the incidence graph if constraints or
+        variables were added, removed, activated or deactivated since it was built.
+        """
+        return self._set_igraph(_incidence_graph(self.model))
+
+    @staticmethod
+    def _unfixed_mask(igraph):
+        return np.fromiter((not v.fixed for v in igraph.variables), dtype=bool, count=len(igraph.variables))
+
+    def dulmage_mendelsohn(self):
+        """
+        The (variable, constraint) Dulmage-Mendelsohn partitions of the unfixed variables and
+        the active equality constraints, see IncidenceGraphInterface.dulmage_mendelsohn.
+        """
+        igraph = self.igraph
+        mask = self._unfixed_mask(igraph)
+        key = mask.tobytes()
+        if key not in self._dm_cache:
+            variables = [v for v, unfixed in zip(igraph.variables, mask) if unfixed]
+            self._dm_cache[key] = igraph.dulmage_mendelsohn(variables=variables, constraints=igraph.constraints)
+        return self._dm_cache[key]
+
+    def underconstrained_set(self):
+        """
+        (variables, constraints) of the underconstrained part of the model.
+        """
+        var_dmp, con_dmp = self.dulmage_mendelsohn()
+        return var_dmp.unmatched + var_dmp.underconstrained, con_dmp.underconstrained
+
+    def overconstrained_set(self):
+        """
+        (variables, constraints) of the overconstrained part of the model.
+        """
+        var_dmp, con_dmp = self.dulmage_mendelsohn()
+        return var_dmp.overconstrained, con_dmp.overconstrained + con_dmp.unmatched
+
+    def degrees_of_freedom(self):
+        igraph = self.igraph
+        return int(self._unfixed_mask(igraph).sum()) - len(igraph.constraints)
+
+    def report_structural_issues(self, stream=sys.stdout):
+        """
+        Print the model size, degrees of freedom, and the size of any structurally
+        under- or overconstrained parts.
+        """
+        var_dmp, con_dmp = self.dulmage_mendelsohn()
+        under_vars, under_cons = var_dmp.unmatched + var_dmp.underconstrained, con_dmp.underconstrained
+        over_vars, over_cons = var_dmp.overconstrained, con_dmp.overconstrained + con_dmp.unmatched
+        n_vars = int(self._unfixed_mask(self._igraph).sum())
+        n_cons = len(self._igraph.constraints)
+
+        stream.write("=" * 80 + "\n")
+        stream.write("Structural diagnostics\n\n")
+        stream.write(f"    Unfixed variables in equality constraints: {n_vars}\n")
+        stream.write(f"    Active equality constraints: {n_cons}\n")
+        stream.write(f"    Degrees of freedom: {n_vars - n_cons}\n\n")
+        if under_vars or under_cons:
+            stream.write(
+                f"WARNING: Structural singularity found\n"
+                f"    Under-constrained set: {len(under_vars)} variables, {len(under_cons)} constraints\n"
+            )
+        if over_vars or over_cons:
+            stream.write(
+                f"WARNING: Structural singularity found\n"
+                f"    Over-constrained set: {len(over_vars)} variables, {len(over_cons)} constraints\n"
+            )
+        if not (under_vars or under_cons or over_vars or over_cons):
+            stream.write("No structural singularities found\n")
+        stream.write("=" * 80 + "\n")
+
+    def _display_set(self, title, variables, constraints, stream):
+        stream.write("=" * 80 + "\n")
+        stream.write(f"{title}\n\n")
+        stream.write("    Variables:\n")
+        for v in variables:
+            stream.write(f"        {v.name}\n")
+        stream.write("\n    Constraints:\n")
+        for c in constraints:
+            stream.write(f"        {c.name}\n")
+        stream.write("=" * 80 + "\n")
+
+    def display_underconstrained_set(self, stream=sys.stdout):
+        self._display_set("Dulmage-Mendelsohn Under-Constrained Set", *self.underconstrained_set(), stream)
+
+    def display_overconstrained_set(self, stream=sys.stdout):
+        self._display_set("Dulmage-Mendelsohn Over-Constrained Set", *self.overconstrained_set(), stream)
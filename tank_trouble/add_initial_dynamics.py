@@ -33,4 +33,12 @@ def add_initial_dynamics(unit_model):
             doc="Initial energy accumulation constraint"
         )
         def initial_energy_accumulation_constraint(b, p):
-            return b.initial_energy_accumulation[p] == b.control_volume.energy_accumulation[0, p]
\ No newline at end of file
+            return b.initial_energy_accumulation[p] == b.control_volume.energy_accumulation[0, p]
+
+
+def fix_steady_initial_state(unit_model):
+    """
+    Fixes the initial accumulation variables to zero, i.e the unit starts at steady state.
+    """
+    unit_model.initial_material_accumulation.fix(0)
+    unit_model.initial_energy_accumulation.fix(0)
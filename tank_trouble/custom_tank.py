@@ -1,7 +1,9 @@
 from idaes.core import declare_process_block_class
 from idaes.models_extra.power_generation.unit_models.watertank import WaterTankData
-from add_initial_dynamics import add_initial_dynamics
+from add_initial_dynamics import add_initial_dynamics, fix_steady_initial_state
+from time_slicing import solve_initial_slice
 from pyomo.environ import Reference, Var, units
+from pyomo.common.config import ConfigValue, Bool
 
 @declare_process_block_class("DynamicTank")
 class DynamicTankData(WaterTankData):
@@ -10,6 +12,17 @@ class DynamicTankData(WaterTankData):
     This extends the Heater class to include reference variables for initial holdup and initial accumulation. 
     Which makes it easier for us to set initial conditions in the frontend.
     """
+    CONFIG = WaterTankData.CONFIG()
+    CONFIG.declare(
+        "steady_initial_state",
+        ConfigValue(
+            default=False,
+            domain=Bool,
+            description="Start the tank at steady state",
+            doc="""If True, the initial material and energy accumulations are fixed at zero,
+    and solve_initial_state can be used to get a consistent starting point for the dynamic solve.""",
+        ),
+    )
 
     def build(self,*args, **kwargs):
         """
@@ -27,4 +40,14 @@ class DynamicTankData(WaterTankData):
             doc="Initial level constraint"
         )
         def initial_level_constraint(b):
-            return b.initial_tank_level == b.tank_level[0]
\ No newline at end of file
+            return b.initial_tank_level == b.tank_level[0]
+
+        if self.config.steady_initial_state and self.config.dynamic:
+            fix_steady_initial_state(self)
+
+    def solve_initial_state(self, solver=None, optarg=None, tee=False):
+        """
+        Solve the first time point as a steady state problem, and use it as the
+        initial guess for all the later time points. Call after initialize.
+        """
+        return solve_initial_slice(self, solver=solver, optarg=optarg, tee=tee)
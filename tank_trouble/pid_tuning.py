@@ -0,0 +1,220 @@
+"""
+Tune the gains of a PI/PID level controller on the tank, over a batch of disturbance scenarios.
+
+The control loop is a DynamicTank draining through a valve, with a PIDController moving the
+valve opening to keep the tank level at its setpoint. Each candidate set of gains is simulated
+for every disturbance scenario with the PETSc DAE integrator, in a process pool (the model is
+built once per worker, with scenario_runner.py's worker template), and scored by the mean integral absolute error (IAE) of the level.
+The gains are then searched with Nelder-Mead (derivative free, since the score comes from an
+integrator and not from a Pyomo model).
+
+Disturbance scenarios are the same long format table as scenario_runner.py, e.g a step in
+fs.tank.inlet.flow_mol.
+
+Opening the valve lowers the level, so the gains are negative.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import math
+
+import numpy as np
+import pandas as pd
+import pyomo.environ as pyo
+from pyomo.network import Arc
+from scipy.optimize import minimize
+from idaes.core import FlowsheetBlock
+import idaes.core.solvers.petsc as petsc
+from idaes.core.util.initialization import propagate_state
+from idaes.core.util.model_statistics import degrees_of_freedom
+from idaes.models.control.controller import PIDController, ControllerType, ControllerMVBoundType
+from idaes.models.properties import iapws95
+from idaes.models_extra.power_generation.unit_models.helm import HelmValve as WaterValve
+import idaes.core.util.scaling as iscale
+import idaes.logger as idaeslog
+
+from custom_tank import DynamicTank
+from scenario_runner import scenarios_from_table, init_worker, worker_template, worker_time_points
+import os
+import sys
+
+# adaptive_time.py is in the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from adaptive_time import discretize
+
+_log = idaeslog.getLogger(__name__)
+
+GAIN_NAMES = {
+    ControllerType.PI: ["gain_p", "gain_i"],
+    ControllerType.PID: ["gain_p", "gain_i", "gain_d"],
+}
+
+DEFAULT_TS_OPTIONS = {
+    "--ts_type": "beuler",
+    "--ts_dt": 0.1,
+    "--ts_save_trajectory": 1,
+}
+
+# Score for a candidate that fails to integrate, so the search moves away from it
+FAILED_SCORE = 1e6
+
+
+def build_control_model(time_set=(0, 10, 60), controller_type=ControllerType.PI, setpoint=1.0):
+    """
+    Tank level control loop. The disturbances (tank inlet conditions) are fixed at each
+    time point, with one finite element between each time point as PETSc does the integration.
+    """
+    m = pyo.ConcreteModel()
+    m.fs = FlowsheetBlock(dynamic=True, time_set=list(time_set), time_units=pyo.units.s)
+    m.fs.prop_water = iapws95.Iapws95ParameterBlock()
+
+    m.fs.tank = DynamicTank(
+        tank_type="rectangular_tank", has_holdup=True, property_package=m.fs.prop_water,
+        has_heat_transfer=True, dynamic=True, steady_initial_state=True
+    )
+    m.fs.valve = WaterValve(
+        dynamic=False, has_holdup=False, phase="Liq", property_package=m.fs.prop_water
+    )
+    m.fs.tank_valve = Arc(source=m.fs.tank.outlet, destination=m.fs.valve.inlet)
+    m.fs.ctrl = PIDController(
+        process_var=m.fs.tank.tank_level,
+        manipulated_var=m.fs.valve.valve_opening,
+        controller_type=controller_type,
+        mv_bound_type=ControllerMVBoundType.SMOOTH_BOUND,
+        calculate_initial_integral=True,
+    )
+
+    discretize(m.fs)
+    pyo.TransformationFactory("network.expand_arcs").apply_to(m)
+
+    pin = 200000  # Pa
+    pout = 100000  # Pa
+    m.fs.tank.inlet.flow_mol.fix(200)
+    m.fs.tank.inlet.pressure.fix(pin)
+    m.fs.tank.inlet.enth_mol.fix(3700.36)
+    m.fs.tank.tank_width.fix(0.4)
+    m.fs.tank.tank_length.fix(0.4)
+    m.fs.tank.heat_duty.fix(0)
+
+    # Size the valve so the tank is at the setpoint level at steady state with the valve half open
+    m.fs.valve.Cv.fix(200 / math.sqrt(pin - pout + 1000 * 9.81 * setpoint) / 0.5)
+    m.fs.valve.outlet.pressure.fix(pout)
+
+    m.fs.ctrl.mv_lb = 0.01
+    m.fs.ctrl.mv_ub = 1.0
+    m.fs.ctrl.setpoint.fix(setpoint)
+    m.fs.ctrl.mv_ref.fix(0.5)
+    for name in GAIN_NAMES[controller_type]:
+        getattr(m.fs.ctrl, name).fix(0)
+    # The controller starts with the valve at mv_ref, and the initial integral is calculated from that
+    m.fs.valve.valve_opening[m.fs.time.first()].fix(0.5)
+
+    iscale.calculate_scaling_factors(m)
+    assert degrees_of_freedom(m.fs) == 0, "Degrees of freedom is not zero, check model setup."
+
+    m.fs.tank.initialize()
+    propagate_state(m.fs.tank_valve)
+    m.fs.valve.initialize()
+    return m
+
+
+def _simulate(gains, gain_names, scenario, ts_options):
+    """
+    Integrate one scenario with one set of gains, and return the IAE of the level.
+    """
+    m = worker_template().reset(scenario)
+    time = list(m.fs.time)
+    for name, gain in zip(gain_names, gains):
+        getattr(m.fs.ctrl, name).fix(float(gain))
+
+    # Any failure (PETSc, or the property functions failing to evaluate) scores as a failed
+    # candidate, as scenario_runner.py records a failed scenario, instead of ending the search
+    try:
+        result = petsc.petsc_dae_by_time_element(m, time=m.fs.time, ts_options=ts_options)
+    except Exception as e:
+        _log.warning(f"gains {dict(zip(gain_names, gains))} failed to integrate: {e}")
+        return FAILED_SCORE
+    if not all(pyo.check_optimal_termination(r) for r in result.results):
+        return FAILED_SCORE
+
+    tj = result.trajectory
+    t = np.array(tj.time)
+    level = np.array(tj.get_vec(m.fs.tank.tank_level[time[-1]]))
+    error = np.abs(level - pyo.value(m.fs.ctrl.setpoint[time[-1]]))
+    return float(np.sum((error[1:] + error[:-1]) / 2 * np.diff(t)))
+
+
+class GainTuner:
+    """
+    Evaluates controller gains over a batch of disturbance scenarios in a process pool.
+    Use as a context manager, so the worker processes are shut down afterwards:
+
+        with GainTuner(table) as tuner:
+            result = tuner.tune([-0.5, -0.05])
+    """
+
+    def __init__(self, table, build_kwargs=None, ts_options=None, max_workers=None):
+        self.build_kwargs = build_kwargs or {}
+        self.gain_names = GAIN_NAMES[self.build_kwargs.get("controller_type", ControllerType.PI)]
+        self.ts_options = ts_options or DEFAULT_TS_OPTIONS
+        self._pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=init_worker,
+            initargs=(build_control_model, self.build_kwargs),
+        )
+        time_points = self._pool.submit(worker_time_points).result()
+        self.scenarios = scenarios_from_table(table, time_points)
+        self.history = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self._pool.shutdown()
+
+    def evaluate(self, candidates):
+        """
+        IAE of each candidate set of gains, for each scenario.
+        Returns an array of shape (n_candidates, n_scenarios).
+        """
+        futures = [
+            [
+                self._pool.submit(_simulate, list(gains), self.gain_names, scenario, self.ts_options)
+                for scenario in self.scenarios
+            ]
+            for gains in candidates
+        ]
+        return np.array([[f.result() for f in row] for row in futures])
+
+    def score(self, gains):
+        """
+        Mean IAE of one set of gains over all the scenarios.
+        """
+        score = float(np.mean(self.evaluate([gains])[0]))
+        self.history.append((list(gains), score))
+        _log.info(f"gains {dict(zip(self.gain_names, gains))}: mean IAE {score:.4g}")
+        return score
+
+    def tune(self, x0, maxiter=100, xatol=1e-3, fatol=1e-3):
+        """
+        Search for the gains with the lowest mean IAE, with Nelder-Mead starting from x0.
+        Returns the scipy OptimizeResult.
+        """
+        return minimize(
+            self.score,
+            np.asarray(x0, dtype=float),
+            method="Nelder-Mead",
+            options={"maxiter": maxiter, "xatol": xatol, "fatol": fatol},
+        )
+
+
+if __name__ == "__main__":
+    # Steps up and down in the inlet flow just after t=10
+    # (the inputs at the end of each time element apply over the whole element)
+    rows = []
+    for s, flow in enumerate([150, 180, 220, 250]):
+        for t, value in [(0, 200), (10, 200), (10.001, flow), (60, flow)]:
+            rows.append({"scenario": s, "time": t, "fs.tank.inlet.flow_mol": value})
+    table = pd.DataFrame(rows)
+
+    with GainTuner(table) as tuner:
+        result = tuner.tune([-0.5, -0.05])
+    print(dict(zip(tuner.gain_names, result.x)), result.fun)
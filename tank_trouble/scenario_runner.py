@@ -0,0 +1,223 @@
+"""
+Runs many boundary condition scenarios through the same dynamic tank model, in parallel.
+
+Each worker process builds and initialises the model template once (ModelTemplate), and
+then for each scenario: resets the model to the initialised template values, fixes the
+boundary condition time series from the scenario, solves, and returns the output
+trajectories. pid_tuning.py uses the same worker template.
+
+Scenarios are given as a table (a pandas DataFrame) in long format, with a "scenario"
+column, a "time" column, and a column for each boundary condition, named by the
+component path in the model, e.g:
+
+    scenario  time  fs.tank.inlet.flow_mol  fs.valve.valve_opening
+    0         0     200                     0.5
+    0         30    250                     0.5
+    1         0     200                     0.5
+    1         30    200                     0.3
+
+The values are interpolated onto the time points of the model.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import math
+
+import numpy as np
+import pandas as pd
+import pyomo.environ as pyo
+from pyomo.network import Arc
+from pyomo.opt import TerminationCondition
+from idaes.core import FlowsheetBlock
+from idaes.core.solvers import get_solver
+from idaes.core.util.initialization import propagate_state
+from idaes.core.util.model_statistics import degrees_of_freedom
+from idaes.models.properties import iapws95
+from idaes.models_extra.power_generation.unit_models.helm import HelmValve as WaterValve
+import idaes.core.util.scaling as iscale
+import idaes.logger as idaeslog
+
+from custom_tank import DynamicTank
+from time_slicing import initialize_by_element
+
+_log = idaeslog.getLogger(__name__)
+
+DEFAULT_OUTPUTS = ["fs.tank.tank_level", "fs.tank_temperature"]
+
+
+def build_tank_model(horizon=60, nfe=30):
+    """
+    Tank draining through a valve, starting from steady state.
+    The boundary conditions are the tank inlet flow_mol, pressure and enth_mol, and the valve_opening.
+    """
+    m = pyo.ConcreteModel()
+    m.fs = FlowsheetBlock(dynamic=True, time_set=[0, horizon], time_units=pyo.units.s)
+    m.fs.prop_water = iapws95.Iapws95ParameterBlock()
+
+    m.fs.tank = DynamicTank(
+        tank_type="rectangular_tank", has_holdup=True, property_package=m.fs.prop_water,
+        has_heat_transfer=True, dynamic=True, steady_initial_state=True
+    )
+    m.fs.valve = WaterValve(
+        dynamic=False, has_holdup=False, phase="Liq", property_package=m.fs.prop_water
+    )
+    m.fs.tank_valve = Arc(source=m.fs.tank.outlet, destination=m.fs.valve.inlet)
+
+    m.discretizer = pyo.TransformationFactory("dae.finite_difference")
+    m.discretizer.apply_to(m, nfe=nfe, wrt=m.fs.time, scheme="BACKWARD")
+    pyo.TransformationFactory("network.expand_arcs").apply_to(m)
+
+    m.fs.tank_temperature = pyo.Reference(m.fs.tank.control_volume.properties_out[:].temperature)
+
+    m.fs.tank.inlet.flow_mol.fix(200)
+    m.fs.tank.inlet.pressure.fix(200000)
+    m.fs.tank.inlet.enth_mol.fix(3700.36)
+    m.fs.tank.tank_width.fix(0.4)
+    m.fs.tank.tank_length.fix(0.4)
+    m.fs.tank.heat_duty.fix(0)
+
+    # Sized so the steady state level is 1 m with the valve half open (the tank adds rho*g*level to the pressure)
+    m.fs.valve.Cv.fix(200 / math.sqrt(200000 - 100000 + 1000 * 9.81 * 1.0) / 0.5)
+    m.fs.valve.valve_opening.fix(0.5)
+    m.fs.valve.outlet.pressure.fix(100000)
+
+    iscale.calculate_scaling_factors(m)
+    assert degrees_of_freedom(m.fs) == 0, "Degrees of freedom is not zero, check model setup."
+
+    m.fs.tank.initialize()
+    propagate_state(m.fs.tank_valve)
+    m.fs.valve.initialize()
+    initialize_by_element(m.fs)
+    return m
+
+
+def scenarios_from_table(table, time_points):
+    """
+    Turn a long format scenario table into a list of dicts of component name -> values at time_points.
+    """
+    scenarios = []
+    for _, group in table.groupby("scenario", sort=True):
+        group = group.sort_values("time")
+        scenarios.append({
+            name: np.interp(time_points, group["time"].to_numpy(), group[name].to_numpy())
+            for name in group.columns if name not in ("scenario", "time")
+        })
+    return scenarios
+
+
+class ModelTemplate:
+    """
+    A model built and initialised once, which is reset to its initialised values before each
+    scenario, with the scenario's boundary conditions fixed on it.
+    """
+
+    def __init__(self, build_model, build_kwargs=None):
+        self.model = build_model(**(build_kwargs or {}))
+        self.time = list(self.model.fs.time)
+        self._values = [(v, v.value) for v in self.model.component_data_objects(pyo.Var, descend_into=True)]
+
+    def reset(self, scenario):
+        """
+        Reset the values to the initialised ones, fix the boundary condition time series of a
+        scenario (component name -> values at the time points), and return the model.
+        """
+        m = self.model
+        for v, value in self._values:
+            v.set_value(value, skip_validation=True)
+        for name, values in scenario.items():
+            var = m.find_component(name)
+            for t, value in zip(self.time, values):
+                var[t].fix(float(value))
+        return m
+
+
+# Each worker process builds its own model template in this
+_template = None
+
+
+def init_worker(build_model, build_kwargs):
+    """
+    Process pool initializer that builds the worker's model template, see worker_template().
+    """
+    global _template
+    _template = ModelTemplate(build_model, build_kwargs)
+
+
+def worker_template():
+    return _template
+
+
+def worker_time_points():
+    # The template is only built in the workers, so the pool asks one of them for the time points
+    return np.array(_template.time)
+
+
+def _simulate(scenario, outputs):
+    m = _template.reset(scenario)
+    time = _template.time
+
+    # A scenario that fails (IPOPT not converging, crashing, or the property functions
+    # failing to evaluate) is recorded as not converged, instead of failing the whole run
+    trajectories = np.full((len(outputs), len(time)), np.nan)
+    try:
+        result = get_solver().solve(m, load_solutions=False)
+    except Exception as e:
+        _log.warning(f"Scenario failed to solve: {e}")
+        return trajectories, False
+    ok = result.solver.termination_condition == TerminationCondition.optimal
+    if ok:
+        m.solutions.load_from(result)
+        trajectories = np.array([[pyo.value(m.find_component(name)[t]) for t in time] for name in outputs])
+    return trajectories, ok
+
+
+def run_scenarios(table, build_model=build_tank_model, build_kwargs=None, outputs=DEFAULT_OUTPUTS, max_workers=None):
+    """
+    Simulate every scenario in the table, in a process pool.
+
+    Args:
+        table: long format scenario DataFrame (see module docstring)
+        build_model: function that builds and initialises the model template
+        build_kwargs: keyword arguments for build_model
+        outputs: names of the time indexed components to collect
+        max_workers: number of worker processes (default: number of CPUs)
+
+    Returns:
+        (trajectories, converged): trajectories is an array of shape
+        (n_scenarios, n_outputs, n_time_points), with NaN for scenarios that didn't
+        converge. converged is a list of bools, one per scenario.
+    """
+    build_kwargs = build_kwargs or {}
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=init_worker,
+        initargs=(build_model, build_kwargs),
+    ) as pool:
+        time_points = pool.submit(worker_time_points).result()
+        scenarios = scenarios_from_table(table, time_points)
+        results = list(pool.map(_simulate, scenarios, [list(outputs)] * len(scenarios)))
+
+    trajectories = np.stack([r[0] for r in results])
+    converged = [r[1] for r in results]
+    _log.info(f"{sum(converged)} of {len(converged)} scenarios converged")
+    return trajectories, converged
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(1234)
+    rows = []
+    for s in range(100):
+        step_time = rng.uniform(5, 50)
+        flow = rng.uniform(150, 250)
+        opening = rng.uniform(0.3, 0.7)
+        for t in [0, step_time, step_time + 1e-3, 60]:
+            after = t > step_time
+            rows.append({
+                "scenario": s,
+                "time": t,
+                "fs.tank.inlet.flow_mol": flow if after else 200,
+                "fs.valve.valve_opening": opening if after else 0.5,
+            })
+    table = pd.DataFrame(rows)
+
+    trajectories, converged = run_scenarios(table)
+    print(trajectories.shape)
+    print("final levels:", trajectories[:, 0, -1])
@@ -34,6 +34,15 @@ from idaes.models.properties.general_helmholtz import helmholtz_available
 from matplotlib import pyplot as plt
 import math
 import CoolProp.CoolProp as CoolProp  
+import os
+import sys
+from time_slicing import initialize_by_element
+
+# autoscaling.py, time_report.py and property_cache.py are in the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from autoscaling import autoscale, USER_SCALING_OPTIONS
+from time_report import report_frame
+from property_cache import props_si
 
 
 
@@ -47,6 +56,10 @@ def set_scaling_factors(m):
     Returns:
         None
     """
+    # The default scaling from the property packages and unit models is set before
+    # initialising (calculate_scaling_factors below), this fills in anything it didn't
+    # set from the values in the initialised model.
+    autoscale(m)
 
 
 m = pyo.ConcreteModel(name="Testing PID controller model")
@@ -121,13 +134,13 @@ m.fs.valve.valve_opening[:].fix(0.5)
 m.fs.tee.inlet.flow_mol[:].fix(270)
 m.fs.tee.inlet.flow_mol[:].unfix()
 m.fs.tee.inlet.pressure[:].fix(2*100*1000)
-m.fs.tee.inlet.enth_mol[:].fix(CoolProp.PropsSI('HMOLAR', 'T', 70+273.15, "P", 3*100*1000, "Water"))
+m.fs.tee.inlet.enth_mol[:].fix(props_si('HMOLAR', 'T', 70+273.15, "P", 3*100*1000, "Water"))
 
 m.fs.cooler.area.fix(1)
 m.fs.cooler.overall_heat_transfer_coefficient[:].fix(14.6*1000)
 m.fs.cooler.tube_inlet.pressure[:].fix(1*100*1000)
 m.fs.cooler.tube_inlet.flow_mol[:].fix(1000)
-m.fs.cooler.tube_inlet.enth_mol[:].fix(CoolProp.PropsSI('HMOLAR', 'T', 20+273.15, "P", 1*100*1000, "Water"))
+m.fs.cooler.tube_inlet.enth_mol[:].fix(props_si('HMOLAR', 'T', 20+273.15, "P", 1*100*1000, "Water"))
 
 m.fs.tank.tank_diameter.fix(0.4) #m
 m.fs.tank.tank_level[:].fix(0.5)
@@ -161,23 +174,18 @@ iscale.calculate_scaling_factors(m)
 
 print('DoF:', degrees_of_freedom(m.fs))  
 
-m.fs.tee.initialize()
-m.fs.valve.initialize()
-m.fs.valvepipe.initialize()
-m.fs.cooler.initialize()
-m.fs.tank.initialize()
-m.fs.pump.initialize()
+# Solve the horizon a finite element at a time, rather than initialising each unit over the
+# whole horizon
+initialize_by_element(m.fs, solve_full=False)
+
+set_scaling_factors(m)
     
 #m.fs.visualize("My Flowsheet", loop_forever = True)
 
-solver = get_solver()
+solver = get_solver(options=USER_SCALING_OPTIONS)
 
 solver.solve(m, tee=True)
 
-for t in m.fs.time:
-    print (m.fs.tank.report(t))
-    print(value(m.fs.tank.tank_level[t]))
-    #m.fs.cooler.report(t)
-    m.fs.pump.report(t)
+print(report_frame([m.fs.tank, m.fs.tank.tank_level, m.fs.pump]))
 
 #m.fs.visualize("My Flowsheet", loop_forever = True)
\ No newline at end of file
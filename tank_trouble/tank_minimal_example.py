@@ -33,6 +33,13 @@ from idaes.models.properties.general_helmholtz import helmholtz_available
 from matplotlib import pyplot as plt
 import math
 import CoolProp.CoolProp as CoolProp  
+from time_slicing import initialize_by_element
+import os
+import sys
+
+# time_report.py is in the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from time_report import report_frame
 
 m = pyo.ConcreteModel(name="Testing Tank model")
 m.fs = FlowsheetBlock(
@@ -68,14 +75,14 @@ iscale.calculate_scaling_factors(m)
 print('DoF:', degrees_of_freedom(m.fs))  
 assert degrees_of_freedom(m.fs) == 0, "Degrees of freedom is not zero, check model setup."
 
-m.fs.tank.initialize()
+# Initialise the property blocks, then solve the horizon a finite element at a time
+m.fs.tank.control_volume.initialize()
+initialize_by_element(m.fs.tank, solve_full=False)
 
 solver = get_solver()
 
 solver.solve(m, tee=True)
 
-for t in m.fs.time:
-    print (m.fs.tank.report(t))
-    print(value(m.fs.tank.tank_level[t]))
+print(report_frame([m.fs.tank, m.fs.tank.tank_level]))
 
 #m.fs.visualize("My Flowsheet", loop_forever = True)
\ No newline at end of file
@@ -36,6 +36,13 @@ import math
 import CoolProp.CoolProp as CoolProp  
 from property_packages.build_package import build_package
 from custom_tank import DynamicTank
+import os
+import sys
+
+# time_report.py and structural_diagnostics.py are in the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from time_report import report_frame
+from structural_diagnostics import StructuralDiagnostics
 
 m = pyo.ConcreteModel(name="Testing Tank model")
 m.fs = FlowsheetBlock(
@@ -45,7 +52,7 @@ m.fs.prop_water = build_package("helmholtz",["water"],["Liq","Vap"])
 
 m.fs.tank = DynamicTank(
     tank_type="rectangular_tank", has_holdup=True, property_package=m.fs.prop_water,
-    has_heat_transfer=True, dynamic=True
+    has_heat_transfer=True, dynamic=True, steady_initial_state=True
 )
 
 m.discretizer = pyo.TransformationFactory("dae.finite_difference")
@@ -72,28 +79,14 @@ m.fs.tank.tank_level.fix(0.5)
 #m.fs.tank.control_volume.material_accumulation[0,:,:].fix(0)
 #m.fs.tank.control_volume.energy_accumulation[0,:].fix(0)
 
-@m.fs.tank.Constraint()
-def initial_material_accumulation_liq(b):
-    return b.control_volume.material_accumulation[0, "Liq", "water"] == 0
-
-@m.fs.tank.Constraint()
-def initial_material_accumulation_vap(b):
-    return b.control_volume.material_accumulation[0, "Vap", "water"] == 0
-
-@m.fs.tank.Constraint()
-def initial_energy_accumulation_liq(b):
-    return b.control_volume.energy_accumulation[0, "Liq"] == 0
-
-@m.fs.tank.Constraint()
-def initial_energy_accumulation_vap(b):
-    return b.control_volume.energy_accumulation[0, "Vap"] == 0
-
 iscale.calculate_scaling_factors(m)
 
 print('DoF:', degrees_of_freedom(m.fs))  
 #assert degrees_of_freedom(m.fs) == 0, "Degrees of freedom is not zero, check model setup."
 
 m.fs.tank.initialize()
+# Solve t=0 on its own at steady state, and start the later time points from there
+m.fs.tank.solve_initial_state()
 
 
 
@@ -102,13 +95,15 @@ assert degrees_of_freedom(m.fs) == 0, "Degrees of freedom is not zero, check mod
 #m.fs.visualize("My Flowsheet", loop_forever = True)
 
 
-dt = DiagnosticsToolbox(m)
-dt.report_structural_issues()
+# The incidence graph is cached, so re-running these after fixing/unfixing things is quick
+sd = StructuralDiagnostics(m)
+sd.report_structural_issues()
 
 
 
-dt.display_overconstrained_set()
-dt.display_underconstrained_set()
+sd.display_overconstrained_set()
+sd.display_underconstrained_set()
+dt = DiagnosticsToolbox(m)
 dt.display_potential_evaluation_errors()
 
 
@@ -116,8 +111,6 @@ dt.display_potential_evaluation_errors()
 
 solver.solve(m, tee=True)
 
-for t in m.fs.time:
-    print (m.fs.tank.report(t))
-    print(value(m.fs.tank.tank_level[t]))
+print(report_frame([m.fs.tank, m.fs.tank.tank_level]))
 
 # #m.fs.visualize("My Flowsheet", loop_forever = True)
\ No newline at end of file
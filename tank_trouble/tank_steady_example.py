@@ -34,6 +34,12 @@ from matplotlib import pyplot as plt
 import math
 import CoolProp.CoolProp as CoolProp  
 from property_packages.build_package import build_package
+import os
+import sys
+
+# time_report.py is in the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from time_report import report_frame
 m = pyo.ConcreteModel(name="Testing Tank model")
 m.fs = FlowsheetBlock(
             dynamic=False, time_set=[0], time_units=pyo.units.s
@@ -71,8 +77,6 @@ solver = get_solver()
 
 solver.solve(m, tee=True)
 
-for t in m.fs.time:
-    print (m.fs.tank.report(t))
-    print(value(m.fs.tank.tank_level[t]))
+print(report_frame([m.fs.tank, m.fs.tank.tank_level]))
 
 #m.fs.visualize("My Flowsheet", loop_forever = True)
\ No newline at end of file
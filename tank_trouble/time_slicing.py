@@ -0,0 +1,146 @@
+"""
+Helpers for solving discretised dynamic models one part of the time horizon at a time.
+
+pyomo.dae.flatten gives us every time indexed var and constraint as a Reference indexed
+by time. From those we index the var and constraint data by time point once, and then
+each slice is solved as a temporary block that only references the constraints at the
+time points in that slice. Vars from earlier time points are fixed while the slice is
+solved, so each solve only costs as much as the slice, not the whole horizon.
+
+This assumes the discretisation only looks backwards in time (BACKWARD finite difference,
+or collocation), which is what all the examples in this repo use.
+"""
+from pyomo.environ import Block, Var, Constraint, Reference
+from pyomo.dae.flatten import flatten_dae_components
+from idaes.core.solvers import get_solver
+import idaes.logger as idaeslog
+
+_log = idaeslog.getLogger(__name__)
+
+
+class _TimeSlices:
+    """
+    The var and constraint data of a block, grouped by time point.
+    """
+
+    def __init__(self, blk, time):
+        # DerivativeVars are Vars, so they are included in time_vars
+        scalar_vars, time_vars = flatten_dae_components(blk, time, Var)
+        scalar_cons, time_cons = flatten_dae_components(blk, time, Constraint, active=True)
+
+        self.time = time
+        # The scalar components come back as the var and constraint data themselves
+        self.scalar_vars = list(scalar_vars)
+        self.scalar_cons = [cd for cd in scalar_cons if cd.active]
+        self.vars_at = {t: [] for t in time}
+        self.cons_at = {t: [] for t in time}
+        for v in time_vars:
+            for t, vd in v.items():
+                self.vars_at[t].append(vd)
+        for c in time_cons:
+            for t, cd in c.items():
+                if cd.active:
+                    self.cons_at[t].append(cd)
+
+    def solve(self, solver, points, hold=(), include_scalars=False, tee=False):
+        """
+        Solve the constraints at points. The vars at the time points in hold (and the
+        scalar vars, unless include_scalars) are fixed during the solve.
+        """
+        cons = [cd for t in points for cd in self.cons_at[t]]
+        fixed = []
+        held = [vd for t in hold for vd in self.vars_at[t]]
+        if include_scalars:
+            cons.extend(self.scalar_cons)
+        else:
+            held.extend(self.scalar_vars)
+        for vd in held:
+            if not vd.fixed:
+                vd.fix()
+                fixed.append(vd)
+
+        tmp = Block(concrete=True)
+        tmp.cons = Reference(cons)
+        try:
+            result = solver.solve(tmp, tee=tee)
+        finally:
+            for vd in fixed:
+                vd.unfix()
+        return result
+
+    def copy_forward(self, t_source, targets):
+        """
+        Copy the values at t_source to the time points in targets, as an initial guess.
+        """
+        source = [vd.value for vd in self.vars_at[t_source]]
+        for t in targets:
+            for vd, value in zip(self.vars_at[t], source):
+                if not vd.fixed:
+                    vd.set_value(value)
+
+
+def solve_initial_slice(blk, time=None, solver=None, optarg=None, tee=False):
+    """
+    Solves the first time point of a discretised model on its own, then copies the
+    solution to all the later time points as an initial guess.
+
+    With a steady initial state (see add_initial_dynamics.fix_steady_initial_state) the
+    first time point is a small steady state problem, and the dynamic solve then starts
+    from a consistent point instead of whatever initialize left in the later time points.
+    """
+    if time is None:
+        time = blk.flowsheet().time
+    if solver is None:
+        solver = get_solver(options=optarg)
+    t0 = time.first()
+
+    slices = _TimeSlices(blk, time)
+    result = slices.solve(solver, [t0], include_scalars=True, tee=tee)
+    slices.copy_forward(t0, [t for t in time if t != t0])
+    return result
+
+
+def initialize_by_element(blk, time=None, solver=None, optarg=None, tee=False, solve_full=True):
+    """
+    Initialise a discretised model one finite element at a time.
+
+    The first time point is solved first (along with everything that isn't time indexed),
+    then each finite element is solved with the previous element fixed, starting from the
+    solution of the previous element. Each solve is small, so this scales linearly with the
+    number of elements, and each element starts from a good guess so it rarely diverges.
+    For collocation, all the points in an element are solved together.
+
+    Finally the full horizon is solved from that starting point, unless solve_full=False.
+
+    Returns the result of the full horizon solve (or of the last element if solve_full=False).
+    """
+    if time is None:
+        time = blk.flowsheet().time
+    if solver is None:
+        solver = get_solver(options=optarg)
+
+    slices = _TimeSlices(blk, time)
+    t0 = time.first()
+    result = slices.solve(solver, [t0], include_scalars=True, tee=tee)
+
+    # Group the time points into finite elements, (t_i, t_i+1] for each element boundary
+    points = list(time)
+    boundaries = list(time.get_finite_elements())
+    elements = []
+    i = 1
+    for upper in boundaries[1:]:
+        start = i
+        while i < len(points) and points[i] <= upper:
+            i += 1
+        elements.append(points[start:i])
+
+    previous = t0
+    for n, element in enumerate(elements):
+        slices.copy_forward(previous, element)
+        result = slices.solve(solver, element, hold=[previous], tee=tee)
+        _log.info(f"Initialised element {n + 1} of {len(elements)}, ending at t={element[-1]}")
+        previous = element[-1]
+
+    if solve_full:
+        result = solver.solve(blk, tee=tee)
+    return result
@@ -0,0 +1,177 @@
+"""
+Name -> variable index for binding the frontend to a dynamic model.
+
+Looking up a variable by its name (e.g "fs.tank.tank_level") with find_component or getattr
+chains walks the component tree every time, which adds up when a request sets or reads
+thousands of time indexed values. VariableRegistry walks the model once, and keeps the
+variable data of every time indexed variable in time order, so a whole time series can be
+read or written as an array:
+
+    registry = VariableRegistry(m)
+    registry.set_series("fs.tank.inlet.flow_mol", flows, fix=True)
+    levels = registry.get_series("fs.tank.tank_level")
+
+Time indexed variables are named without their time index, so
+fs.tank.control_volume.material_holdup[t, Liq, h2o] is "fs.tank.control_volume.material_holdup[Liq,h2o]".
+References indexed by time (e.g port members like fs.tank.inlet.flow_mol) are registered under
+their own name too. Anything else (e.g fs.tank.initial_material_holdup[Liq,h2o] from
+add_initial_dynamics) is looked up the first time it is used and then cached.
+
+The registry needs rebuilding if variables are added to the model.
+"""
+import numpy as np
+from pyomo.environ import Var
+from pyomo.core.base.componentuid import ComponentUID
+from pyomo.dae.flatten import flatten_dae_components
+from idaes.core.util.exceptions import ConfigurationError
+
+
+def _series_name(cuid):
+    # Drop the time index (the "*" in the slice) from the name
+    name = str(cuid)
+    return name.replace("[*]", "").replace("[*,", "[").replace(",*]", "]").replace(",*,", ",")
+
+
+class VariableRegistry:
+    """
+    Precompiled name -> variable index for a model. See the module docstring.
+    """
+
+    def __init__(self, m, time=None):
+        self.model = m
+        self.time = m.fs.time if time is None else time
+        self.time_points = np.array(list(self.time), dtype=float)
+
+        # name -> list of the variable data at each time point
+        self._series = {}
+        # name -> variable data, for everything that isn't a time series
+        self._scalars = {}
+
+        scalar_vars, time_vars = flatten_dae_components(m, self.time, Var)
+        for v in scalar_vars:
+            self._scalars[v.getname(fully_qualified=True, relative_to=m)] = v
+        first_data = {}
+        for ref in time_vars:
+            name = _series_name(ComponentUID(ref.referent, context=m))
+            data = [ref[t] for t in self.time]
+            self._series[name] = data
+            first_data[id(data[0])] = name
+
+        # Time indexed References on the model (port members, the outlet temperature references
+        # etc.) get their own names, pointing at the same data
+        t0 = self.time.first()
+        for ref in m.component_objects(Var, descend_into=True):
+            if not ref.is_reference() or not ref.is_indexed():
+                continue
+            ref_name = ref.getname(fully_qualified=True, relative_to=m)
+            for index in ref.index_set():
+                if not isinstance(index, tuple):
+                    index = (index,)
+                if index[0] != t0:
+                    continue
+                target = first_data.get(id(ref[index]))
+                if target is None:
+                    continue
+                rest = index[1:]
+                alias = f"{ref_name}[{','.join(str(i) for i in rest)}]" if rest else ref_name
+                self._series.setdefault(alias, self._series[target])
+
+    @property
+    def names(self):
+        """
+        Names of the registered time series.
+        """
+        return list(self._series)
+
+    def _data(self, name):
+        try:
+            return self._series[name]
+        except KeyError:
+            raise ConfigurationError(f"{name} is not a time indexed variable in {self.model.name}")
+
+    def _scalar(self, name):
+        v = self._scalars.get(name)
+        if v is None:
+            v = self.model.find_component(name)
+            if v is None:
+                raise ConfigurationError(f"Could not find {name} in {self.model.name}")
+            self._scalars[name] = v
+        return v
+
+    def get_series(self, names):
+        """
+        Values of time series at every time point. A single name gives an array of
+        len(time), a list of names gives an array of shape (len(names), len(time)).
+        Unset values are NaN.
+        """
+        if isinstance(names, str):
+            data = self._data(names)
+            return np.fromiter((np.nan if v.value is None else v.value for v in data), dtype=float, count=len(data))
+        return np.vstack([self.get_series(name) for name in names]) if names else np.empty((0, len(self.time_points)))
+
+    def set_series(self, names, values, fix=False, mask=None):
+        """
+        Set time series from an array of shape (len(time),) for a single name,
+        or (len(names), len(time)) for a list of names.
+
+        Args:
+            fix: also fix the variables
+            mask: boolean array of the time points to set (and fix), e.g only the
+                  time points where there is live data.
+        """
+        if isinstance(names, str):
+            names, values = [names], [values]
+        values = np.asarray(values, dtype=float)
+        for name, row in zip(names, np.atleast_2d(values)):
+            data = self._data(name)
+            if len(row) != len(data):
+                raise ConfigurationError(f"{name} has {len(data)} time points, but {len(row)} values were given")
+            for i, (v, value) in enumerate(zip(data, row)):
+                if mask is not None and not mask[i]:
+                    continue
+                if fix:
+                    v.fix(float(value))
+                else:
+                    v.set_value(float(value), skip_validation=True)
+
+    def fix_series(self, names, mask=None):
+        """
+        Fix time series at their current values, at all time points or where mask is True.
+        """
+        for name in [names] if isinstance(names, str) else names:
+            for i, v in enumerate(self._data(name)):
+                if mask is None or mask[i]:
+                    v.fix()
+
+    def unfix_series(self, names, mask=None):
+        """
+        Unfix time series, at all time points or where mask is True.
+        """
+        for name in [names] if isinstance(names, str) else names:
+            for i, v in enumerate(self._data(name)):
+                if mask is None or mask[i]:
+                    v.unfix()
+
+    def fixed_mask(self, name):
+        """
+        Boolean array of which time points of a time series are fixed.
+        """
+        data = self._data(name)
+        return np.fromiter((v.fixed for v in data), dtype=bool, count=len(data))
+
+    def get_values(self, names):
+        """
+        Values of variables that aren't time series (e.g fs.tank.tank_width), as an array.
+        """
+        return np.array([np.nan if self._scalar(n).value is None else self._scalar(n).value for n in names], dtype=float)
+
+    def set_values(self, names, values, fix=False):
+        """
+        Set variables that aren't time series (e.g fs.tank.initial_material_holdup[Liq,h2o]).
+        """
+        for name, value in zip(names, values):
+            v = self._scalar(name)
+            if fix:
+                v.fix(float(value))
+            else:
+                v.set_value(float(value), skip_validation=True)
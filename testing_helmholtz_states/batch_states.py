@@ -0,0 +1,123 @@
+"""
+Skew continuation for many Helmholtz PH states at once.
+
+solve_skew_continuation solves one state at a time, so a stream table with hundreds of streams
+takes hundreds of continuations. The states don't depend on each other, so this puts them in
+one indexed state block and runs continuation.skew_continuation on all of them, with an indexed
+spec and skewed pressure constraint,
+
+    pressure[i] == p_target[i] + scale[i] * (enth_mol[i] - bias[i])
+
+Each continuation step is then a single solve for all the streams. Streams whose pressure is
+already at its target have their skew switched off (scale = 0), so they are just the original
+problem from then on. If a step fails even at the smallest step size, the streams that aren't
+done are finished off one at a time with solve_skew_continuation.
+
+    build_states(m.fs, "streams", m.fs.properties, len(cases))
+    report = solve_states(m.fs.streams, cases)
+    print(report)
+"""
+import numpy as np
+import pandas as pd
+from pyomo.environ import value
+from idaes.core.solvers import get_solver
+import idaes.logger as idaeslog
+
+from continuation import pressure_target, skew_continuation, solve_skew_continuation
+
+_log = idaeslog.getLogger(__name__)
+
+
+def build_states(blk, name, params, n, flow_mol=1, enth_mol=None):
+    """
+    Add an indexed state block over streams 0..n-1 to blk as blk.<name>, with the flows fixed
+    and (optionally) an initial enthalpy guess. Returns the state block.
+    """
+    blk.add_component(name, params.build_state_block(range(n), defined_state=True))
+    states = blk.component(name)
+    for i in states:
+        states[i].flow_mol.fix(flow_mol)
+        if enth_mol is not None:
+            states[i].enth_mol.set_value(enth_mol)
+    return states
+
+
+def solve_states(
+    states,
+    specs,
+    solver=None,
+    optarg=None,
+    initial_scale=1.0,
+    initial_step=0.25,
+    min_step=1e-3,
+    max_step=1.0,
+    max_solves=30,
+    ptol=1e-6,
+    fallback=True,
+):
+    """
+    Solve every state of an indexed Helmholtz PH state block for its specs, by skew continuation
+    on all of them together.
+
+    Args:
+        states: indexed state block (see build_states)
+        specs: dict (or list, for an index of 0..n-1) of spec dicts for each state,
+               see continuation.solve_skew_continuation
+        solver, optarg, initial_scale, initial_step, min_step, max_step, max_solves, ptol:
+            as for continuation.solve_skew_continuation. max_solves is for the batch.
+        fallback: solve the streams that don't converge in the batch one at a time
+
+    Returns:
+        DataFrame indexed by stream, with whether each one converged, how (batch or
+        individual), the number of solves it took part in, its pressure, enthalpy,
+        temperature and vapour fraction, and its relative pressure error.
+        The states are left at the solution (or the last good point), with their pressure and
+        enth_mol fixed/unfixed as they were.
+    """
+    if solver is None:
+        solver = get_solver(options=optarg)
+    if not isinstance(specs, dict):
+        specs = dict(enumerate(specs))
+    index = list(states)
+    if set(specs) != set(index):
+        raise KeyError(f"Specs are needed for every stream, missing {set(index) - set(specs)}")
+
+    targets = {i: pressure_target(states[i], specs[i]) for i in index}
+    p_target = np.array([targets[i][0] for i in index])
+
+    converged, solves, _, message = skew_continuation(
+        states, targets, solver, initial_scale=initial_scale, initial_step=initial_step,
+        min_step=min_step, max_step=max_step, max_solves=max_solves, ptol=ptol,
+    )
+    if not converged.all():
+        _log.warning(f"Batch continuation: {message}")
+    method = np.array(["batch"] * len(index), dtype=object)
+    if fallback and not converged.all():
+        for k, i in enumerate(index):
+            if converged[k]:
+                continue
+            result = solve_skew_continuation(
+                states[i], specs[i], solver=solver, initial_scale=initial_scale,
+                initial_step=initial_step, min_step=min_step, max_step=max_step,
+                max_solves=max_solves, ptol=ptol,
+            )
+            converged[k] = result.converged
+            solves[k] += result.solves
+            method[k] = "individual"
+
+    p = np.array([value(states[i].pressure) for i in index])
+    h = np.array([value(states[i].enth_mol) for i in index])
+    _log.info(f"{int(converged.sum())} of {len(index)} states converged, {int(solves.max())} solves")
+    return pd.DataFrame(
+        {
+            "converged": converged,
+            "method": method,
+            "solves": solves,
+            "pressure": p,
+            "enth_mol": h,
+            "temperature": [value(states[i].temperature) for i in index],
+            "vapor_frac": [value(states[i].vapor_frac) for i in index],
+            "pressure_error": np.abs(p - p_target) / np.abs(p_target),
+        },
+        index=pd.Index(index, name="stream"),
+    )
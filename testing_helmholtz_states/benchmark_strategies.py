@@ -0,0 +1,287 @@
+"""
+Compares the ways of specifying a Helmholtz PH state by temperature/vapour fraction in this folder.
+
+Each strategy is run on a grid of specs: pressure + temperature (from 50 K subcooled to 50 K
+superheated, including within 0.5 K of saturation), pressure + vapour fraction, and
+temperature + vapour fraction. Every case starts from the same guess (pressure = 101325 and
+enth_mol = 60000, as in the test scripts), so no strategy starts at the answer. A case succeeds
+if the solve doesn't fail and the state matches the specs.
+
+Strategies:
+    plain         pressure fixed, constraint on the temperature/vapour fraction (expressions.py)
+    htpx          enth_mol constrained to htpx(p, T) or htpx(p, x) (heat_cascade_test.py)
+    skew          one solve with the pressure skewed by enthalpy, with a free bias (first_test_solving_skew.py)
+    skew_iterative  re-solve with a growing skew, moving the bias to the last enthalpy (test_iterative_solving_temp.py)
+    continuation  solve_skew_continuation (continuation.py)
+    flash         HelmholtzFlash, no solve (flash.py)
+
+T + x specs are given to plain as they are. The other strategies that need a pressure use p_sat(T).
+
+Run from this folder:
+    python benchmark_strategies.py
+"""
+import re
+import time as timer
+
+import numpy as np
+import pandas as pd
+from pyomo.environ import Block, ConcreteModel, Constraint, Param, Var, Objective, value, check_optimal_termination
+from pyomo.common.tee import capture_output
+from idaes.core import FlowsheetBlock
+from idaes.core.solvers import get_solver
+from idaes.models.properties.general_helmholtz import (
+    HelmholtzParameterBlock,
+    HelmholtzThermoExpressions,
+    PhaseType,
+    StateVars,
+    AmountBasis,
+)
+
+import os
+import sys
+
+# property_cache.py is in the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from property_cache import htpx
+from continuation import solve_skew_continuation
+from flash import get_flash
+
+P_GUESS = 101325
+H_GUESS = 60000
+# Tolerances for checking a state against its specs
+PTOL = 1e-6
+TTOL = 1e-3
+XTOL = 1e-4
+
+
+class CountingSolver:
+    """
+    Wraps a solver to add up IPOPT iterations over all the solves in a case.
+    """
+
+    def __init__(self, solver=None):
+        self.solver = solver if solver is not None else get_solver()
+        self.iterations = 0
+        self.solves = 0
+
+    def reset(self):
+        self.iterations = 0
+        self.solves = 0
+
+    def solve(self, blk, **kwargs):
+        kwargs["tee"] = True
+        with capture_output() as output:
+            result = self.solver.solve(blk, **kwargs)
+        match = re.search(r"Number of Iterations\.+:\s*(\d+)", output.getvalue())
+        self.iterations += int(match.group(1)) if match else 0
+        self.solves += 1
+        return result
+
+
+def build_model():
+    m = ConcreteModel()
+    m.fs = FlowsheetBlock(dynamic=False)
+    m.fs.properties = HelmholtzParameterBlock(
+        pure_component="h2o",
+        phase_presentation=PhaseType.MIX,
+        amount_basis=AmountBasis.MOLE,
+        state_vars=StateVars.PH,
+    )
+    m.fs.sb = m.fs.properties.build_state_block([0], defined_state=True)
+    m.fs.sb[0].flow_mol.fix(1)
+    return m
+
+
+def make_cases(pressures=None, superheat=(-50, -5, -0.5, 0.5, 5, 50), vapor_fracs=(0.01, 0.5, 0.99)):
+    """
+    DataFrame of spec cases: kind ("pT", "px" or "Tx"), pressure, temperature and vapor_frac
+    (NaN where not specified), and the expected pressure (p_sat for Tx).
+    """
+    if pressures is None:
+        pressures = np.geomspace(1e4, 5e6, 6)
+    b = Block(concrete=True)
+    b.p = Param(initialize=101325, mutable=True)
+    params = build_model().fs.properties
+    te = HelmholtzThermoExpressions(b, params)
+    T_sat = te.T_sat(b.p)
+
+    rows = []
+    for p in pressures:
+        b.p.set_value(float(p))
+        Ts = value(T_sat)
+        for dT in superheat:
+            rows.append({"kind": "pT", "pressure": p, "temperature": Ts + dT, "vapor_frac": np.nan, "p_expected": p})
+        for x in vapor_fracs:
+            rows.append({"kind": "px", "pressure": p, "temperature": np.nan, "vapor_frac": x, "p_expected": p})
+            rows.append({"kind": "Tx", "pressure": np.nan, "temperature": Ts, "vapor_frac": x, "p_expected": p})
+    return pd.DataFrame(rows)
+
+
+def _specs(case):
+    return {k: case[k] for k in ("pressure", "temperature", "vapor_frac") if not np.isnan(case[k])}
+
+
+def _pressure_target(m, case):
+    if not np.isnan(case["pressure"]):
+        return case["pressure"]
+    te = HelmholtzThermoExpressions(Block(concrete=True), m.fs.properties)
+    return value(te.p_sat(T=case["temperature"]))
+
+
+def _other_spec(sb, case):
+    # The spec that goes with the pressure (vapour fraction if there is one, since T is then implied by p)
+    if not np.isnan(case["vapor_frac"]):
+        return sb.vapor_frac, case["vapor_frac"]
+    return sb.temperature, case["temperature"]
+
+
+def plain(m, case, solver):
+    sb = m.fs.sb[0]
+    specs = _specs(case)
+    if "pressure" in specs:
+        sb.pressure.fix(specs.pop("pressure"))
+    for i, (name, target) in enumerate(specs.items()):
+        m.case.add_component(f"spec_{i}", Constraint(expr=getattr(sb, name) == target))
+    return check_optimal_termination(solver.solve(m))
+
+
+def htpx_spec(m, case, solver):
+    sb = m.fs.sb[0]
+    sb.pressure.fix(_pressure_target(m, case))
+    if np.isnan(case["vapor_frac"]):
+        h = htpx(m.fs.properties, T=case["temperature"], p=sb.pressure)
+    else:
+        h = htpx(m.fs.properties, p=sb.pressure, x=case["vapor_frac"])
+    m.case.enth = Constraint(expr=sb.enth_mol == h)
+    return check_optimal_termination(solver.solve(m))
+
+
+def _add_skew(m, case, scale, bias):
+    # pressure = target + (enth_mol - bias) * -scale, the same form as the test scripts
+    sb = m.fs.sb[0]
+    m.case.bias = Var(initialize=bias)
+    m.case.scale = Param(initialize=scale, mutable=True)
+    m.case.skew = Constraint(expr=sb.pressure == _pressure_target(m, case) + (sb.enth_mol - m.case.bias) * -m.case.scale)
+    var, target = _other_spec(sb, case)
+    m.case.spec = Constraint(expr=var == target)
+
+
+def skew(m, case, solver):
+    # As first_test_solving_skew.py: a slope of -0.001 Pa/(J/mol), and the bias is a free variable
+    _add_skew(m, case, 0.001, 0)
+    return check_optimal_termination(solver.solve(m))
+
+
+def skew_iterative(m, case, solver):
+    # As test_iterative_solving_temp.py: the bias starts at 0 and the scale goes -0.01, -0.02, ...,
+    # so the slope is +0.01 * i, and the bias is moved to the last enthalpy after each solve
+    _add_skew(m, case, -0.01, 0)
+    m.case.bias.fix()
+    ok = True
+    for i in range(1, 10):
+        m.case.scale.set_value(-0.001 * i * 10)
+        ok = check_optimal_termination(solver.solve(m))
+        if not ok:
+            break
+        m.case.bias.fix(value(m.fs.sb[0].enth_mol))
+    return ok
+
+
+def continuation(m, case, solver):
+    return solve_skew_continuation(m.fs.sb[0], _specs(case), solver=solver).converged
+
+
+def flash(m, case, solver):
+    names = {"pressure": "p", "temperature": "T", "vapor_frac": "x"}
+    get_flash(m.fs.properties).set_state(m.fs.sb[0], **{names[k]: v for k, v in _specs(case).items()})
+    return True
+
+
+STRATEGIES = {
+    "plain": plain,
+    "htpx": htpx_spec,
+    "skew": skew,
+    "skew_iterative": skew_iterative,
+    "continuation": continuation,
+    "flash": flash,
+}
+
+
+def _matches(m, case):
+    sb = m.fs.sb[0]
+    ok = abs(value(sb.pressure) - case["p_expected"]) <= PTOL * case["p_expected"]
+    if not np.isnan(case["temperature"]):
+        ok = ok and abs(value(sb.temperature) - case["temperature"]) <= TTOL
+    if not np.isnan(case["vapor_frac"]):
+        ok = ok and abs(value(sb.vapor_frac) - case["vapor_frac"]) <= XTOL
+    return bool(ok)
+
+
+def run_benchmark(cases=None, strategies=None, solver=None):
+    """
+    Run each strategy on each case. Returns a DataFrame with a row per (case, strategy):
+    whether it succeeded, the IPOPT iterations and solves, and the wall time.
+    """
+    if cases is None:
+        cases = make_cases()
+    if strategies is None:
+        strategies = STRATEGIES
+    solver = CountingSolver(solver)
+
+    rows = []
+    for name, strategy in strategies.items():
+        m = build_model()
+        # IPOPT won't run a problem with no free variables, e.g when everything is fixed by a spec
+        m._dummy_var = Var(bounds=(0, 1))
+        m._dummy_obj = Objective(expr=m._dummy_var)
+        sb = m.fs.sb[0]
+        for i, case in cases.iterrows():
+            sb.pressure.unfix()
+            sb.enth_mol.unfix()
+            sb.pressure.set_value(P_GUESS)
+            sb.enth_mol.set_value(H_GUESS)
+            m.case = Block()
+            solver.reset()
+
+            tic = timer.perf_counter()
+            try:
+                ok = strategy(m, case, solver)
+            except Exception:
+                # e.g external function evaluation errors
+                ok = False
+            elapsed = timer.perf_counter() - tic
+
+            rows.append({
+                "case": i,
+                "kind": case["kind"],
+                "strategy": name,
+                "success": bool(ok) and _matches(m, case),
+                "iterations": solver.iterations,
+                "solves": solver.solves,
+                "time": elapsed,
+            })
+            m.del_component(m.case)
+    return pd.DataFrame(rows)
+
+
+def summarise(results):
+    """
+    Success rate, mean IPOPT iterations (of the successful cases) and mean/max wall time per strategy.
+    """
+    ok = results[results.success]
+    return pd.DataFrame({
+        "success_rate": results.groupby("strategy").success.mean(),
+        "mean_iterations": ok.groupby("strategy").iterations.mean(),
+        "mean_time": results.groupby("strategy").time.mean(),
+        "max_time": results.groupby("strategy").time.max(),
+    }).sort_values(["success_rate", "mean_time"], ascending=[False, True])
+
+
+if __name__ == "__main__":
+    cases = make_cases()
+    results = run_benchmark(cases)
+    results.to_csv("benchmark_strategies.csv", index=False)
+    print(f"{len(cases)} cases\n")
+    print(summarise(results))
+    print()
+    print(results.pivot_table(index="strategy", columns="kind", values="success", aggfunc="mean"))
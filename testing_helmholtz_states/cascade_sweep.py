@@ -0,0 +1,192 @@
+"""
+Run many inlet conditions through a flowsheet of chained units (e.g the heaters in heat_cascade_test.py).
+
+heat_cascade_test.py initialises with a new SequentialDecomposition each time, which rebuilds the
+network graph, works out the tear set and the calculation order, and initialises every unit.
+For a sweep over inlet conditions most of that is the same from one point to the next, so
+CascadeSweep keeps it:
+
+- the graph, tear set, calculation order and strongly connected components are worked out once
+- after each converged point, the solution across the tear streams becomes the guess for the
+  next point's first pass
+- a unit is only initialised if its inputs (the fixed variables when it is reached, which
+  includes the inlet values passed from upstream) changed since it was last initialised.
+  Otherwise it is skipped, and its current values are passed downstream.
+
+    sweep = CascadeSweep(m)
+    results = sweep.run(
+        pd.DataFrame({"fs.Heater2.inlet.pressure[0]": [1e4, 2e4, 5e4]}),
+        outputs=["fs.Heater32.heat_duty[0]"],
+    )
+
+The arcs need to be expanded (network.expand_arcs) before making the CascadeSweep.
+"""
+import time as timer
+
+import numpy as np
+import pandas as pd
+from pyomo.environ import Var, value, check_optimal_termination
+from pyomo.network import SequentialDecomposition
+from idaes.core.solvers import get_solver
+import idaes.logger as idaeslog
+
+_log = idaeslog.getLogger(__name__)
+
+
+def init_unit(unit):
+    unit.initialize(outlvl=idaeslog.WARNING)
+
+
+class _CachedDecomposition(SequentialDecomposition):
+    """
+    SequentialDecomposition that keeps its calculation orders and strongly connected components
+    between runs (run() clears the normal cache every time).
+    """
+
+    def __init__(self, **kwds):
+        super().__init__(**kwds)
+        self._persistent = {}
+
+    def calculation_order(self, G, roots=None, nodes=None):
+        key = ("order", None if roots is None else tuple(id(r) for r in roots), None if nodes is None else tuple(id(n) for n in nodes))
+        if key not in self._persistent:
+            self._persistent[key] = super().calculation_order(G, roots=roots, nodes=nodes)
+        return self._persistent[key]
+
+    def scc_collect(self, G, excludeEdges=None):
+        key = ("scc", None if excludeEdges is None else tuple(excludeEdges))
+        if key not in self._persistent:
+            self._persistent[key] = super().scc_collect(G, excludeEdges=excludeEdges)
+        return self._persistent[key]
+
+
+class CascadeSweep:
+    """
+    Sweep a flowsheet over inlet conditions, reusing the decomposition. See the module docstring.
+
+    Args:
+        m: model, with expanded arcs
+        init_unit: function to initialise a unit (default unit.initialize())
+        tear_set: list of arcs to tear, default [] (none) if the flowsheet has no recycles,
+            or picked by SequentialDecomposition's heuristic if it has
+        solver: solver for the whole flowsheet after initialising (default IPOPT)
+        optarg: options for the default solver
+        **seq_options: other SequentialDecomposition options (e.g tear_method="Wegstein")
+    """
+
+    def __init__(self, m, init_unit=init_unit, tear_set=None, solver=None, optarg=None, **seq_options):
+        self.m = m
+        self.init_unit = init_unit
+        self.solver = solver if solver is not None else get_solver(options=optarg)
+
+        self.seq = _CachedDecomposition(**seq_options)
+        G = self.seq.options["graph"] = self.seq.create_graph(m)
+        if tear_set is None:
+            if self.seq.check_tear_set(G, []):
+                tear_set = []
+            else:
+                self.seq.options["select_tear_method"] = "heuristic"
+                edges = self.seq.idx_to_edge(G)
+                tear_set = [G.edges[edges[i]]["arc"] for i in self.seq.tear_set(G)]
+                self.seq.cache.clear()
+        self.tear_set = tear_set
+        self.seq.set_tear_set(tear_set)
+
+        # Variables of each unit, to check whether its inputs changed
+        self._unit_vars = {unit: list(unit.component_data_objects(Var, descend_into=True)) for unit in G.nodes}
+        self._signatures = {}
+        self.initialised = []
+
+    @property
+    def units(self):
+        return list(self._unit_vars)
+
+    def _signature(self, unit):
+        return tuple(v.value for v in self._unit_vars[unit] if v.fixed)
+
+    def _init(self, unit):
+        signature = self._signature(unit)
+        if self._signatures.get(unit) == signature:
+            return
+        self.init_unit(unit)
+        self.initialised.append(unit)
+        # The signature is taken before initialising, initialize() restores what it fixes
+        self._signatures[unit] = signature
+
+    def _save_tear_guesses(self):
+        for arc in self.tear_set:
+            guesses = {}
+            for name, mem in arc.dest.vars.items():
+                if mem.is_indexed():
+                    guesses[name] = {k: value(mem[k]) for k in mem}
+                else:
+                    guesses[name] = value(mem)
+            self.seq.set_guesses_for(arc.dest, guesses)
+
+    def reset(self):
+        """
+        Forget which units are initialised, so the next point initialises everything.
+        """
+        self._signatures.clear()
+
+    def initialize(self):
+        """
+        Initialise the flowsheet at the current inlet conditions (only the units whose inputs changed).
+        Returns the units that were initialised.
+        """
+        self.initialised = []
+        self.seq.run(self.m, self._init)
+        return self.initialised
+
+    def solve_point(self, tee=False):
+        """
+        Initialise and solve the flowsheet at the current inlet conditions. Returns True if it converged.
+        """
+        self.initialize()
+        result = self.solver.solve(self.m, tee=tee)
+        ok = check_optimal_termination(result)
+        if ok:
+            self._save_tear_guesses()
+        else:
+            # The values in the units can't be trusted any more
+            self.reset()
+        return ok
+
+    def run(self, points, outputs, tee=False):
+        """
+        Solve the flowsheet at each point.
+
+        Args:
+            points: DataFrame with a row per point and a column per input, named by component
+                path relative to the model (e.g "fs.Heater2.inlet.pressure[0]"). Variables are
+                fixed to the value, mutable Params are set.
+            outputs: component paths to record at each point
+
+        Returns:
+            DataFrame with the inputs and outputs of each point, whether it converged, how many
+            units were initialised, and the time it took.
+        """
+        inputs = {name: self.m.find_component(name) for name in points.columns}
+        missing = [name for name, c in inputs.items() if c is None]
+        missing += [name for name in outputs if self.m.find_component(name) is None]
+        if missing:
+            raise KeyError(f"Components not found in the model: {missing}")
+        output_components = [self.m.find_component(name) for name in outputs]
+
+        rows = []
+        for _, point in points.iterrows():
+            tic = timer.perf_counter()
+            for name, component in inputs.items():
+                if hasattr(component, "fix"):
+                    component.fix(point[name])
+                else:
+                    component.set_value(point[name])
+            converged = self.solve_point(tee=tee)
+            row = dict(point)
+            row.update({name: value(c) if converged else np.nan for name, c in zip(outputs, output_components)})
+            row["converged"] = converged
+            row["units_initialised"] = len(self.initialised)
+            row["time"] = timer.perf_counter() - tic
+            rows.append(row)
+            _log.info(f"Point {len(rows)}: converged={converged}, initialised {len(self.initialised)} of {len(self._unit_vars)} units")
+        return pd.DataFrame(rows)
@@ -0,0 +1,269 @@
+"""
+Skew continuation for Helmholtz (PH state variable) state blocks.
+
+Specifying a PH state by temperature is hard near the phase boundary: in the two phase region
+the isotherms are flat in pressure, so pressure + temperature doesn't pin down the enthalpy and
+IPOPT wanders. first_test_solving_skew.py and test_iterative_solving_temp.py get around this by
+skewing the pressure spec with the enthalpy,
+
+    pressure == p_target + scale * (enth_mol - bias)
+
+which crosses the isotherm at a single enthalpy, and then re-solving with the bias moved to the
+last solution. This does the same thing as a continuation: the skew is scaled by (1 - lambda),
+lambda goes from 0 to 1 with adaptive steps, each step starts from a (secant) prediction from
+the last two solutions, and it stops as soon as the pressure is at its target (the skew is
+doing nothing any more). The lambda = 1 solve is the original problem.
+
+Temperature + vapour fraction specs are changed to p_sat(T) + vapour fraction, which is well
+posed in PH.
+
+skew_continuation runs the continuation on any number of independent states together (one
+solve per step for all of them), solve_skew_continuation is the single state case of it, and
+batch_states.py uses it for a whole stream table.
+
+    from continuation import solve_skew_continuation
+    result = solve_skew_continuation(m.fs.sb[0], {"pressure": 101325, "temperature": 373.15})
+"""
+from collections import namedtuple
+
+import numpy as np
+from pyomo.environ import Block, Constraint, Param, Reference, value, check_optimal_termination
+from pyomo.common.collections import ComponentMap
+from pyomo.util.subsystems import add_local_external_functions
+from idaes.core.solvers import get_solver
+from idaes.core.util.exceptions import ConfigurationError
+from idaes.models.properties.general_helmholtz import HelmholtzThermoExpressions
+import idaes.logger as idaeslog
+
+_log = idaeslog.getLogger(__name__)
+
+ContinuationResult = namedtuple(
+    "ContinuationResult",
+    ["converged", "steps", "solves", "pressure_error", "message"],
+)
+
+# Specs that can be used along with a pressure (or p_sat) target
+SPEC_PROPERTIES = ["temperature", "vapor_frac", "enth_mol", "entr_mol"]
+
+
+def pressure_target(state, specs):
+    """
+    Split the specs into a pressure target and one other spec.
+    Returns (pressure, property name, property value).
+    """
+    specs = dict(specs)
+    if len(specs) != 2:
+        raise ConfigurationError(f"Two specs are needed for a state, got {list(specs)}")
+    if "pressure" in specs:
+        pressure = specs.pop("pressure")
+    elif set(specs) == {"temperature", "vapor_frac"}:
+        # The external function goes on a throwaway block, so the model isn't changed
+        te = HelmholtzThermoExpressions(Block(concrete=True), state.params)
+        pressure = value(te.p_sat(T=specs.pop("temperature")))
+    else:
+        raise ConfigurationError(
+            f"Unsupported specs {list(specs)}, use pressure and one of {SPEC_PROPERTIES}, or temperature and vapor_frac"
+        )
+    (name, target), = specs.items()
+    if name not in SPEC_PROPERTIES:
+        raise ConfigurationError(f"Unsupported spec {name}, use one of {SPEC_PROPERTIES}")
+    return pressure, name, target
+
+
+def _build_subproblem(states, index, targets):
+    """
+    Temporary block with the indexed spec and skewed pressure constraints, and references to
+    the state blocks' own constraints (if any). It isn't attached to the model.
+    """
+    blk = Block(concrete=True)
+    state_cons = [
+        c for i in index
+        for c in states[i].component_data_objects(Constraint, active=True, descend_into=True)
+    ]
+    if state_cons:
+        blk.state_cons = Reference(state_cons)
+    blk.p_target = Param(index, initialize={i: targets[i][0] for i in index}, mutable=True)
+    blk.bias = Param(index, initialize={i: value(states[i].enth_mol) for i in index}, mutable=True)
+    blk.scale = Param(index, initialize=0.0, mutable=True)
+
+    @blk.Constraint(index)
+    def spec(b, i):
+        _, name, target = targets[i]
+        return getattr(states[i], name) == target
+
+    @blk.Constraint(index)
+    def skew(b, i):
+        return states[i].pressure == b.p_target[i] + b.scale[i] * (states[i].enth_mol - b.bias[i])
+
+    add_local_external_functions(blk)
+    return blk
+
+
+def skew_continuation(
+    states,
+    targets,
+    solver,
+    initial_scale=1.0,
+    initial_step=0.25,
+    min_step=1e-3,
+    max_step=1.0,
+    max_solves=30,
+    ptol=1e-6,
+):
+    """
+    Skew continuation on several independent PH states together, each step is one solve for
+    all of them. States whose pressure is already at its target have their skew switched off
+    (scale = 0), so they are just the original problem from then on.
+
+    Args:
+        states: indexed state block, or dict of index -> state block data
+        targets: dict of index -> (pressure, property name, property value), see pressure_target
+        solver, initial_scale, initial_step, min_step, max_step, max_solves, ptol:
+            see solve_skew_continuation. max_solves is for all the states together.
+
+    Returns:
+        (converged, solves, steps, message): converged and solves are arrays in the order of
+        targets, solves being how many solves each state took part in. steps is the number of
+        successful continuation steps, and message says why it stopped. The states are left at
+        the solution (or the last good point), with their pressure and enth_mol fixed/unfixed
+        as they were.
+    """
+    index = list(targets)
+    p_target = np.array([targets[i][0] for i in index])
+
+    was_fixed = ComponentMap((v, v.fixed) for i in index for v in (states[i].pressure, states[i].enth_mol))
+    for i in index:
+        states[i].pressure.unfix()
+        states[i].enth_mol.unfix()
+        if states[i].pressure.value is None:
+            states[i].pressure.set_value(targets[i][0])
+
+    blk = _build_subproblem(states, index, targets)
+
+    def _solve():
+        result = solver.solve(blk)
+        return check_optimal_termination(result)
+
+    def _points():
+        p = np.array([value(states[i].pressure) for i in index])
+        h = np.array([value(states[i].enth_mol) for i in index])
+        return p, h
+
+    def _set_points(p, h, active):
+        for k, i in enumerate(index):
+            if active[k]:
+                states[i].pressure.set_value(float(p[k]), skip_validation=True)
+                states[i].enth_mol.set_value(float(h[k]), skip_validation=True)
+
+    def _done():
+        p, _ = _points()
+        return np.abs(p - p_target) <= ptol * np.abs(p_target)
+
+    lam = 0.0
+    step = initial_step
+    steps = 0
+    total_solves = 0
+    solves = np.zeros(len(index), dtype=int)
+    message = ""
+    for i in index:
+        blk.scale[i].set_value(initial_scale)
+    ok = _solve()
+    total_solves += 1
+    solves += 1
+    if not ok:
+        message = "Solve with the full skew failed"
+    history = [(lam, _points())] if ok else []
+
+    while ok:
+        done = _done()
+        if done.all():
+            # The skew terms are zero, so this is already the solution of the original problems
+            message = "Skew removed"
+            break
+        if lam >= 1.0:
+            break
+        if total_solves >= max_solves:
+            message = f"Reached {max_solves} solves at lambda={lam:.4g}"
+            break
+
+        p, h = _points()
+        new_lam = min(1.0, lam + step)
+        # Predictor: secant through the last two points, for the states that are still moving
+        if len(history) >= 2:
+            (l0, (p0, h0)), (l1, (p1, h1)) = history[-2], history[-1]
+            slope = (new_lam - l1) / (l1 - l0)
+            _set_points(p1 + slope * (p1 - p0), h1 + slope * (h1 - h0), ~done)
+        for k, i in enumerate(index):
+            if done[k]:
+                blk.scale[i].set_value(0.0)
+            else:
+                blk.bias[i].set_value(float(h[k]))
+                blk.scale[i].set_value(initial_scale * (1 - new_lam))
+
+        step_ok = _solve()
+        total_solves += 1
+        solves[~done] += 1
+        if step_ok:
+            lam = new_lam
+            steps += 1
+            history.append((lam, _points()))
+            step = min(step * 2, max_step)
+        else:
+            # Corrector failed: go back to the last good point and take a smaller step
+            _set_points(p, h, np.ones(len(index), dtype=bool))
+            step /= 2
+            if step < min_step:
+                message = f"Step size below {min_step} at lambda={lam:.4g}"
+                ok = False
+
+    if not message:
+        message = "Reached lambda=1"
+    converged = _done() if history else np.zeros(len(index), dtype=bool)
+
+    for v, fixed in was_fixed.items():
+        if fixed:
+            v.fix()
+    return converged, solves, steps, message
+
+
+def solve_skew_continuation(
+    state,
+    specs,
+    solver=None,
+    optarg=None,
+    initial_scale=1.0,
+    initial_step=0.25,
+    min_step=1e-3,
+    max_step=1.0,
+    max_solves=30,
+    ptol=1e-6,
+):
+    """
+    Solve a Helmholtz PH state block for two specs, by skew continuation.
+
+    Args:
+        state: a state block data of a HelmholtzParameterBlock with StateVars.PH
+        specs: dict of two specs: pressure and one of temperature, vapor_frac, enth_mol, entr_mol,
+               or temperature and vapor_frac
+        solver: solver to use (default IPOPT)
+        optarg: options for the default solver
+        initial_scale: skew slope at the start, Pa per J/mol (or J/kg)
+        initial_step, min_step, max_step: continuation step sizes in lambda (0 to 1)
+        max_solves: maximum number of solves
+        ptol: relative pressure tolerance, the continuation stops once the pressure is this close to the target
+
+    Returns:
+        ContinuationResult. The state block is left at the solution (or the last good point),
+        with its pressure and enth_mol fixed/unfixed as they were.
+    """
+    if solver is None:
+        solver = get_solver(options=optarg)
+    targets = {0: pressure_target(state, specs)}
+    converged, solves, steps, message = skew_continuation(
+        {0: state}, targets, solver, initial_scale=initial_scale, initial_step=initial_step,
+        min_step=min_step, max_step=max_step, max_solves=max_solves, ptol=ptol,
+    )
+    pressure = targets[0][0]
+    pressure_error = abs(value(state.pressure) - pressure) / abs(pressure)
+    _log.info(f"{state.name}: {message}, {solves[0]} solves")
+    return ContinuationResult(bool(converged[0]), steps, int(solves[0]), pressure_error, message)
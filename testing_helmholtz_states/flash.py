@@ -0,0 +1,160 @@
+"""
+Flash calculations for Helmholtz property packages: any two intensive specs -> the native (P, H) state.
+
+expressions.py shows that flow/pressure/enthalpy specs work, but other specs (e.g temperature +
+vapour fraction) don't, and solving a state block needs a dummy objective because IPOPT sees
+no free variables. Setting a stream from a frontend spec doesn't need a solve at all though:
+the Helmholtz external functions can calculate the enthalpy directly for most spec pairs.
+
+HelmholtzFlash builds the property expressions once, on a private block, with mutable Params
+as the inputs. Each flash just sets the Params and evaluates the expressions. H/s needs a one
+dimensional root find for the pressure (entropy always falls with pressure at constant
+enthalpy), done with brentq on the evaluated expression. Results are cached.
+
+Supported specs (in the parameter block's units and amount basis):
+    T, p   (single phase only, the phase is picked by comparing p with p_sat(T), or at or above
+            the critical temperature, where p_sat isn't defined, the one supercritical phase)
+    T, x   (below the critical temperature)
+    p, x
+    p, s
+    h, s
+    p, h   (returned as is)
+
+    flash = get_flash(m.fs.properties)
+    p, h = flash.ph(T=373.15, x=0.5)
+    flash.set_state(m.fs.sb[0], T=373.15, x=0.5)
+"""
+import math
+
+from pyomo.environ import Block, Param, value
+from scipy.optimize import brentq
+from idaes.core.util.exceptions import ConfigurationError
+from idaes.models.properties.general_helmholtz import HelmholtzThermoExpressions, AmountBasis
+
+SUPPORTED_SPECS = [
+    frozenset(s) for s in [("T", "p"), ("T", "x"), ("p", "x"), ("p", "s"), ("h", "s"), ("p", "h")]
+]
+
+
+class HelmholtzFlash:
+    """
+    Direct (P, H) flash for one HelmholtzParameterBlock. See the module docstring.
+    """
+
+    def __init__(self, params, cache_size=10_000):
+        self.params = params
+        self.cache_size = cache_size
+        self._cache = {}
+        self.pressure_min = value(params.pressure_min)
+        self.pressure_max = value(params.pressure_max)
+        self.temperature_crit = value(params.temperature_crit)
+
+        # The expressions and their external functions live on a block that isn't part of any model
+        b = self._block = Block(concrete=True)
+        b.T = Param(initialize=300, mutable=True)
+        b.p = Param(initialize=101325, mutable=True)
+        b.x = Param(initialize=0, mutable=True)
+        b.s = Param(initialize=0, mutable=True)
+        b.h = Param(initialize=0, mutable=True)
+        te = HelmholtzThermoExpressions(b, params)
+
+        self._p_sat = te.p_sat(T=b.T)
+        self._h_liq_tp = te.h(T=b.T, p=b.p, x=0)
+        self._h_vap_tp = te.h(T=b.T, p=b.p, x=1)
+        self._h_tx = te.h(T=b.T, x=b.x)
+        self._h_px = te.h(p=b.p, x=b.x)
+        self._h_ps = te.h(s=b.s, p=b.p)
+        self._s_hp = te.s(h=b.h, p=b.p)
+
+    def _key(self, specs):
+        return tuple(sorted((k, float(v)) for k, v in specs.items()))
+
+    def ph(self, **specs):
+        """
+        (pressure, enthalpy) for two specs, see the module docstring for the supported pairs.
+        """
+        specs = {k: v for k, v in specs.items() if v is not None}
+        kind = frozenset(specs)
+        if kind not in SUPPORTED_SPECS:
+            raise ConfigurationError(
+                f"Unsupported flash specs {sorted(kind)}, use one of {[sorted(s) for s in SUPPORTED_SPECS]}"
+            )
+        key = self._key(specs)
+        result = self._cache.get(key)
+        if result is None:
+            result = self._flash(kind, specs)
+            if len(self._cache) >= self.cache_size:
+                # Drop the oldest entry (dicts keep insertion order)
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[key] = result
+        return result
+
+    def _flash(self, kind, specs):
+        b = self._block
+        for name, v in specs.items():
+            getattr(b, name).set_value(v)
+
+        if kind == {"p", "h"}:
+            return float(specs["p"]), float(specs["h"])
+        if kind == {"T", "p"}:
+            if specs["T"] >= self.temperature_crit:
+                # There's only one phase, and the liquid and vapour functions both give its root
+                return float(specs["p"]), value(self._h_vap_tp)
+            # Below the saturation pressure it's a vapour, above it a liquid
+            if specs["p"] < value(self._p_sat):
+                return float(specs["p"]), value(self._h_vap_tp)
+            return float(specs["p"]), value(self._h_liq_tp)
+        if kind == {"T", "x"}:
+            if specs["T"] >= self.temperature_crit:
+                raise ConfigurationError(
+                    f"T={specs['T']} is at or above the critical temperature {self.temperature_crit}, "
+                    "so there's no vapour fraction"
+                )
+            return value(self._p_sat), value(self._h_tx)
+        if kind == {"p", "x"}:
+            return float(specs["p"]), value(self._h_px)
+        if kind == {"p", "s"}:
+            return float(specs["p"]), value(self._h_ps)
+        # h, s: find the pressure where s(h, p) = s, in log(p)
+        target = specs["s"]
+
+        def residual(log_p):
+            b.p.set_value(math.exp(log_p))
+            return value(self._s_hp) - target
+
+        try:
+            log_p = brentq(residual, math.log(self.pressure_min), math.log(self.pressure_max), xtol=1e-10)
+        except ValueError:
+            raise ConfigurationError(f"No pressure between {self.pressure_min} and {self.pressure_max} Pa gives h={specs['h']}, s={target}")
+        return math.exp(log_p), float(specs["h"])
+
+    def set_state(self, state, fix=True, **specs):
+        """
+        Set (and by default fix) the pressure and enthalpy of a PH state block data from two specs.
+        """
+        p, h = self.ph(**specs)
+        enth = state.enth_mol if self.params.config.amount_basis == AmountBasis.MOLE else state.enth_mass
+        if fix:
+            state.pressure.fix(p)
+            enth.fix(h)
+        else:
+            state.pressure.set_value(p)
+            enth.set_value(h)
+        return p, h
+
+    def clear_cache(self):
+        self._cache.clear()
+
+
+# id(parameter block) -> HelmholtzFlash, so the expressions are only built once per property package
+_flashes = {}
+
+
+def get_flash(params):
+    """
+    The (cached) HelmholtzFlash for a parameter block.
+    """
+    flash = _flashes.get(id(params))
+    if flash is None or flash.params is not params:
+        flash = _flashes[id(params)] = HelmholtzFlash(params)
+    return flash
@@ -7,6 +7,15 @@ from idaes.core.util.model_statistics import report_statistics, degrees_of_freed
 import idaes.logger as idaeslog
 from property_packages.build_package import build_package
 from idaes.models.unit_models.heater import Heater
+import os
+import sys
+
+# property_cache.py is in the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from property_cache import htpx
+from cascade_sweep import CascadeSweep
+import numpy as np
+import pandas as pd
 
 
 ### Utility Methods
@@ -43,9 +52,9 @@ m.fs.Heater2.inlet.pressure.fix(10000.0 * units("Pa"))
 m.fs.Heater2.inlet.enth_mol.fix(2500)
 #m.fs.Heater2.outlet.enth_mol.fix(3100)
 #m.fs.Heater2.outlet.enth_mol.fix(m.fs.PP_0.htpx(p=m.fs.Heater2.outlet.pressure[0], T=T))
-m.fs.enth = Constraint(expr=m.fs.Heater2.outlet.enth_mol[0] == m.fs.PP_0.htpx(p=m.fs.Heater2.inlet.pressure[0], T=T))
+m.fs.enth = Constraint(expr=m.fs.Heater2.outlet.enth_mol[0] == htpx(m.fs.PP_0, p=m.fs.Heater2.inlet.pressure[0], T=T))
 print(value(m.fs.Heater2.outlet.pressure[0]))
-print(m.fs.PP_0.htpx(p=m.fs.Heater2.outlet.pressure[0], T=T))
+print(value(htpx(m.fs.PP_0, p=m.fs.Heater2.outlet.pressure[0], T=T)))
 
 # Heater32
 m.fs.Heater32 = Heater(
@@ -55,7 +64,7 @@ m.fs.Heater32 = Heater(
 #m.fs.Heater32.deltaP.fix(-1e-06 * units("kPa"))
 #m.fs.Heater32.inlet.enth_mol.fix(3500)
 #m.fs.Heater32.outlet.enth_mol.fix(3200)
-m.fs.Heater32.outlet.enth_mol.fix(m.fs.PP_0.htpx(p=m.fs.Heater32.inlet.pressure[0], T=T2))
+m.fs.Heater32.outlet.enth_mol.fix(value(htpx(m.fs.PP_0, p=m.fs.Heater32.inlet.pressure[0], T=T2)))
 
 
 ## Connect Unit Models
@@ -70,9 +79,8 @@ report_statistics(m)
 ### Initialize Model
 TransformationFactory("network.expand_arcs").apply_to(m)
 print("Degrees of freedom:", degrees_of_freedom(m))
-seq = SequentialDecomposition()
-seq.set_tear_set([])
-seq.run(m, init_unit)
+sweep = CascadeSweep(m, init_unit=init_unit, tear_set=[])
+sweep.initialize()
 
 
 ### Solve
@@ -88,4 +96,14 @@ m.fs.Heater2.report()
 m.fs.Heater32.report()
 result = solver.solve(m, tee=True)
 m.fs.Heater2.report()
-m.fs.Heater32.report()
\ No newline at end of file
+m.fs.Heater32.report()
+
+
+### Sweep
+# Only Heater2's inlet changes, but its outlet feeds Heater32, so both get re-initialised at
+# each pressure. Sweeping Heater32's outlet spec alone would skip Heater2.
+results = sweep.run(
+    pd.DataFrame({"fs.Heater2.inlet.pressure[0]": np.linspace(10000, 50000, 5)}),
+    outputs=["fs.Heater2.heat_duty[0]", "fs.Heater32.heat_duty[0]", "fs.Heater32.outlet.enth_mol[0]"],
+)
+print(results)
@@ -0,0 +1,36 @@
+### Imports
+import numpy as np
+from pyomo.environ import ConcreteModel
+from idaes.core import FlowsheetBlock
+from idaes.models.properties.general_helmholtz import HelmholtzParameterBlock, PhaseType, StateVars, AmountBasis
+
+from batch_states import build_states, solve_states
+
+# The same kinds of specs as test_continuation.py, but for a whole stream table at once:
+# subcooled liquid and superheated steam at a range of pressures, and two phase states by
+# temperature + vapour fraction.
+
+### Build Model
+m = ConcreteModel()
+m.fs = FlowsheetBlock(dynamic=False)
+
+m.fs.properties = HelmholtzParameterBlock(
+    pure_component="h2o",
+    phase_presentation=PhaseType.MIX,
+    amount_basis=AmountBasis.MOLE,
+    state_vars=StateVars.PH,
+)
+
+cases = []
+for p in np.geomspace(2e4, 1e6, 10):
+    cases.append({"pressure": p, "temperature": 283.15})
+    cases.append({"pressure": p, "temperature": 500})
+for T in np.linspace(300, 450, 10):
+    cases.append({"temperature": T, "vapor_frac": 0.5})
+
+build_states(m.fs, "streams", m.fs.properties, len(cases), flow_mol=1, enth_mol=60000)
+
+### Solve and Report
+report = solve_states(m.fs.streams, cases)
+print(report)
+print(f"{report.converged.sum()} of {len(report)} converged")
@@ -0,0 +1,41 @@
+### Imports
+from pyomo.environ import ConcreteModel, value
+from idaes.core import FlowsheetBlock
+from idaes.models.properties.general_helmholtz import HelmholtzParameterBlock, PhaseType, StateVars, AmountBasis
+
+from continuation import solve_skew_continuation
+
+# Same problems as test_iterative_solving_temp.py, but with the continuation solver
+# instead of the hand written loop. The last one is temperature + vapour fraction,
+# which doesn't work with a plain solve.
+
+### Build Model
+m = ConcreteModel()
+m.fs = FlowsheetBlock(dynamic=False)
+
+m.fs.properties = HelmholtzParameterBlock(
+    pure_component="h2o",
+    phase_presentation=PhaseType.MIX,
+    amount_basis=AmountBasis.MOLE,
+    state_vars=StateVars.PH,
+)
+
+m.fs.sb = m.fs.properties.build_state_block([0, 1, 2], defined_state=True)
+for i in m.fs.sb:
+    m.fs.sb[i].flow_mol.fix(1)
+    m.fs.sb[i].enth_mol.set_value(60000)
+
+cases = {
+    0: {"pressure": 101325, "temperature": 283.15},
+    1: {"pressure": 101325, "temperature": 383.15},
+    2: {"temperature": 373.15, "vapor_frac": 0.5},
+}
+
+### Solve and Report
+for i, specs in cases.items():
+    result = solve_skew_continuation(m.fs.sb[i], specs)
+    print(specs, result)
+    print("pressure:", value(m.fs.sb[i].pressure))
+    print("enth_mol:", value(m.fs.sb[i].enth_mol))
+    print("temperature:", value(m.fs.sb[i].temperature))
+    print("vapor_frac:", value(m.fs.sb[i].vapor_frac))
@@ -0,0 +1,48 @@
+### Imports
+import time as timer
+
+from pyomo.environ import ConcreteModel, value
+from idaes.core import FlowsheetBlock
+from idaes.models.properties.general_helmholtz import HelmholtzParameterBlock, PhaseType, StateVars, AmountBasis
+
+from flash import get_flash
+
+# Sets state blocks from the specs that don't work as constraints (see expressions.py),
+# without solving anything.
+
+### Build Model
+m = ConcreteModel()
+m.fs = FlowsheetBlock(dynamic=False)
+
+m.fs.properties = HelmholtzParameterBlock(
+    pure_component="h2o",
+    phase_presentation=PhaseType.MIX,
+    amount_basis=AmountBasis.MOLE,
+    state_vars=StateVars.PH,
+)
+
+cases = [
+    {"T": 283.15, "p": 101325},
+    {"T": 700, "p": 25e6},  # supercritical
+    {"T": 373.15, "x": 0.5},
+    {"p": 101325, "x": 1},
+    {"p": 500000, "s": 150},
+    {"h": 50000, "s": 150},
+]
+m.fs.sb = m.fs.properties.build_state_block(range(len(cases)), defined_state=True)
+
+flash = get_flash(m.fs.properties)
+
+### Flash and Report
+tic = timer.perf_counter()
+for i, specs in enumerate(cases):
+    m.fs.sb[i].flow_mol.fix(1)
+    flash.set_state(m.fs.sb[i], **specs)
+print(f"{len(cases)} flashes: {timer.perf_counter() - tic:.4f} s")
+
+for i, specs in enumerate(cases):
+    print(specs)
+    print("    pressure:", value(m.fs.sb[i].pressure))
+    print("    enth_mol:", value(m.fs.sb[i].enth_mol))
+    print("    temperature:", value(m.fs.sb[i].temperature))
+    print("    vapor_frac:", value(m.fs.sb[i].vapor_frac))
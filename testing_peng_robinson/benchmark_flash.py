@@ -0,0 +1,104 @@
+"""
+Compares the NumPy PR flash (pr_flash.py) with solving IDAES state blocks one at a time, as
+solve_sb.py does, and checks whether the flash results help the Pyomo solves as initial guesses.
+
+Run from this folder:
+    python benchmark_flash.py [number of states] [number of Pyomo solves]
+"""
+import re
+import sys
+import time as timer
+
+import numpy as np
+import pandas as pd
+from pyomo.environ import ConcreteModel, Var, value, check_optimal_termination
+from pyomo.common.tee import capture_output
+from idaes.core import FlowsheetBlock
+from idaes.core.solvers import get_solver
+from idaes.models.properties.modular_properties.base.generic_property import GenericParameterBlock
+
+from configuration import configuration
+from pr_flash import PRFlash, set_initial_guess
+
+
+def make_states(flash, n, seed=0):
+    """
+    Random (P, h, z) states, from TP flashes over the configuration's state bounds.
+    """
+    rng = np.random.default_rng(seed)
+    bounds = configuration["state_bounds"]
+    T = rng.uniform(bounds["temperature"][0], bounds["temperature"][2], n)
+    P = rng.uniform(bounds["pressure"][0], bounds["pressure"][2], n)
+    z = rng.dirichlet(np.ones(len(flash.components)), n)
+    h = flash.tp(T, P, z)["enth_mol"]
+    return T, P, h, z
+
+
+def solve_pyomo(P, h, z, flash_result=None):
+    """
+    Solve an FPhx state block for each state. Returns a DataFrame of converged, IPOPT iterations,
+    time and temperature.
+
+    The state block is reset to the values it was built with before each solve, so every solve
+    starts from the defaults (or the flash result), not from the last state's solution.
+    """
+    m = ConcreteModel()
+    m.fs = FlowsheetBlock(dynamic=False)
+    m.fs.props = GenericParameterBlock(**configuration)
+    m.fs.sb = m.fs.props.build_state_block([0], defined_state=True)
+    sb = m.fs.sb[0]
+    components = list(configuration["components"])
+    solver = get_solver()
+    defaults = [(v, v.value) for v in m.component_data_objects(Var, descend_into=True)]
+
+    rows = []
+    for k in range(len(P)):
+        for v, initial in defaults:
+            v.set_value(initial, skip_validation=True)
+        sb.flow_mol.fix(10)
+        sb.pressure.fix(P[k])
+        sb.enth_mol.fix(h[k])
+        for i, j in enumerate(components):
+            sb.mole_frac_comp[j].fix(z[k, i])
+        if flash_result is not None:
+            set_initial_guess(sb, flash_result, k)
+
+        tic = timer.perf_counter()
+        with capture_output() as output:
+            result = solver.solve(m, tee=True)
+        elapsed = timer.perf_counter() - tic
+        match = re.search(r"Number of Iterations\.+:\s*(\d+)", output.getvalue())
+        rows.append({
+            "converged": check_optimal_termination(result),
+            "iterations": int(match.group(1)) if match else None,
+            "time": elapsed,
+            "temperature": value(sb.temperature),
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    n_pyomo = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    flash = PRFlash(configuration)
+    T, P, h, z = make_states(flash, n)
+    bounds = configuration["state_bounds"]["temperature"]
+
+    tic = timer.perf_counter()
+    result = flash.ph(P, h, z, T_bounds=(bounds[0] - 50, bounds[2] + 50))
+    numpy_time = timer.perf_counter() - tic
+    print(f"NumPy PH flash: {n} states in {numpy_time:.3f} s ({1e6 * numpy_time / n:.1f} us/state)")
+    print(f"  max temperature error {np.max(np.abs(result['temperature'] - T)):.2e} K")
+
+    # Pyomo on a subset, from its default initial values and from the flash
+    cold = solve_pyomo(P[:n_pyomo], h[:n_pyomo], z[:n_pyomo])
+    warm = solve_pyomo(P[:n_pyomo], h[:n_pyomo], z[:n_pyomo], flash_result=result)
+    for name, runs in [("Pyomo, cold start", cold), ("Pyomo, flash guess", warm)]:
+        ok = runs[runs.converged]
+        print(
+            f"{name}: {len(ok)}/{len(runs)} converged, "
+            f"mean {runs.iterations.mean():.1f} iterations, {1e3 * runs.time.mean():.1f} ms/state, "
+            f"max |T - flash T| {np.max(np.abs(ok.temperature - result['temperature'][:n_pyomo][runs.converged.to_numpy()])):.2e} K"
+        )
+    print(f"speed up over a cold Pyomo solve: {cold.time.mean() / (numpy_time / n):.0f}x")
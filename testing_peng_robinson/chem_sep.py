@@ -6,10 +6,60 @@ http://www.chemsep.org/downloads/docs/book.htm
 IDAES naming conventions followed for compatibility with modular property packages
 """
 
+import numpy as np
 from pyomo.environ import log, exp, units as pyunits
 from idaes.core.util.misc import set_param_from_config
 from pyomo.environ import Var, value
 
+COEFFS = ["A", "B", "C", "D", "E"]
+
+
+def _kelvin(b, T):
+    """
+    T converted to K, shared between all the property expressions of a state block
+    (so the units are only worked out once per temperature).
+    """
+    cache = b.__dict__.setdefault("_chemsep_kelvin", {})
+    if id(T) not in cache:
+        # Keep T alive along with its converted expression, so its id isn't reused
+        cache[id(T)] = (T, pyunits.convert(T, to_units=pyunits.K))
+    return cache[id(T)][1]
+
+
+def _polynomials(b, cobj):
+    """
+    Coefficients of the Horner forms of cp, the enthalpy integral and the entropy integral, and
+    their values at the reference temperature. Built once per component.
+        cp    = A + T*(B + T*(C + T*(D + T*E)))
+        H(T)  = T*(A + T*(B/2 + T*(C/3 + T*(D/4 + T*E/5))))
+        S'(T) = T*(B + T*(C/2 + T*(D/3 + T*E/4)))      (S = A*log(T/Tr) + S'(T) - S'(Tr))
+    """
+    if "_chemsep_polynomials" not in cobj.__dict__:
+        c = [getattr(cobj, f"cp_mol_ig_comp_coeff_{k}") for k in COEFFS]
+        Tr = pyunits.convert(b.params.temperature_ref, to_units=pyunits.K)
+        h = [c[i] / (i + 1) for i in range(5)]
+        s = [c[i] / i for i in range(1, 5)]
+        cobj._chemsep_polynomials = {
+            "cp": c,
+            "h": h,
+            "s": s,
+            "Tr": Tr,
+            "h_ref": _horner(h, Tr) * Tr,
+            "s_ref": _horner(s, Tr) * Tr,
+        }
+    return cobj._chemsep_polynomials
+
+
+def _horner(coeffs, T):
+    """
+    coeffs[0] + T*(coeffs[1] + T*(...)). Works on Pyomo expressions and NumPy arrays.
+    """
+    result = coeffs[-1]
+    for c in reversed(coeffs[:-1]):
+        result = c + T * result
+    return result
+
+
 class ChemSep(object):
 
     class cp_mol_ig_comp:
@@ -47,14 +97,8 @@ class ChemSep(object):
 
         @staticmethod
         def return_expression(b, cobj, T):
-            T = pyunits.convert(T, to_units=pyunits.K)
-            cp = (
-                cobj.cp_mol_ig_comp_coeff_A +
-                cobj.cp_mol_ig_comp_coeff_B*T +
-                cobj.cp_mol_ig_comp_coeff_C*T**2 +
-                cobj.cp_mol_ig_comp_coeff_D*T**3 +
-                cobj.cp_mol_ig_comp_coeff_E*T**4
-            )
+            T = _kelvin(b, T)
+            cp = _horner(_polynomials(b, cobj)["cp"], T)
 
             units = b.params.get_metadata().derived_units
             return pyunits.convert(cp, units.HEAT_CAPACITY_MOLE)
@@ -79,8 +123,8 @@ class ChemSep(object):
         @staticmethod
         def return_expression(b, cobj, T):
             # Specific enthalpy
-            T = pyunits.convert(T, to_units=pyunits.K)
-            Tr = pyunits.convert(b.params.temperature_ref, to_units=pyunits.K)
+            T = _kelvin(b, T)
+            poly = _polynomials(b, cobj)
 
             units = b.params.get_metadata().derived_units
 
@@ -92,11 +136,7 @@ class ChemSep(object):
 
             h = (
                 pyunits.convert(
-                    (cobj.cp_mol_ig_comp_coeff_A * (T - Tr)
-                     + (cobj.cp_mol_ig_comp_coeff_B / 2) * (T**2 - Tr**2)
-                     + (cobj.cp_mol_ig_comp_coeff_C / 3) * (T**3 - Tr**3)
-                     + (cobj.cp_mol_ig_comp_coeff_D / 4) * (T**4 - Tr**4)
-                     + (cobj.cp_mol_ig_comp_coeff_E / 5) * (T**5 - Tr**5)),
+                    T * _horner(poly["h"], T) - poly["h_ref"],
                     units.ENERGY_MOLE,
                 ) + h_form
             )
@@ -122,18 +162,15 @@ class ChemSep(object):
         @staticmethod
         def return_expression(b, cobj, T):
             # Specific entropy
-            T = pyunits.convert(T, to_units=pyunits.K)
-            Tr = pyunits.convert(b.params.temperature_ref, to_units=pyunits.K)
+            T = _kelvin(b, T)
+            poly = _polynomials(b, cobj)
 
             units = b.params.get_metadata().derived_units
 
             s = (
                 pyunits.convert(
-                    (cobj.cp_mol_ig_comp_coeff_A * log(T / Tr)
-                     + cobj.cp_mol_ig_comp_coeff_B * (T - Tr)
-                     + (cobj.cp_mol_ig_comp_coeff_C / 2) * (T ** 2 - Tr ** 2)
-                     + (cobj.cp_mol_ig_comp_coeff_D / 3) * (T ** 3 - Tr ** 3)
-                     + (cobj.cp_mol_ig_comp_coeff_E / 4) * (T ** 4 - Tr ** 4)),
+                    (cobj.cp_mol_ig_comp_coeff_A * log(T / poly["Tr"])
+                     + T * _horner(poly["s"], T) - poly["s_ref"]),
                     units.ENTROPY_MOLE,
                 ) + cobj.entr_mol_form_vap_comp_ref
             )
@@ -166,8 +203,74 @@ class ChemSep(object):
             psat = (
                     exp(
                         cobj.pressure_sat_comp_coeff_A - cobj.pressure_sat_comp_coeff_B /
-                        (pyunits.convert(T, to_units=pyunits.K) + cobj.pressure_sat_comp_coeff_C))
+                        (_kelvin(b, T) + cobj.pressure_sat_comp_coeff_C))
                     ) * pyunits.Pa
 
             units = b.params.get_metadata().derived_units
             return pyunits.convert(psat, to_units=units.PRESSURE)
+
+
+class ChemSepNumpy(object):
+    """
+    The ChemSep ideal gas properties with NumPy, for batch calculations outside Pyomo
+    (many temperatures and components at once).
+
+    Built from a GenericParameterBlock configuration (see configuration.py). Temperatures are in K,
+    results are arrays of shape T.shape + (number of components,), in J/mol/K and J/mol.
+
+        props = ChemSepNumpy(configuration)
+        props.enth_mol_ig(np.linspace(300, 400, 1000))
+    """
+
+    def __init__(self, configuration, components=None):
+        if components is None:
+            components = [
+                name for name, comp in configuration["components"].items()
+                if "cp_mol_ig_comp_coeff" in comp.get("parameter_data", {})
+            ]
+        self.components = list(components)
+        T_ref, T_ref_units = configuration.get("temperature_ref", (298.15, pyunits.K))
+        self.temperature_ref = pyunits.convert_value(T_ref, from_units=T_ref_units, to_units=pyunits.K)
+        self.include_enthalpy_of_formation = configuration.get("include_enthalpy_of_formation", True)
+
+        energy = pyunits.J / pyunits.mol
+        self.coeffs = np.zeros((5, len(self.components)))
+        self.enth_form = np.zeros(len(self.components))
+        self.entr_form = np.zeros(len(self.components))
+        for j, name in enumerate(self.components):
+            data = configuration["components"][name]["parameter_data"]
+            for i, k in enumerate(COEFFS):
+                v, u = data["cp_mol_ig_comp_coeff"][k]
+                self.coeffs[i, j] = pyunits.convert_value(v, from_units=u, to_units=energy / pyunits.K ** (i + 1))
+            if "enth_mol_form_vap_comp_ref" in data:
+                v, u = data["enth_mol_form_vap_comp_ref"]
+                self.enth_form[j] = pyunits.convert_value(v, from_units=u, to_units=energy)
+            if "entr_mol_form_vap_comp_ref" in data:
+                v, u = data["entr_mol_form_vap_comp_ref"]
+                self.entr_form[j] = pyunits.convert_value(v, from_units=u, to_units=energy / pyunits.K)
+
+        c = self.coeffs
+        self._h = [c[i] / (i + 1) for i in range(5)]
+        self._s = [c[i] / i for i in range(1, 5)]
+        Tr = self.temperature_ref
+        self._h_ref = _horner(self._h, Tr) * Tr
+        self._s_ref = _horner(self._s, Tr) * Tr
+
+    def cp_mol_ig(self, T):
+        T = np.asarray(T, dtype=float)[..., None]
+        return _horner(list(self.coeffs), T)
+
+    def enth_mol_ig(self, T):
+        T = np.asarray(T, dtype=float)[..., None]
+        h = T * _horner(self._h, T) - self._h_ref
+        if self.include_enthalpy_of_formation:
+            h = h + self.enth_form
+        return h
+
+    def entr_mol_ig(self, T):
+        T = np.asarray(T, dtype=float)[..., None]
+        return (
+            self.coeffs[0] * np.log(T / self.temperature_ref)
+            + T * _horner(self._s, T) - self._s_ref
+            + self.entr_form
+        )
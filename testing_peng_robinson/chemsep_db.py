@@ -0,0 +1,309 @@
+"""
+Loads components from the ChemSep database (the chemsep1.xml file that ships with DWSIM), and
+makes GenericParameterBlock configurations for them, instead of copying constants by hand
+like configuration.py does.
+
+https://raw.githubusercontent.com/DanWBR/dwsim/windows/DWSIM.Thermodynamics/Assets/Databases/chemsep1.xml
+
+The XML is parsed once, and saved as a pickled cache next to it (chemsep1.xml.pkl), with
+indexes by name, CAS number and formula. Later loads just unpickle the cache (it is rebuilt if
+the XML changes).
+
+    db = ChemSepDatabase.load("chemsep1.xml")
+    db.find("Water"), db.find("7732-18-5"), db.find_formula("C6H6")
+    configuration = db.configuration(["benzene", "toluene"])
+    m.fs.props = GenericParameterBlock(**configuration)
+
+The ideal gas heat capacity in ChemSep is usually a DIPPR equation (16 or 107), not the
+polynomial that chem_sep.py uses, so it is refitted to a polynomial over the equation's
+temperature range. The vapour pressure is refitted to Antoine's equation in the same way.
+The fits are done when the cache is built, so making a configuration is just looking up numbers.
+"""
+import os
+import pickle
+import xml.etree.ElementTree as ET
+
+import numpy as np
+from scipy.optimize import curve_fit
+from pyomo.environ import units as pyunits
+from idaes.core import LiquidPhase, VaporPhase, Component
+from idaes.core.util.exceptions import ConfigurationError
+from idaes.models.properties.modular_properties.eos.ceos import Cubic, CubicType
+from idaes.models.properties.modular_properties.state_definitions import FPhx
+from idaes.models.properties.modular_properties.phase_equil.bubble_dew import LogBubbleDew
+import idaes.logger as idaeslog
+
+from chem_sep import ChemSep, COEFFS
+
+_log = idaeslog.getLogger(__name__)
+
+DEFAULT_XML = os.environ.get("CHEMSEP_XML", os.path.join(os.path.dirname(os.path.abspath(__file__)), "chemsep1.xml"))
+# Bump this if the cached records change
+CACHE_VERSION = 1
+
+# XML tag -> record key, for the scalar constants
+CONSTANTS = {
+    "CompoundName": "name",
+    "CAS": "cas",
+    "StructureFormula": "formula",
+    "MolecularWeight": "mw",
+    "CriticalTemperature": "temperature_crit",
+    "CriticalPressure": "pressure_crit",
+    "AcentricityFactor": "omega",
+    "HeatOfFormation": "enth_form",
+    "AbsEntropy": "entr_abs",
+}
+EQUATIONS = {
+    "IdealGasHeatCapacityCp": "cp_ig",
+    "VaporPressure": "pressure_sat",
+}
+
+
+def evaluate_equation(eq, T):
+    """
+    Value of a ChemSep temperature correlation (a dict of eqno, A, B, ...) at T (K).
+    """
+    T = np.asarray(T, dtype=float)
+    n = eq["eqno"]
+    A, B, C, D, E = (eq.get(k, 0.0) for k in COEFFS)
+    if n in (2, 3, 4, 100):
+        return A + T * (B + T * (C + T * (D + T * E)))
+    if n == 10:
+        return np.exp(A - B / (C + T))
+    if n == 16:
+        return A + np.exp(B / T + C + D * T + E * T**2)
+    if n == 101:
+        return np.exp(A + B / T + C * np.log(T) + D * T**E)
+    if n == 107:
+        return A + B * ((C / T) / np.sinh(C / T)) ** 2 + D * ((E / T) / np.cosh(E / T)) ** 2
+    raise ConfigurationError(f"ChemSep equation {n} isn't supported")
+
+
+def _fit_cp(eq):
+    # Polynomial A + BT + CT^2 + DT^3 + ET^4 in J/kmol/K
+    if eq["eqno"] in (2, 3, 4, 100):
+        return [eq.get(k, 0.0) for k in COEFFS]
+    T = np.linspace(eq.get("Tmin", 200.0), eq.get("Tmax", 1500.0), 100)
+    cp = evaluate_equation(eq, T)
+    if not np.all(np.isfinite(cp)):
+        raise ValueError("cp isn't finite over the temperature range")
+    return [float(c) for c in np.polyfit(T, cp, 4)[::-1]]
+
+
+def _fit_antoine(eq):
+    # exp(A - B / (T + C)) in Pa
+    if eq["eqno"] == 10:
+        return [eq["A"], eq["B"], eq["C"]]
+    T = np.linspace(eq.get("Tmin", 250.0), eq.get("Tmax", 600.0), 100)
+    ln_p = np.log(evaluate_equation(eq, T))
+    # Start from the Clausius-Clapeyron fit (C = 0)
+    slope, intercept = np.polyfit(1 / T, ln_p, 1)
+    (A, B, C), _ = curve_fit(lambda T, A, B, C: A - B / (T + C), T, ln_p, p0=[intercept, -slope, 0.0], maxfev=5000)
+    return [float(A), float(B), float(C)]
+
+
+def _parse_compound(element):
+    record = {}
+    for child in element:
+        if child.tag in CONSTANTS and "value" in child.attrib:
+            v = child.attrib["value"]
+            try:
+                v = float(v)
+            except ValueError:
+                pass
+            record[CONSTANTS[child.tag]] = v
+        elif child.tag in EQUATIONS:
+            eq = {}
+            for term in child:
+                if "value" in term.attrib:
+                    eq[term.tag] = float(term.attrib["value"])
+            if "eqno" in eq:
+                eq["eqno"] = int(eq["eqno"])
+                record[EQUATIONS[child.tag]] = eq
+    if "cp_ig" in record:
+        try:
+            record["cp_poly"] = _fit_cp(record["cp_ig"])
+        except (ConfigurationError, RuntimeError, ValueError) as e:
+            _log.debug(f"No cp polynomial for {record.get('name')}: {e}")
+    if "pressure_sat" in record:
+        try:
+            record["antoine"] = _fit_antoine(record["pressure_sat"])
+        except (ConfigurationError, RuntimeError, ValueError) as e:
+            _log.debug(f"No Antoine coefficients for {record.get('name')}: {e}")
+    return record
+
+
+def _key(text):
+    return str(text).strip().lower()
+
+
+class ChemSepDatabase:
+    """
+    Components of the ChemSep database, with indexes by name, CAS number and formula.
+    See the module docstring.
+    """
+
+    def __init__(self, records):
+        self.records = records
+        self.by_name = {}
+        self.by_cas = {}
+        self.by_formula = {}
+        for i, r in enumerate(records):
+            if "name" in r:
+                self.by_name[_key(r["name"])] = i
+            if "cas" in r:
+                self.by_cas[_key(r["cas"])] = i
+            if "formula" in r:
+                self.by_formula.setdefault(_key(r["formula"]), []).append(i)
+
+    @classmethod
+    def parse(cls, path=DEFAULT_XML):
+        """
+        Parse the XML (slow, use load() to go through the cache).
+        """
+        records = []
+        for _, element in ET.iterparse(path, events=("end",)):
+            if element.tag == "compound":
+                records.append(_parse_compound(element))
+                element.clear()
+        _log.info(f"Parsed {len(records)} compounds from {path}")
+        return cls(records)
+
+    @classmethod
+    def load(cls, path=DEFAULT_XML, cache_path=None):
+        """
+        Load from the cache, or parse the XML and write the cache if it is missing or out of date.
+        """
+        if cache_path is None:
+            cache_path = path + ".pkl"
+        mtime = os.path.getmtime(path)
+        if os.path.exists(cache_path):
+            with open(cache_path, "rb") as f:
+                cached = pickle.load(f)
+            if cached.get("version") == CACHE_VERSION and cached.get("mtime") == mtime:
+                db = cls.__new__(cls)
+                db.__dict__.update(cached["db"])
+                return db
+        db = cls.parse(path)
+        with open(cache_path, "wb") as f:
+            pickle.dump({"version": CACHE_VERSION, "mtime": mtime, "db": db.__dict__}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return db
+
+    def __len__(self):
+        return len(self.records)
+
+    def find(self, name_or_cas):
+        """
+        The record of a component, by name or CAS number (case insensitive).
+        """
+        key = _key(name_or_cas)
+        i = self.by_name.get(key, self.by_cas.get(key))
+        if i is None:
+            raise KeyError(f"{name_or_cas} isn't in the ChemSep database")
+        return self.records[i]
+
+    def find_formula(self, formula):
+        """
+        The records of all the components with a formula (isomers share one).
+        """
+        return [self.records[i] for i in self.by_formula.get(_key(formula), [])]
+
+    def component_config(self, name_or_cas):
+        """
+        The entry for a component in a GenericParameterBlock configuration's "components",
+        using the chem_sep.py methods.
+        """
+        r = self.find(name_or_cas)
+        missing = [k for k in ("mw", "pressure_crit", "temperature_crit", "omega", "cp_poly", "antoine") if k not in r]
+        if missing:
+            raise ConfigurationError(f"{r.get('name', name_or_cas)} is missing {missing} in the ChemSep database")
+
+        kmol = pyunits.kmol
+        parameter_data = {
+            "mw": (r["mw"], pyunits.kg / kmol),
+            "pressure_crit": (r["pressure_crit"], pyunits.Pa),
+            "temperature_crit": (r["temperature_crit"], pyunits.K),
+            "omega": r["omega"],
+            "cp_mol_ig_comp_coeff": {
+                k: (c, pyunits.J / kmol / pyunits.K ** (i + 1)) for i, (k, c) in enumerate(zip(COEFFS, r["cp_poly"]))
+            },
+            "enth_mol_form_vap_comp_ref": (r.get("enth_form", 0.0), pyunits.J / kmol),
+            "entr_mol_form_vap_comp_ref": (r.get("entr_abs", 0.0), pyunits.J / kmol / pyunits.K),
+            "pressure_sat_comp_coeff": {
+                "A": (r["antoine"][0], pyunits.dimensionless),
+                "B": (r["antoine"][1], pyunits.K),
+                "C": (r["antoine"][2], pyunits.K),
+            },
+        }
+        return {
+            "type": Component,
+            "enth_mol_ig_comp": ChemSep,
+            "entr_mol_ig_comp": ChemSep,
+            "pressure_sat_comp": ChemSep,
+            "parameter_data": parameter_data,
+        }
+
+    def configuration(self, names, state_bounds=None, kappa=None):
+        """
+        Peng-Robinson GenericParameterBlock configuration for the components, in the same form
+        as configuration.py. The keys of "components" are the names as given.
+
+        Args:
+            names: component names or CAS numbers
+            state_bounds: override the default state bounds
+            kappa: dict of (i, j) -> binary interaction parameter, default 0
+        """
+        names = list(names)
+        kappa = kappa or {}
+        return {
+            "components": {name: self.component_config(name) for name in names},
+            "phases": {
+                "Vap": {
+                    "type": VaporPhase,
+                    "equation_of_state": Cubic,
+                    "equation_of_state_options": {"type": CubicType.PR},
+                },
+                "Liq": {
+                    "type": LiquidPhase,
+                    "equation_of_state": Cubic,
+                    "equation_of_state_options": {"type": CubicType.PR},
+                },
+            },
+            "base_units": {
+                "time": pyunits.s,
+                "length": pyunits.m,
+                "mass": pyunits.kg,
+                "amount": pyunits.mol,
+                "temperature": pyunits.K,
+            },
+            "state_definition": FPhx,
+            "state_bounds": state_bounds or {
+                "flow_mol": (0, 100, 1000, pyunits.mol / pyunits.s),
+                "temperature": (273.15, 300, 500, pyunits.K),
+                "pressure": (5e4, 1e5, 1e6, pyunits.Pa),
+            },
+            "pressure_ref": (101325, pyunits.Pa),
+            "temperature_ref": (298.15, pyunits.K),
+            "phases_in_equilibrium": [],
+            "phase_equilibrium_state": {},
+            "bubble_dew_method": LogBubbleDew,
+            "parameter_data": {
+                "PR_kappa": {(i, j): kappa.get((i, j), 0.0) for i in names for j in names},
+            },
+        }
+
+
+if __name__ == "__main__":
+    import sys
+    import time as timer
+
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_XML
+    tic = timer.perf_counter()
+    db = ChemSepDatabase.load(path)
+    print(f"loaded {len(db)} compounds in {1000 * (timer.perf_counter() - tic):.1f} ms")
+
+    names = [r["name"] for r in db.records if "cp_poly" in r and "antoine" in r][:20]
+    tic = timer.perf_counter()
+    configuration = db.configuration(names)
+    print(f"{len(names)} component configuration in {1000 * (timer.perf_counter() - tic):.2f} ms")
+    print(db.find("water")["name"], db.find("7732-18-5")["cas"], [r["name"] for r in db.find_formula("C6H6")])
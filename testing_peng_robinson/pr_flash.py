@@ -0,0 +1,396 @@
+"""
+Vectorised Peng-Robinson flash with NumPy, for many states at once.
+
+solve.py, separator.py and solve_sb.py solve one state at a time with the IDAES Cubic EoS. That
+is slow for a stream table, a property sweep or initialising a large flowsheet, so this does the
+same calculations for arrays of states, from the same configuration dict:
+
+- the PR compressibility cubic is solved in closed form for every state together
+- TP flash: Wilson K values, then successive substitution on the fugacity coefficients with a
+  vectorised Rachford-Rice solve (safeguarded Newton) at each step
+- PH flash: false position on the temperature, with a TP flash for each guess. Where the enthalpy
+  jumps at a temperature (the phase change of a pure component) the vapour fraction is found
+  from the lever rule instead.
+
+Enthalpies are on the same basis as the IDAES Cubic EoS (ChemSep ideal gas enthalpy, see
+chem_sep.py, plus the PR departure function), so the results can be used as initial guesses
+for the Pyomo state blocks:
+
+    flash = PRFlash(configuration)
+    result = flash.ph(P, h, z)          # arrays of states
+    set_initial_guess(m.fs.sb[0], result, 0)
+
+This is an equilibrium flash. configuration.py doesn't set phases_in_equilibrium, so its
+Pyomo states don't have phase equilibrium constraints and can give different phase splits.
+"""
+import numpy as np
+from pyomo.environ import units as pyunits
+
+from chem_sep import ChemSepNumpy
+
+R = 8.314462618  # J/mol/K
+SQRT2 = np.sqrt(2)
+
+
+def _states(a, b, z, n_components):
+    # Broadcast two per-state inputs and the compositions to n states
+    n = max(np.size(a), np.size(b), len(np.atleast_2d(z)))
+    a = np.broadcast_to(np.ravel(a).astype(float), (n,)).copy()
+    b = np.broadcast_to(np.ravel(b).astype(float), (n,)).copy()
+    z = np.broadcast_to(np.atleast_2d(np.asarray(z, dtype=float)), (n, n_components)).copy()
+    return a, b, z
+
+
+def cubic_roots(a2, a1, a0):
+    """
+    Smallest and largest real roots of z^3 + a2 z^2 + a1 z + a0 = 0, for arrays of coefficients.
+    Where there is one real root both are that root.
+    """
+    p = a1 - a2**2 / 3
+    q = 2 * a2**3 / 27 - a2 * a1 / 3 + a0
+    disc = (q / 2) ** 2 + (p / 3) ** 3
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # One real root (Cardano)
+        sqrt_disc = np.sqrt(np.maximum(disc, 0))
+        t_one = np.cbrt(-q / 2 + sqrt_disc) + np.cbrt(-q / 2 - sqrt_disc)
+        # Three real roots (trigonometric), k = 0 is the largest and k = 2 the smallest
+        r = 2 * np.sqrt(np.maximum(-p / 3, 0))
+        phi = np.arccos(np.clip(3 * q / (p * r + (p * r == 0)), -1, 1)) / 3
+        t_max = r * np.cos(phi)
+        t_min = r * np.cos(phi - 4 * np.pi / 3)
+    three = disc < 0
+    shift = a2 / 3
+    return np.where(three, t_min, t_one) - shift, np.where(three, t_max, t_one) - shift
+
+
+def rachford_rice(z, K, iterations=50, tol=1e-12):
+    """
+    Vapour fraction for each state (rows of z and K). States with no root in (0, 1) get 0
+    (liquid) or 1 (vapour).
+    """
+    Km1 = K - 1
+
+    def f(beta):
+        return np.sum(z * Km1 / (1 + beta[:, None] * Km1), axis=1)
+
+    n = len(z)
+    f0 = f(np.zeros(n))
+    f1 = f(np.ones(n))
+    liquid = f0 <= 0
+    vapour = f1 >= 0
+    two_phase = ~(liquid | vapour)
+
+    lo = np.zeros(n)
+    hi = np.ones(n)
+    beta = np.full(n, 0.5)
+    for _ in range(iterations):
+        d = 1 + beta[:, None] * Km1
+        fb = np.sum(z * Km1 / d, axis=1)
+        dfb = -np.sum(z * Km1**2 / d**2, axis=1)
+        # f is decreasing in beta, keep a bracket and bisect when Newton leaves it
+        lo = np.where(fb > 0, beta, lo)
+        hi = np.where(fb < 0, beta, hi)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = beta - fb / dfb
+        inside = (newton > lo) & (newton < hi)
+        new_beta = np.where(inside, newton, (lo + hi) / 2)
+        done = np.abs(new_beta - beta) < tol
+        beta = new_beta
+        if np.all(done | ~two_phase):
+            break
+    return np.where(liquid, 0.0, np.where(vapour, 1.0, beta))
+
+
+class PRFlash:
+    """
+    Peng-Robinson flash for the components of a GenericParameterBlock configuration
+    (see configuration.py). Pressures in Pa, temperatures in K, enthalpies in J/mol, and
+    compositions as arrays with a column per component (in self.components order).
+    """
+
+    def __init__(self, configuration, components=None):
+        if components is None:
+            components = list(configuration["components"])
+        self.components = list(components)
+        data = [configuration["components"][j]["parameter_data"] for j in self.components]
+
+        def convert(v, to_units):
+            value, units = v
+            return pyunits.convert_value(value, from_units=units, to_units=to_units)
+
+        self.Tc = np.array([convert(d["temperature_crit"], pyunits.K) for d in data])
+        self.Pc = np.array([convert(d["pressure_crit"], pyunits.Pa) for d in data])
+        self.omega = np.array([d["omega"] for d in data])
+        kappa = configuration.get("parameter_data", {}).get("PR_kappa", {})
+        self.kij = np.array([[kappa.get((i, j), 0.0) for j in self.components] for i in self.components])
+
+        self.m = 0.37464 + 1.54226 * self.omega - 0.26992 * self.omega**2
+        self.ac = 0.45724 * R**2 * self.Tc**2 / self.Pc
+        self.b = 0.07780 * R * self.Tc / self.Pc
+        self.ideal = ChemSepNumpy(configuration, self.components)
+
+    def _a(self, T):
+        # a_i and da_i/dT, shape (n, components)
+        sqrt_Tr = np.sqrt(T[:, None] / self.Tc)
+        sqrt_alpha = 1 + self.m * (1 - sqrt_Tr)
+        a = self.ac * sqrt_alpha**2
+        da = -self.ac * self.m * sqrt_alpha / np.sqrt(T[:, None] * self.Tc)
+        return a, da
+
+    def _mix(self, a, w):
+        # a_ij, a_mix and sum_j w_j a_ij
+        sqrt_a = np.sqrt(a)
+        a_ij = (1 - self.kij) * sqrt_a[:, :, None] * sqrt_a[:, None, :]
+        sum_j = np.einsum("nij,nj->ni", a_ij, w)
+        return a_ij, np.einsum("ni,ni->n", w, sum_j), sum_j
+
+    def _phase(self, T, P, w, a, vapour):
+        """
+        Compressibility and mixture parameters of a phase of composition w.
+        vapour: boolean array, True to use the largest root, False the smallest.
+        """
+        a_ij, a_m, sum_j = self._mix(a, w)
+        b_m = w @ self.b
+        A = a_m * P / (R * T) ** 2
+        B = b_m * P / (R * T)
+        z_min, z_max = cubic_roots(-(1 - B), A - 3 * B**2 - 2 * B, -(A * B - B**2 - B**3))
+        Z = np.where(vapour, z_max, z_min)
+        return Z, A, B, a_ij, a_m, b_m, sum_j
+
+    def ln_phi(self, T, P, w, vapour, a=None):
+        """
+        Log fugacity coefficients of each component in a phase of composition w.
+        """
+        if a is None:
+            a, _ = self._a(T)
+        Z, A, B, _, a_m, b_m, sum_j = self._phase(T, P, w, a, vapour)
+        log_term = np.log((Z + (1 + SQRT2) * B) / (Z + (1 - SQRT2) * B))
+        b_ratio = self.b / b_m[:, None]
+        return (
+            b_ratio * (Z - 1)[:, None]
+            - np.log(Z - B)[:, None]
+            - (A / (2 * SQRT2 * B))[:, None] * (2 * sum_j / a_m[:, None] - b_ratio) * log_term[:, None]
+        )
+
+    def enth_mol_phase(self, T, P, w, vapour):
+        """
+        Molar enthalpy of a phase of composition w: ideal gas enthalpy + PR departure.
+        """
+        a, da = self._a(T)
+        Z, A, B, a_ij, a_m, b_m, _ = self._phase(T, P, w, a, vapour)
+        sqrt_a = np.sqrt(a)
+        # d(a_ij)/dT = (1 - k_ij) (a_i' a_j + a_i a_j') / (2 sqrt(a_i a_j))
+        d_sqrt_a = da / (2 * sqrt_a)
+        da_ij = (1 - self.kij) * (d_sqrt_a[:, :, None] * sqrt_a[:, None, :] + sqrt_a[:, :, None] * d_sqrt_a[:, None, :])
+        da_m = np.einsum("ni,nij,nj->n", w, da_ij, w)
+        log_term = np.log((Z + (1 + SQRT2) * B) / (Z + (1 - SQRT2) * B))
+        departure = R * T * (Z - 1) + (T * da_m - a_m) / (2 * SQRT2 * b_m) * log_term
+        return np.einsum("ni,ni->n", self.ideal.enth_mol_ig(T), w) + departure
+
+    def wilson_K(self, T, P):
+        """
+        Wilson's estimate of the K values, shape (n, components).
+        """
+        return self.Pc / P[:, None] * np.exp(5.373 * (1 + self.omega) * (1 - self.Tc / T[:, None]))
+
+    def stability(self, T, P, z, a=None, iterations=50, tol=1e-10):
+        """
+        Michelsen's tangent plane stability test of each feed z, with a vapour-like and a
+        liquid-like trial phase started from the Wilson K values. The trial phases are only
+        iterated for the states that haven't converged.
+
+        Returns (unstable, K, vapour): whether each feed splits into two phases, K values to start
+        the flash from for the ones that do, and whether the feed on its own is the vapour root
+        (the root with the lower Gibbs energy, or Wilson's guess where there is only one root).
+        """
+        n = len(T)
+        if a is None:
+            a, _ = self._a(T)
+        liquid_root = np.zeros(n, dtype=bool)
+        vapour_root = np.ones(n, dtype=bool)
+        ln_phi_l = self.ln_phi(T, P, z, liquid_root, a)
+        ln_phi_v = self.ln_phi(T, P, z, vapour_root, a)
+        g_l = np.sum(z * ln_phi_l, axis=1)
+        g_v = np.sum(z * ln_phi_v, axis=1)
+        K_wilson = self.wilson_K(T, P)
+        one_root = np.abs(g_v - g_l) < 1e-12
+        vapour = np.where(one_root, rachford_rice(z, K_wilson) >= 1, g_v < g_l)
+        d = np.log(z) + np.where(vapour[:, None], ln_phi_v, ln_phi_l)
+
+        trials = {}
+        for trial_vapour, W in ((True, z * K_wilson), (False, z / K_wilson)):
+            active = np.ones(n, dtype=bool)
+            for _ in range(iterations):
+                i = np.flatnonzero(active)
+                if len(i) == 0:
+                    break
+                w = W[i] / W[i].sum(axis=1, keepdims=True)
+                ln_W = d[i] - self.ln_phi(T[i], P[i], w, np.full(len(i), trial_vapour), a[i])
+                change = np.max(np.abs(ln_W - np.log(W[i])), axis=1)
+                W[i] = np.exp(ln_W)
+                active[i[change < tol]] = False
+            # tm < 0 means the trial phase lowers the Gibbs energy, so the feed splits
+            tm = 1 - W.sum(axis=1)
+            w = W / W.sum(axis=1, keepdims=True)
+            trivial = np.max(np.abs(w - z), axis=1) < 1e-6
+            trials[trial_vapour] = (tm < -1e-8) & ~trivial, w
+
+        (found_v, w_v), (found_l, w_l) = trials[True], trials[False]
+        # Start from the two trial phases where both split off, otherwise from the one that did
+        K = np.where(
+            (found_v & found_l)[:, None], w_v / w_l,
+            np.where(found_v[:, None], w_v / z, np.where(found_l[:, None], z / w_l, 1.0)),
+        )
+        return found_v | found_l, K, vapour
+
+    def tp(self, T, P, z, K=None, iterations=100, tol=1e-10):
+        """
+        TP flash of arrays of states. Returns a dict of arrays: temperature, pressure,
+        vapor_frac, x (liquid composition), y (vapour composition), enth_mol and the K values,
+        and the component order.
+
+        K: K values to start from (e.g from a flash at a nearby temperature), default Wilson's.
+        States that the starting K values put in one phase get a stability test, which decides
+        whether they are single phase or gives better K values to flash them from. The
+        successive substitution only updates the states that haven't converged.
+        """
+        T, P, z = _states(T, P, z, len(self.components))
+        n = len(T)
+        a, _ = self._a(T)
+        K = self.wilson_K(T, P) if K is None else np.broadcast_to(K, (n, len(self.components))).copy()
+
+        beta = rachford_rice(z, K)
+        single = (beta <= 0) | (beta >= 1)
+        vapour = beta >= 1
+        if np.any(single):
+            i = np.flatnonzero(single)
+            unstable, K_split, vapour_i = self.stability(T[i], P[i], z[i], a[i])
+            K[i[unstable]] = K_split[unstable]
+            single[i[unstable]] = False
+            vapour[i] = vapour_i
+
+        active = ~single
+        at_bound = np.zeros(n, dtype=bool)
+        for _ in range(iterations):
+            i = np.flatnonzero(active)
+            if len(i) == 0:
+                break
+            beta_i = rachford_rice(z[i], K[i])
+            x = z[i] / (1 + beta_i[:, None] * (K[i] - 1))
+            y = K[i] * x
+            x /= x.sum(axis=1, keepdims=True)
+            y /= y.sum(axis=1, keepdims=True)
+            ln_K = (
+                self.ln_phi(T[i], P[i], x, np.zeros(len(i), dtype=bool), a[i])
+                - self.ln_phi(T[i], P[i], y, np.ones(len(i), dtype=bool), a[i])
+            )
+            change = np.max(np.abs(ln_K - np.log(K[i])), axis=1)
+            K[i] = np.exp(ln_K)
+            # Converged, or one of the phases disappeared. K values from the stability test put
+            # the feed right at its bubble or dew point, so a phase has to be missing for two
+            # steps in a row before it counts as gone.
+            bound_i = (beta_i <= 0) | (beta_i >= 1)
+            active[i[(change < tol) | (bound_i & at_bound[i])]] = False
+            at_bound[i] = bound_i
+
+        beta = np.where(single, vapour.astype(float), rachford_rice(z, K))
+        one_phase = (beta <= 0) | (beta >= 1)
+        x = np.where(one_phase[:, None], z, z / (1 + beta[:, None] * (K - 1)))
+        y = np.where(one_phase[:, None], z, K * x)
+        x /= x.sum(axis=1, keepdims=True)
+        y /= y.sum(axis=1, keepdims=True)
+        liquid_root = np.zeros(n, dtype=bool)
+        vapour_root = np.ones(n, dtype=bool)
+        with np.errstate(invalid="ignore"):
+            # The phase enthalpies are nan for a phase that isn't there when its root doesn't exist
+            h = (1 - beta) * self.enth_mol_phase(T, P, x, liquid_root) + beta * self.enth_mol_phase(T, P, y, vapour_root)
+        h = np.where(one_phase, self.enth_mol_phase(T, P, z, beta >= 1), h)
+        return {
+            "components": self.components, "temperature": T, "pressure": P,
+            "vapor_frac": beta, "x": x, "y": y, "enth_mol": h, "K": K,
+        }
+
+    def ph(self, P, h, z, T_bounds=(200.0, 1000.0), tol=1e-3, iterations=60):
+        """
+        PH flash of arrays of states. Returns the same dict as tp().
+
+        The temperature is found by false position (Illinois) in T_bounds, to within tol J/mol.
+        Each step only flashes the states that haven't converged, starting from their K values
+        at the last step.
+        """
+        P, h, z = _states(P, h, z, len(self.components))
+        n = len(P)
+
+        lo = np.full(n, T_bounds[0], dtype=float)
+        hi = np.full(n, T_bounds[1], dtype=float)
+        f_lo = self.tp(lo, P, z)["enth_mol"] - h
+        result = self.tp(hi, P, z)
+        f_hi = result["enth_mol"] - h
+        K = result["K"]
+        f = f_hi.copy()
+        side = np.zeros(n)
+        T = (lo + hi) / 2
+        active = np.ones(n, dtype=bool)
+        for _ in range(iterations):
+            i = np.flatnonzero(active)
+            if len(i) == 0:
+                break
+            # Enthalpy increases with temperature, so f_lo < 0 < f_hi
+            with np.errstate(divide="ignore", invalid="ignore"):
+                T_i = hi[i] - f_hi[i] * (hi[i] - lo[i]) / (f_hi[i] - f_lo[i])
+            T_i = np.where(np.isfinite(T_i) & (T_i > lo[i]) & (T_i < hi[i]), T_i, (lo[i] + hi[i]) / 2)
+            step = self.tp(T_i, P[i], z[i], K=K[i])
+            for name in ("vapor_frac", "x", "y", "enth_mol", "K"):
+                result[name][i] = step[name]
+            T[i] = T_i
+            K[i] = step["K"]
+            f[i] = f_i = step["enth_mol"] - h[i]
+            low = f_i < 0
+            # Illinois: halve the end that has stayed put twice in a row
+            f_hi[i] = np.where(low & (side[i] < 0), f_hi[i] / 2, f_hi[i])
+            f_lo[i] = np.where(~low & (side[i] > 0), f_lo[i] / 2, f_lo[i])
+            lo[i], f_lo[i] = np.where(low, T_i, lo[i]), np.where(low, f_i, f_lo[i])
+            hi[i], f_hi[i] = np.where(low, hi[i], T_i), np.where(low, f_hi[i], f_i)
+            side[i] = np.where(low, -1, 1)
+            active[i[(np.abs(f_i) <= tol) | (hi[i] - lo[i] < 1e-9)]] = False
+        result["temperature"] = T
+
+        # Where the enthalpy jumps at the temperature (a pure component boiling), split by the lever rule
+        jump = np.abs(f) > tol
+        if np.any(jump):
+            h_liq = self.enth_mol_phase(T, P, z, np.zeros(n, dtype=bool))
+            h_vap = self.enth_mol_phase(T, P, z, np.ones(n, dtype=bool))
+            # Only where the flash left the state in one phase, and both roots exist and differ,
+            # otherwise there's nothing to split between
+            jump &= (result["vapor_frac"] <= 0) | (result["vapor_frac"] >= 1)
+            jump &= (h_vap - h_liq > tol) & (h_liq <= h) & (h <= h_vap)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                beta = np.clip((h - h_liq) / np.where(jump, h_vap - h_liq, 1), 0, 1)
+            result["vapor_frac"] = np.where(jump, beta, result["vapor_frac"])
+            result["x"] = np.where(jump[:, None], z, result["x"])
+            result["y"] = np.where(jump[:, None], z, result["y"])
+            result["enth_mol"] = np.where(jump, h, result["enth_mol"])
+        return result
+
+
+def set_initial_guess(state, result, k=0):
+    """
+    Set the temperature, phase fractions and phase compositions of a Pyomo (FPhx or FTPx) state
+    block data from row k of a PRFlash result. Only sets values, nothing is fixed.
+    """
+    order = {j: i for i, j in enumerate(result["components"])}
+    beta = float(result["vapor_frac"][k])
+    if not state.temperature.fixed:
+        state.temperature.set_value(float(result["temperature"][k]))
+    if hasattr(state, "phase_frac"):
+        for p in state.phase_frac:
+            state.phase_frac[p].set_value(beta if p == "Vap" else 1 - beta)
+    if hasattr(state, "mole_frac_phase_comp"):
+        for p, j in state.mole_frac_phase_comp:
+            w = result["y"] if p == "Vap" else result["x"]
+            state.mole_frac_phase_comp[p, j].set_value(float(w[k, order[j]]))
+    if hasattr(state, "flow_mol_phase"):
+        flow = state.flow_mol.value
+        if flow is not None:
+            for p in state.flow_mol_phase:
+                state.flow_mol_phase[p].set_value(flow * (beta if p == "Vap" else 1 - beta))
@@ -0,0 +1,99 @@
+"""
+Bulk reporting of time indexed values.
+
+Calling unit.report(t) in a loop over time builds and prints a stream table for every time
+point, which takes seconds for a long horizon. report_frame pulls the values of all the
+requested ports and variables at every time point in one pass instead:
+
+    from time_report import report_frame
+    df = report_frame([m.fs.tank, m.fs.pump.outlet, m.fs.tank.tank_level])
+
+Components can be unit models (all their ports are reported), ports, or time indexed
+Vars, Expressions or References. Variables with extra indices (e.g mole_frac_comp[t, j])
+get a column per extra index.
+"""
+import numpy as np
+import pandas as pd
+from pyomo.environ import Block, value
+from pyomo.network import Port
+from idaes.core.util.exceptions import ConfigurationError
+
+
+def _members(component):
+    """
+    (name, time indexed component) pairs for everything to report on a component.
+    """
+    if isinstance(component, Port):
+        return [(f"{component.name}.{k}", v) for k, v in component.vars.items()]
+    if component.ctype is Block:
+        ports = list(component.component_objects(Port, descend_into=False))
+        if not ports:
+            raise ConfigurationError(f"{component.name} has no ports to report")
+        return [member for port in ports for member in _members(port)]
+    if not component.is_indexed():
+        raise ConfigurationError(f"{component.name} isn't indexed by time")
+    return [(component.name, component)]
+
+
+def _default_time(component):
+    # The time set of the nearest flowsheet above the component
+    block = component if component.ctype is Block else component.parent_block()
+    while block is not None:
+        if hasattr(block, "time"):
+            return block.time
+        block = block.parent_block()
+    raise ConfigurationError(f"Couldn't find a time set for {component.name}, pass time explicitly")
+
+
+def collect(components, time=None):
+    """
+    Values of the components at every time point.
+
+    Args:
+        components: list of unit models, ports, or time indexed components
+        time: the time set (default: the time set of the flowsheet of the first component)
+
+    Returns:
+        (time_points, names, values): time_points is an array of the time points, names a
+        list of the column names, and values an array of shape (len(time_points), len(names))
+    """
+    if time is None:
+        time = _default_time(components[0])
+    time_points = list(time)
+    row = {t: i for i, t in enumerate(time_points)}
+
+    columns = {}
+    for component in components:
+        for name, member in _members(component):
+            for index, data in member.items():
+                if isinstance(index, tuple):
+                    t, rest = index[0], index[1:]
+                else:
+                    t, rest = index, ()
+                if rest:
+                    column = f"{name}[{','.join(str(i) for i in rest)}]"
+                else:
+                    column = name
+                if column not in columns:
+                    columns[column] = np.full(len(time_points), np.nan)
+                v = value(data, exception=False)
+                if v is not None:
+                    columns[column][row[t]] = v
+
+    names = list(columns)
+    values = np.column_stack([columns[n] for n in names]) if names else np.empty((len(time_points), 0))
+    return np.array(time_points, dtype=float), names, values
+
+
+def report_frame(components, time=None, tidy=False):
+    """
+    DataFrame of the values of the components at every time point.
+
+    With tidy=False (the default) there is a row per time point and a column per value.
+    With tidy=True the frame is in long format, with time, variable and value columns.
+    """
+    time_points, names, values = collect(components, time)
+    wide = pd.DataFrame(values, index=pd.Index(time_points, name="time"), columns=names)
+    if not tidy:
+        return wide
+    return wide.reset_index().melt(id_vars="time", var_name="variable", value_name="value")